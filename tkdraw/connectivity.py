@@ -0,0 +1,237 @@
+'''
+Electrical connectivity between the lines of a document, for treating a
+drawing as a schematic.  Two lines are connected if an endpoint of one lies
+on the other, either on one of its endpoints or partway along it in a
+T-junction, allowing for the rounding error of a point snapped to partway
+along a sloping line.  Lines that merely cross aren't connected, as on a
+schematic.  A net is a set of lines that are connected to each other,
+directly or through other lines.
+
+The adjacency between lines and the assignment of lines to nets are both kept
+up to date incrementally as lines are added, removed and moved, so nothing is
+ever recomputed for the whole document.  Adding a line merges the nets it
+touches, relabelling the lines of all but the largest, which is the usual
+union-by-size union-find with the members of each net kept explicitly.
+Removing a line may split its net; only that net is walked to find the
+pieces, starting from the removed line's neighbours, and the walk stops as
+soon as it has found the whole net in one piece.  Lines that move together,
+such as a group being dragged, are reconnected in one go once they have all
+moved, so that the connections within the group are left alone rather than
+broken and remade line by line.  Looking up a line's net takes constant time.
+'''
+from . import geom
+from .store import KIND_LINE
+
+
+# How far a point may be from a line and still be taken to lie on it.  Points
+# snapped to partway along a sloping line are only as close to it as floating
+# point allows.
+TOUCH_TOLERANCE = 1e-6
+
+
+def _touches(S, P):
+    '''
+    Returns True if the point P lies on the line segment S, to within
+    TOUCH_TOLERANCE.
+    '''
+    if S.intersects(geom.LineSegment(P, P)):
+        return True
+    if S.line.p0 == S.line.p1:
+        return False
+    return (S.nearest_point(P) - P).norm_squared() <= TOUCH_TOLERANCE**2
+
+
+class Connectivity:
+    '''
+    The nets of the lines in an ElemStore.  The GridIndex over the store's
+    slots is used to find the lines near a line being added, and must be
+    updated before the line is added here.
+    '''
+    def __init__(self, elem_store, index):
+        self.store    = elem_store
+        self.index    = index
+        self._ends    = {}
+        self._adj     = {}
+        self._net     = {}
+        self._members = {}
+        self._next_id = 0
+
+        for slot in elem_store:
+            self.add(slot)
+
+    def __contains__(self, slot):
+        return slot in self._net
+
+    def _new_net(self, slots):
+        net = self._next_id
+        self._next_id += 1
+        self._members[net] = slots
+        for slot in slots:
+            self._net[slot] = net
+        return net
+
+    def _line(self, slot):
+        es = self.store
+        return (geom.Vec(es.x0[slot], es.y0[slot]),
+                geom.Vec(es.x1[slot], es.y1[slot]))
+
+    def _neighbours(self, slot, p0, p1):
+        S          = geom.LineSegment(p0, p1)
+        neighbours = set()
+        for other in self.index.query_rect(geom.Rect(p0, p1)):
+            if other == slot or other not in self._ends:
+                continue
+            q0, q1 = self._line(other)
+            T      = geom.LineSegment(q0, q1)
+            if (_touches(T, p0) or _touches(T, p1) or
+                    _touches(S, q0) or _touches(S, q1)):
+                neighbours.add(other)
+        return neighbours
+
+    def add(self, slot):
+        '''
+        Adds the line in the slot, connecting it to the lines it touches.
+        Slots holding other kinds of record are ignored.
+        '''
+        if self.store.kinds[slot] != KIND_LINE:
+            return
+
+        p0, p1 = self._line(slot)
+        neighbours = self._neighbours(slot, p0, p1)
+        self._ends[slot] = (p0, p1)
+        self._adj[slot]  = neighbours
+        for n in neighbours:
+            self._adj[n].add(slot)
+
+        self._new_net({slot})
+        for n in neighbours:
+            self._merge(slot, n)
+
+    def _merge(self, a, b):
+        # Merges the nets of the lines in slots a and b into the larger one.
+        na, nb = self._net[a], self._net[b]
+        if na == nb:
+            return
+        if len(self._members[na]) < len(self._members[nb]):
+            na, nb = nb, na
+        members = self._members[na]
+        for s in self._members.pop(nb):
+            self._net[s] = na
+            members.add(s)
+
+    def _split(self, net, starts):
+        # Splits the net into its connected pieces, given slots in the net
+        # that between them reach every piece.  The first piece keeps the net
+        # if it turns out to be the whole thing.
+        members   = self._members[net]
+        unvisited = set(starts)
+        while unvisited:
+            start = unvisited.pop()
+            piece = {start}
+            stack = [start]
+            while stack:
+                for n in self._adj[stack.pop()]:
+                    if n not in piece:
+                        piece.add(n)
+                        stack.append(n)
+            unvisited -= piece
+            if len(piece) == len(members):
+                return
+            members -= piece
+            self._new_net(piece)
+
+    def remove(self, slot):
+        '''
+        Removes the line in the slot, splitting its net if it held the net
+        together.
+        '''
+        if slot not in self._ends:
+            return
+
+        del self._ends[slot]
+        neighbours = self._adj.pop(slot)
+        for n in neighbours:
+            self._adj[n].discard(slot)
+        net     = self._net.pop(slot)
+        members = self._members[net]
+        members.discard(slot)
+        if not members:
+            del self._members[net]
+            return
+
+        # Every piece left behind holds one of the removed line's neighbours.
+        self._split(net, neighbours)
+
+    def update(self, slot):
+        '''
+        Reconnects the line in the slot if it has moved.
+        '''
+        self.update_lines((slot,))
+
+    def update_lines(self, slots):
+        '''
+        Reconnects the lines in the slots, which may have moved together, for
+        instance as a group being dragged; they must all have been moved in
+        the store and the index first.  Only the connections that were
+        actually made or broken are touched.  A moved line whose neighbours
+        are the same as before, as are those of most lines in a group moving
+        together, costs one index query, and a net is only walked if it has
+        lost a connection, once however many of its lines have moved.
+        '''
+        added   = []
+        removed = []
+        for slot in slots:
+            if slot not in self._ends:
+                self.add(slot)
+                continue
+            p0, p1 = self._line(slot)
+            if self._ends[slot] == (p0, p1):
+                continue
+            self._ends[slot] = (p0, p1)
+            old = self._adj[slot]
+            new = self._neighbours(slot, p0, p1)
+            if new == old:
+                continue
+            for n in old - new:
+                self._adj[n].discard(slot)
+                removed.append(slot)
+                removed.append(n)
+            for n in new - old:
+                self._adj[n].add(slot)
+                added.append((slot, n))
+            self._adj[slot] = new
+
+        # Make the new connections, then split the nets that lost some.
+        # Every piece of a split net holds an end of a lost connection.
+        for a, b in added:
+            self._merge(a, b)
+        starts = {}
+        for s in removed:
+            starts.setdefault(self._net[s], set()).add(s)
+        for net, ss in starts.items():
+            self._split(net, ss)
+
+    def net(self, slot):
+        '''
+        Returns the set of slots of the lines in the same net as the line in
+        the slot, including itself.  Slots that don't hold lines are only
+        connected to themselves.
+        '''
+        net = self._net.get(slot)
+        if net is None:
+            return {slot}
+        return set(self._members[net])
+
+    def net_id(self, slot):
+        '''
+        Returns an identifier for the net of the line in the slot, which is
+        the same for every line in the net until the net is next changed.
+        '''
+        return self._net.get(slot)
+
+    def neighbours(self, slot):
+        '''
+        Returns the set of slots of the lines directly connected to the line
+        in the slot.
+        '''
+        return set(self._adj.get(slot, ()))
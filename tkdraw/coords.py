@@ -1,8 +1,16 @@
 '''
-Utility methods for dealing with the grid in the canvas.  The canvas has fixed
-padding around the four edges and the workspace ensures that when resizing the
-window it can only go in multiples of the grid size.
+Utility methods for dealing with the grid in the canvas.  The module-level
+functions implement the unzoomed layout, which has fixed padding around the
+four edges; the workspace ensures that when resizing the window it can only go
+in multiples of the grid size.  Text metrics are also measured in this layout
+so that text keeps the same size relative to the grid at every zoom level.
+
+Drawing on the canvas goes through a View instead, which maps grid coordinates
+to canvas coordinates using a scale and offset that change as the user zooms
+and pans.
 '''
+import math
+
 from . import geom
 
 
@@ -10,6 +18,117 @@ GRID_SPACING = 10
 GRID_PAD     = (GRID_SPACING // 2)
 GRID_PAD_DV  = geom.Vec(GRID_PAD, GRID_PAD)
 
+# Grid points closer together than this many canvas units are decimated, only
+# drawing every second, fourth, eighth, etc. point.
+MIN_GRID_PIXELS = 5
+
+
+class View:
+    '''
+    Transform between grid coordinates and canvas coordinates: the grid point
+    p maps to the canvas point p * scale + offset, so scale is the number of
+    canvas units per grid unit.  Views are immutable; zoomed() and panned()
+    return new ones.  The default View reproduces the unzoomed layout.
+    '''
+    __slots__ = ('scale', 'offset')
+
+    def __init__(self, scale=GRID_SPACING, offset=GRID_PAD_DV):
+        self.scale  = scale
+        self.offset = offset
+
+    def __repr__(self):
+        return 'View(%s, %s)' % (self.scale, self.offset)
+
+    def __eq__(self, other):
+        return self.scale == other.scale and self.offset == other.offset
+
+    def __hash__(self):
+        return hash((self.scale, self.offset))
+
+    def gridx_to_canvasx(self, x):
+        return x * self.scale + self.offset.x
+
+    def gridy_to_canvasy(self, y):
+        return y * self.scale + self.offset.y
+
+    def gridp_to_canvasp(self, p):
+        return p * self.scale + self.offset
+
+    def grid_to_canvas(self, x, y):
+        return (self.gridx_to_canvasx(x), self.gridy_to_canvasy(y))
+
+    def grid_to_canvas_delta(self, d):
+        return d * self.scale
+
+    def canvas_to_grid_delta(self, d):
+        return d / self.scale
+
+    def canvasx_to_gridx_float(self, x):
+        return (x - self.offset.x) / self.scale
+
+    def canvasy_to_gridy_float(self, y):
+        return (y - self.offset.y) / self.scale
+
+    def canvasx_to_gridx_round(self, x):
+        return round(self.canvasx_to_gridx_float(x))
+
+    def canvasy_to_gridy_round(self, y):
+        return round(self.canvasy_to_gridy_float(y))
+
+    def canvas_to_grid_rect(self, R):
+        '''
+        Converts the rectangle R in canvas coordinates to grid coordinates.
+        '''
+        return geom.Rect(
+            geom.Vec(self.canvasx_to_gridx_float(R.l),
+                     self.canvasy_to_gridy_float(R.t)),
+            geom.Vec(self.canvasx_to_gridx_float(R.r),
+                     self.canvasy_to_gridy_float(R.b)))
+
+    def panned(self, dx, dy):
+        '''
+        Returns the View with the drawing moved by (dx, dy) canvas units.
+        '''
+        return View(self.scale, self.offset + geom.Vec(dx, dy))
+
+    def zoomed(self, factor, x, y):
+        '''
+        Returns the View with the scale multiplied by factor, keeping the grid
+        point under the canvas point (x, y) in place.
+        '''
+        scale = self.scale * factor
+        c     = geom.Vec(x, y)
+        p     = geom.Vec(self.canvasx_to_gridx_float(x),
+                         self.canvasy_to_gridy_float(y))
+        return View(scale, c - p * scale)
+
+    def grid_pitch(self):
+        '''
+        Returns the distance, in canvas units, between the drawn grid points.
+        '''
+        return self.grid_step() * self.scale
+
+    def grid_origin(self):
+        '''
+        Returns the canvas position of the drawn grid point nearest to the
+        canvas origin from above and to the left.
+        '''
+        pitch = self.grid_pitch()
+        x, y  = self.offset.x, self.offset.y
+        return geom.Vec(x - math.ceil(x / pitch) * pitch,
+                        y - math.ceil(y / pitch) * pitch)
+
+    def grid_step(self):
+        '''
+        Returns the spacing, in grid units, between the grid points that
+        should be drawn at this scale: the smallest power of two that puts
+        them at least MIN_GRID_PIXELS apart.
+        '''
+        step = 1
+        while step * self.scale < MIN_GRID_PIXELS:
+            step *= 2
+        return step
+
 
 def canvasx_floor(x):
     '''
@@ -145,29 +264,10 @@ def canvas_to_grid_delta(d):
     return d / GRID_SPACING
 
 
-def get_canvas_h_bands(w, h):
-    '''
-    Given the canvas width and height, returns a list of rectangles
-    (x, y, w, h) in canvas coordinates that should be used to subdivide the
-    black fill into horizontal bands, including the pad rectangle at the top.
-    '''
-    rs = [geom.Rect.from_vec(geom.Vec(w, GRID_PAD))]
-    for y in range(h // GRID_SPACING + 1):
-        p0 = geom.Vec(0, gridy_to_canvasy(y) + 1)
-        p1 = geom.Vec(w, p0.y + GRID_SPACING - 1)
-        rs.append(geom.Rect(p0, p1))
-    return rs
-
-
-def get_canvas_v_bands(w, h):
+def grid_dots(pitch, extent):
     '''
-    Given the canvas width and height, returns a list of rectangles
-    (x, y, w, h) in canvas coordinates that should be used to subdivide the
-    black fill into vertical bands, including the pad rectangle on the left.
+    Returns the positions, rounded to whole canvas units, of grid points spaced
+    pitch canvas units apart starting from 0 and running up to extent.
     '''
-    rs = [geom.Rect.from_vec(geom.Vec(GRID_PAD, h))]
-    for x in range(w // GRID_SPACING + 1):
-        p0 = geom.Vec(gridx_to_canvasx(x) + 1, 0)
-        p1 = geom.Vec(p0.x + GRID_SPACING - 1, h)
-        rs.append(geom.Rect(p0, p1))
-    return rs
+    return [round(i * pitch) for i in range(math.ceil(extent / pitch))
+            if round(i * pitch) < extent]
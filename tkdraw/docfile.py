@@ -0,0 +1,161 @@
+'''
+Binary file format for Documents.  All values are little-endian and the file
+is a straight dump of the Document's ElemStore, laid out as:
+
+    header        HEADER
+    kinds         n_slots bytes, padded with zeroes to a multiple of 8
+    records       n_slots * RECORD
+    text records  n_texts * TEXT_RECORD
+    string table  strtab_size bytes of UTF-8
+
+There is one fixed-width record per store slot holding the (x0, y0, x1, y1)
+geometry of the elem in that slot, in the layout documented by ElemStore;
+free slots are recorded with KIND_FREE and zeroed geometry.  Text records
+give the slot of a TextElem and the offset and length of its text in the
+string table.
+
+Because the records match the store's columns the loader can copy them out
+of the memory-mapped file without visiting each one in Python, and slot
+numbers are preserved exactly across a save and load.
+
+The header also records the sequence number of the last journal record that
+the file includes, so that replaying a journal on top of it can skip the
+records that are already reflected in it.
+
+Readers must reject files with a version newer than the one they understand.
+'''
+import array
+import mmap
+import os
+import struct
+import sys
+
+from . import document
+from . import store
+
+
+MAGIC       = b'TKDRAW\r\n'
+VERSION     = 1
+HEADER      = struct.Struct('<8sIIQQQQ')
+RECORD      = struct.Struct('<4d')
+TEXT_RECORD = struct.Struct('<QQQ')
+
+
+class FormatError(Exception):
+    pass
+
+
+def _pad8(n):
+    return (n + 7) & ~7
+
+
+def save_store(es, path, seq=0):
+    '''
+    Writes the ElemStore to the specified path, tagged with the journal
+    sequence number seq.  The file is written to a temporary path alongside
+    the destination, synced to disk and then renamed into place so that a
+    crash mid-save never leaves a truncated file behind.
+    '''
+    n_slots = es.capacity
+
+    records = array.array('d', bytes(RECORD.size * n_slots))
+    for i, column in enumerate((es.x0, es.y0, es.x1, es.y1)):
+        records[i::4] = column
+    if sys.byteorder == 'big':
+        records.byteswap()
+
+    text_data = bytearray()
+    strtab    = bytearray()
+    for slot in es.slots_of_kind(store.KIND_TEXT):
+        s = es.texts[slot].encode('utf-8')
+        text_data += TEXT_RECORD.pack(slot, len(strtab), len(s))
+        strtab    += s
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, seq, n_slots,
+                            len(text_data) // TEXT_RECORD.size, len(strtab)))
+        f.write(es.kinds.tobytes())
+        f.write(bytes(_pad8(n_slots) - n_slots))
+        records.tofile(f)
+        f.write(text_data)
+        f.write(strtab)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save(doc, path):
+    '''
+    Writes the Document to the specified path.
+    '''
+    save_store(doc.store, path)
+
+
+def _load_store(mv):
+    if len(mv) < HEADER.size:
+        raise FormatError('File too short.')
+    magic, version, _, seq, n_slots, n_texts, strtab_size = \
+        HEADER.unpack_from(mv, 0)
+    if magic != MAGIC:
+        raise FormatError('Not a tkdraw file.')
+    if version > VERSION:
+        raise FormatError('Unsupported file version %u.' % version)
+
+    kinds_pos  = HEADER.size
+    record_pos = kinds_pos + _pad8(n_slots)
+    text_pos   = record_pos + n_slots * RECORD.size
+    strtab_pos = text_pos + n_texts * TEXT_RECORD.size
+    if len(mv) < strtab_pos + strtab_size:
+        raise FormatError('File truncated.')
+
+    kinds = array.array('B')
+    kinds.frombytes(mv[kinds_pos:kinds_pos + n_slots])
+    if max(kinds, default=0) > store.KIND_TEXT:
+        raise FormatError('Unknown elem kind.')
+
+    records = array.array('d')
+    records.frombytes(mv[record_pos:text_pos])
+    if sys.byteorder == 'big':
+        records.byteswap()
+
+    texts = [None] * n_slots
+    for slot, offset, length in TEXT_RECORD.iter_unpack(
+            mv[text_pos:strtab_pos]):
+        if slot >= n_slots or kinds[slot] != store.KIND_TEXT:
+            raise FormatError('Bad text record slot.')
+        if offset + length > strtab_size:
+            raise FormatError('Bad string table reference.')
+        pos         = strtab_pos + offset
+        texts[slot] = str(mv[pos:pos + length], 'utf-8')
+    if texts.count(None) != n_slots - kinds.count(store.KIND_TEXT):
+        raise FormatError('Missing text records.')
+
+    es = store.ElemStore.from_columns(kinds, records[0::4], records[1::4],
+                                      records[2::4], records[3::4], texts)
+    return es, seq
+
+
+def load_store(path):
+    '''
+    Loads an ElemStore from the specified path.  The file is memory-mapped
+    and its records are copied directly into the store's columns.  Returns a
+    tuple (store, seq) where seq is the journal sequence number the file was
+    saved with.
+    '''
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise FormatError('File too short.')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            with memoryview(m) as mv:
+                return _load_store(mv)
+
+
+def load(path, **kwargs):
+    '''
+    Loads a Document from the specified path.  Elem objects are only
+    materialized later, on demand.  Any keyword arguments are passed through
+    to the Document constructor.
+    '''
+    es, _ = load_store(path)
+    return document.Document(elem_store=es, **kwargs)
@@ -1,20 +1,377 @@
+import logging
+import math
+import weakref
+
+from . import geom
+from . import store
+from .connectivity import Connectivity
+
+
+log = logging.getLogger(__name__)
+
+# The kinds of point find_snap_point() snaps to, in order of preference.
+SNAP_ENDPOINT = 'endpoint'
+SNAP_MIDPOINT = 'midpoint'
+SNAP_SEGMENT  = 'segment'
+
+# Keys in the snap point index are (slot, n) for n = 0 or 1 for a line's
+# endpoints and MIDPOINT for its midpoint.
+MIDPOINT = 2
+
+
 class Document:
-    def __init__(self):
-        self.elems = []
+    '''
+    The canonical copy of the document's elems lives in an ElemStore, with
+    each elem occupying a slot in its columnar arrays; the spatial index is
+    keyed by slot as well.  Elem objects are views onto the store that are
+    created on demand by the materialize callback, which takes the store and
+    a slot and returns the Elem for it.  They are cached in the elems dict,
+    keyed by slot, for as long as something else holds a reference to them;
+    an elem that is neither on screen nor held by a tool is dropped and will
+    be materialized afresh the next time it is needed.  Changes made through
+    an Elem object are written back to its slot via elem_changed(), or
+    elems_changed() for a group of them.
+
+    A Document can be constructed around an already-populated ElemStore, for
+    instance one loaded from a file, in which case nn_radius should be given
+    as the largest NN_SLOP radius of any kind of elem in the store.  The
+    spatial index is built lazily on first use so that opening a large
+    document doesn't have to pay for it up front.  So are the snap point
+    index, a PointIndex over the endpoints and midpoints of the lines, and
+    the Connectivity that groups the lines into nets; each is only kept up to
+    date once something has used it.
+
+    If a Journal is attached, every edit reported through the elem_add(),
+    elems_delete(), elems_restore(), elems_translated(), slots_translated(),
+    elem_handle_dragged() and elem_text_changed() hooks is appended to it.
+    Likewise, if a History is attached, the inverse of each edit is recorded
+    in it.
+    '''
+    def __init__(self, materialize=None, elem_store=None, nn_radius=0):
+        if elem_store is None:
+            elem_store = store.ElemStore()
+
+        self.store       = elem_store
+        self.elems       = weakref.WeakValueDictionary()
+        self.materialize = materialize
+        self.nn_radius   = nn_radius
+        self.journal     = None
+        self.history     = None
+        self._index      = None
+        self._points     = None
+        self._nets       = None
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def index(self):
+        '''
+        The spatial index over the store's slots.
+        '''
+        if self._index is None:
+            self._index = geom.GridIndex()
+            for slot in self.store:
+                self._index.insert(slot, self.store.bounding_rect(slot),
+                                   self._index_line(slot))
+        return self._index
+
+    @property
+    def points(self):
+        '''
+        The snap point index over the endpoints and midpoints of the lines.
+        '''
+        if self._points is None:
+            self._points = geom.PointIndex()
+            for slot in self.store:
+                self._insert_points(slot)
+        return self._points
+
+    @property
+    def connectivity(self):
+        '''
+        The Connectivity grouping the lines into nets.
+        '''
+        if self._nets is None:
+            self._nets = Connectivity(self.store, self.index)
+        return self._nets
+
+    def _index_line(self, slot):
+        # Lines are indexed by their endpoints so that they only occupy the
+        # cells they pass through.
+        es = self.store
+        if es.kinds[slot] != store.KIND_LINE:
+            return None
+        return (es.x0[slot], es.y0[slot], es.x1[slot], es.y1[slot])
+
+    def _line_points(self, slot):
+        es = self.store
+        x0, y0, x1, y1 = es.x0[slot], es.y0[slot], es.x1[slot], es.y1[slot]
+        return (((slot, 0), geom.Vec(x0, y0)),
+                ((slot, 1), geom.Vec(x1, y1)),
+                ((slot, MIDPOINT), geom.Vec((x0 + x1) / 2, (y0 + y1) / 2)))
+
+    def _insert_points(self, slot):
+        if self.store.kinds[slot] == store.KIND_LINE:
+            for key, P in self._line_points(slot):
+                self._points.insert(key, P)
+
+    def _update_points(self, slot):
+        if self.store.kinds[slot] == store.KIND_LINE:
+            for key, P in self._line_points(slot):
+                self._points.update(key, P)
+
+    def _remove_points(self, slot):
+        if self.store.kinds[slot] == store.KIND_LINE:
+            for n in (0, 1, MIDPOINT):
+                self._points.remove((slot, n))
+
+    def elem(self, slot):
+        '''
+        Returns the Elem object for the specified slot, materializing it from
+        the store if it doesn't exist yet.  The new elem is only written back
+        to the store if its record differs from the stored one, as a text
+        elem's can if the font's metrics have changed since it was stored.
+        The write-back is journaled but not compacted, since elems may be
+        materialized in the middle of a tool's edit.
+        '''
+        e = self.elems.get(slot)
+        if e is None:
+            e      = self.materialize(self.store, slot)
+            e.slot = slot
+            self.elems[slot] = e
+            self.nn_radius   = max(self.nn_radius, math.sqrt(e.NN_SLOP))
+            if e.record() != self.store.record(slot)[1:]:
+                self.elem_changed(e)
+                if self.journal is not None:
+                    self.journal.log_set(slot, *e.record())
+        return e
 
     def elem_add(self, elem):
-        print('%s added.' % elem)
-        self.elems.append(elem)
+        log.debug('%s added.', elem)
+        index     = self.index
+        elem.slot = self.store.add(elem.KIND, *elem.record())
+        self.elems[elem.slot] = elem
+        index.insert(elem.slot, elem.bounding_rect(),
+                     self._index_line(elem.slot))
+        if self._points is not None:
+            self._insert_points(elem.slot)
+        if self._nets is not None:
+            self._nets.add(elem.slot)
+        self.nn_radius = max(self.nn_radius, math.sqrt(elem.NN_SLOP))
+        if self.journal is not None:
+            self.journal.log_add(elem.slot, elem.KIND, *elem.record())
+            self._journal_edited()
+        if self.history is not None:
+            self.history.record_add([elem.slot])
 
     def elems_delete(self, elems):
-        print('%u elems deleted.' % len(elems))
+        log.debug('%u elems deleted.', len(elems))
+        slots = [e.slot for e in elems]
+        if self.journal is not None:
+            self.journal.log_delete(slots)
+        if self.history is not None:
+            self.history.record_delete(slots)
+        for e in elems:
+            self.index.remove(e.slot)
+            if self._points is not None:
+                self._remove_points(e.slot)
+            if self._nets is not None:
+                self._nets.remove(e.slot)
+            self.store.delete(e.slot)
+            del self.elems[e.slot]
+            e.slot = None
+        if self.journal is not None:
+            self._journal_edited()
+
+    def elems_restore(self, records):
+        '''
+        Recreates the records in a store.Records object, which must all be in
+        free slots, for instance to undo their deletion.  No Elem objects are
+        materialized for them.
+        '''
+        log.debug('%u elems restored.', len(records))
+        index = self.index
+        for slot, kind, x0, y0, x1, y1, text in records:
+            self.store.insert(slot, kind, x0, y0, x1, y1, text)
+            index.insert(slot, self.store.bounding_rect(slot),
+                         self._index_line(slot))
+            if self._points is not None:
+                self._insert_points(slot)
+            if self._nets is not None:
+                self._nets.add(slot)
+            if self.journal is not None:
+                self.journal.log_add(slot, kind, x0, y0, x1, y1, text)
+        if self.journal is not None:
+            self._journal_edited()
+        if self.history is not None:
+            self.history.record_add(records.slots)
+
+    def elem_changed(self, elem):
+        '''
+        Called whenever the geometry of an elem changes so that we can write it
+        back to the store and keep the spatial index up to date.  Elems that
+        haven't been added to the document yet are ignored.
+        '''
+        self.elems_changed((elem,))
+
+    def elems_changed(self, elems):
+        '''
+        Like elem_changed() for a group of elems that have changed together,
+        such as ones translated as a group.  The lines' connections are only
+        worked out once all of them have been written back.
+        '''
+        slots = []
+        for elem in elems:
+            if elem.slot is not None:
+                self.store.set(elem.slot, *elem.record())
+                self._reindex(elem.slot, elem.bounding_rect())
+                slots.append(elem.slot)
+        if self._nets is not None:
+            self._nets.update_lines(slots)
+
+    def _reindex(self, slot, R):
+        self.index.update(slot, R, self._index_line(slot))
+        if self._points is not None:
+            self._update_points(slot)
+
+    def translate_records(self, slots, dv):
+        '''
+        Translates the records in the slots by dv directly in the store,
+        keeping the indexes up to date, without materializing them.  None of
+        the slots may have an Elem object, since it would be left behind.
+        '''
+        es = self.store
+        for slot in slots:
+            es.translate(slot, dv.x, dv.y)
+            self._reindex(slot, es.bounding_rect(slot))
+        if self._nets is not None:
+            self._nets.update_lines(slots)
+
+    def elems_translated(self, elems, dv, nudge=False):
+        '''
+        Reports that the elems have been translated by dv, by a single
+        gesture, or by an arrow key nudge if nudge is True.  Only runs of
+        nudges are coalesced into one undo step.
+        '''
+        self.slots_translated([e.slot for e in elems], dv, nudge)
+
+    def slots_translated(self, slots, dv, nudge=False):
+        log.debug('%u elems translated by %s.', len(slots), dv)
+        if self.journal is not None:
+            self.journal.log_translate(slots, dv.x, dv.y)
+            self._journal_edited()
+        if self.history is not None:
+            self.history.record_translate(slots, dv, nudge)
+
+    def elem_handle_dragged(self, elem, index, h0, h1):
+        log.debug('%s handle %u dragged from %s to %s.', elem, index, h0, h1)
+        self._journal_set(elem)
+        if self.history is not None:
+            self.history.record_handle_drag(elem.slot, index, h0, h1)
+
+    def elem_text_changed(self, elem, old_text):
+        log.debug('%s text changed.', elem)
+        self._journal_set(elem)
+        if self.history is not None:
+            self.history.record_text(elem.slot, old_text, elem.text)
+
+    def _journal_set(self, elem):
+        if self.journal is not None and elem.slot is not None:
+            self.journal.log_set(elem.slot, *elem.record())
+            self._journal_edited()
+
+    def _journal_edited(self):
+        if self.journal.needs_compaction():
+            self.journal.compact(self.store)
+
+    def close(self):
+        '''
+        Closes the journal, if any, compacting the document into its snapshot.
+        '''
+        if self.journal is not None:
+            self.journal.close(self.store)
+            self.journal = None
+
+    def find_nearest_elem(self, P):
+        '''
+        Returns the elem nearest to the point P, considering only elems that
+        are within their NN_SLOP of P.  Returns None if there is no such elem.
+        '''
+        nearest_elem = None
+        nearest_nn   = None
+        for slot in self.index.query_point(P, self.nn_radius):
+            e  = self.elem(slot)
+            dv = e.nearest_point(P) - P
+            nn = dv.norm_squared()
+            if nn > e.NN_SLOP:
+                continue
+            if nearest_elem is None or nn < nearest_nn:
+                nearest_elem, nearest_nn = e, nn
+        return nearest_elem
+
+    def find_elems_in_rect(self, R):
+        '''
+        Returns the set of elems that partially or fully overlap the rectangle
+        R.
+        '''
+        elems = set()
+        for slot in self.index.query_rect(R):
+            e = self.elem(slot)
+            if e.overlaps_rect(R):
+                elems.add(e)
+        return elems
+
+    def find_connected_elems(self, elems):
+        '''
+        Returns the set of elems in the same nets as the elems, including the
+        elems themselves.
+        '''
+        nets  = self.connectivity
+        slots = set()
         for e in elems:
-            self.elems.remove(e)
+            if e.slot not in slots:
+                slots |= nets.net(e.slot)
+        return {self.elem(slot) for slot in slots}
 
-    @staticmethod
-    def elems_translated(elems, dv):
-        print('%u elems translated by %s.' % (len(elems), dv))
+    def find_snap_point(self, P, radius, G=None):
+        '''
+        Returns the point to snap the point P to and its kind, or (None, None)
+        if there is nothing within the radius of P to snap to.  Line endpoints
+        are preferred to midpoints, and midpoints to the nearest points on the
+        lines.  If the grid point G is given and lies exactly on a line within
+        the radius, it is preferred to the nearest point on the line, so that
+        lines drawn on the grid meet on the grid.  Only the snap points and
+        lines near P are looked at, so this takes constant time however large
+        the document is.
+        '''
+        points = self.points
+        key    = points.nearest(P, radius, lambda k: k[1] != MIDPOINT)
+        if key is not None:
+            return geom.Vec(*points.point(key)), SNAP_ENDPOINT
+        key = points.nearest(P, radius, lambda k: k[1] == MIDPOINT)
+        if key is not None:
+            return geom.Vec(*points.point(key)), SNAP_MIDPOINT
 
-    @staticmethod
-    def elem_handle_dragged(elem, index, h0, h1):
-        print('%s handle %u dragged from %s to %s.' % (elem, index, h0, h1))
+        best    = None
+        best_d  = None
+        best_N  = None
+        es      = self.store
+        on_grid = (G is not None and (G - P).norm_squared() <= radius**2)
+        for slot in self.index.query_point(P, radius):
+            if es.kinds[slot] != store.KIND_LINE:
+                continue
+            p0 = geom.Vec(es.x0[slot], es.y0[slot])
+            p1 = geom.Vec(es.x1[slot], es.y1[slot])
+            if p0 == p1:
+                continue
+            S = geom.LineSegment(p0, p1)
+            if on_grid and S.intersects(geom.LineSegment(G, G)):
+                return G, SNAP_SEGMENT
+            N = S.nearest_point(P)
+            d = (N - P).norm_squared()
+            if d <= radius**2 and (best is None or (d, slot) < (best_d, best)):
+                best, best_d, best_N = slot, d, N
+        if best is not None:
+            return best_N, SNAP_SEGMENT
+        return None, None
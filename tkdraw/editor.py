@@ -0,0 +1,117 @@
+'''
+The edits a Workspace makes to its document on behalf of its tools and its
+undo history.  Each edit updates the Document and then brings the canvas,
+the Renderer and the selected tool into step with it, so that the Document
+stays free of any knowledge of the canvas.
+
+Undo, redo and save do nothing while the selected tool is in the middle of an
+edit, since the store then holds changes that haven't been journaled or
+recorded in the history yet.
+'''
+import logging
+
+
+log = logging.getLogger(__name__)
+
+TRANSLATE_TAG = 'translate'
+
+
+class Editor:
+    def __init__(self, workspace):
+        self.workspace = workspace
+
+    def translate_elems(self, elems, dv, tag):
+        '''
+        Translate the elems by the grid delta dv.  The canvas items of the
+        elems must all carry the canvas tag, which is used to move them with a
+        single canvas operation; any other canvas items that carry the tag are
+        moved along with them.  A single handles-changed notification is sent
+        for the whole group.
+        '''
+        ws   = self.workspace
+        view = ws.view
+        ws.canvas.move(tag, view.grid_to_canvas_delta(dv.x),
+                       view.grid_to_canvas_delta(dv.y))
+        for e in elems:
+            e.translate_model(dv)
+        ws.doc.elems_changed(elems)
+        for e in elems:
+            ws.renderer.update_elem(e, redraw=False)
+        ws.selected_tool.handle_elems_translated(elems, dv, tag)
+
+    def translate_slots(self, slots, dv):
+        '''
+        Translate the elems in the slots by the grid delta dv, for instance to
+        undo a move.  Only the elems that already have Elem objects are moved
+        through them, as a group with translate_elems(); the rest are moved
+        straight in the document's store without being materialized, and only
+        get canvas items if they have come into view.
+        '''
+        ws    = self.workspace
+        doc   = ws.doc
+        elems = []
+        other = []
+        for slot in slots:
+            e = doc.elems.get(slot)
+            if e is not None:
+                elems.append(e)
+            else:
+                other.append(slot)
+
+        if elems:
+            ws.renderer.tag_elems(elems, TRANSLATE_TAG)
+            self.translate_elems(elems, dv, TRANSLATE_TAG)
+            ws.renderer.untag_elems(elems, TRANSLATE_TAG)
+        doc.translate_records(other, dv)
+        ws.renderer.update_slots(other)
+
+    def delete_elems(self, elems):
+        '''
+        Deletes the elems from the document and returns their canvas items to
+        the Renderer's pool.
+        The selected tool is told first so that it can drop its references to
+        them.
+        '''
+        ws = self.workspace
+        ws.selected_tool.handle_elems_deleted(elems)
+        for e in elems:
+            if e.tk_elem is not None:
+                ws.renderer.detach(e)
+        ws.doc.elems_delete(elems)
+        ws.renderer.invalidate()
+
+    def restore_elems(self, records):
+        '''
+        Restores the deleted elems in a store.Records object to the document,
+        giving canvas items to the ones that are in view.
+        '''
+        ws = self.workspace
+        ws.doc.elems_restore(records)
+        ws.renderer.update_slots(records.slots)
+
+    def undo(self):
+        ws = self.workspace
+        if ws.selected_tool.is_idle():
+            with ws.canvas.batch():
+                ws.history.undo()
+
+    def redo(self):
+        ws = self.workspace
+        if ws.selected_tool.is_idle():
+            with ws.canvas.batch():
+                ws.history.redo()
+
+    def save(self):
+        '''
+        Compacts the document's journal into a fresh snapshot.  Edits are
+        journaled as they are made, so this isn't needed for safety; the
+        snapshot is written on the journal's background thread.
+        '''
+        ws = self.workspace
+        if not ws.selected_tool.is_idle():
+            return
+        if ws.doc.journal is None:
+            log.warning('No path to save to.')
+            return
+        ws.doc.journal.compact(ws.doc.store)
+        log.info('Saving %u elems to %s.', len(ws.doc), ws.path)
@@ -1,7 +1,31 @@
+import math
+
 from .line_elem import LineElem
 from .text_elem import TextElem
+from .. import geom
+from .. import store
+
+
+# The largest NN_SLOP radius of any kind of elem; documents use this as the
+# radius for nearest-elem queries against their spatial index.
+NN_RADIUS = math.sqrt(max(LineElem.NN_SLOP, TextElem.NN_SLOP))
+
+
+def materialize(workspace, elem_store, slot):
+    '''
+    Creates the Elem object for the record in the specified slot of an
+    ElemStore.
+    '''
+    kind, x0, y0, x1, y1, text = elem_store.record(slot)
+    if kind == store.KIND_LINE:
+        return LineElem(workspace, geom.Vec(x0, y0), geom.Vec(x1, y1))
+    if kind == store.KIND_TEXT:
+        return TextElem(workspace, geom.Vec(x0, y0), text)
+    raise ValueError('Unknown elem kind %u in slot %u.' % (kind, slot))
 
 
-__all__ = ['LineElem',
+__all__ = ['NN_RADIUS',
+           'LineElem',
            'TextElem',
+           'materialize',
            ]
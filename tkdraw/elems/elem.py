@@ -1,10 +1,31 @@
 class Elem:
+    KIND = None
+
     def __init__(self):
         self.handles = []
+        self.slot    = None
+        self.tk_elem = None
+        self.tags    = set()
+
+    def create_tk_elem(self):
+        '''
+        Creates and returns a new canvas item depicting the elem.
+        '''
+        raise NotImplementedError
+
+    def draw(self):
+        '''
+        Updates the elem's canvas item, which may have been depicting some
+        other elem of the same KIND, to depict this one.
+        '''
+        raise NotImplementedError
 
     def translate(self, dv):
         raise NotImplementedError
 
+    def translate_model(self, dv):
+        raise NotImplementedError
+
     def is_handle_interactive(self, index):
         raise NotImplementedError
 
@@ -17,5 +38,15 @@ class Elem:
     def overlaps_rect(self, R):
         raise NotImplementedError
 
+    def bounding_rect(self):
+        raise NotImplementedError
+
+    def record(self):
+        '''
+        Returns the elem's geometry as a tuple (x0, y0, x1, y1, text) in the
+        layout used by the Document's ElemStore for records of this KIND.
+        '''
+        raise NotImplementedError
+
     def add_inspector(self, workspace):
         raise NotImplementedError
@@ -1,9 +1,10 @@
 from .elem import Elem
-from .. import coords
 from .. import geom
+from .. import store
 
 
 class LineElem(Elem):
+    KIND    = store.KIND_LINE
     NN_SLOP = 4
 
     def __init__(self, workspace, p0, p1):
@@ -13,7 +14,6 @@ class LineElem(Elem):
         super().__init__()
 
         self.workspace = workspace
-        self.tk_elem   = workspace.add_line(p0, p1)
         self.segment   = geom.LineSegment(p0, p1)
         self.handles.append(p0)
         self.handles.append(p1)
@@ -23,15 +23,30 @@ class LineElem(Elem):
                 self.segment.line.p0.x, self.segment.line.p0.y,
                 self.segment.line.p1.x, self.segment.line.p1.y)
 
-    def move_line(self, p0, p1):
-        self.segment = geom.LineSegment(p0, p1)
+    def _set_line(self, p0, p1):
+        self.segment    = geom.LineSegment(p0, p1)
         self.handles[0] = p0
         self.handles[1] = p1
+
+    def create_tk_elem(self):
+        return self.workspace.add_line(self.segment.line.p0,
+                                       self.segment.line.p1)
+
+    def draw(self):
+        view = self.workspace.view
+        p0   = self.segment.line.p0
         self.tk_elem.move_line(
-                coords.gridx_to_canvasx(p0.x),
-                coords.gridy_to_canvasy(p0.y),
-                coords.grid_to_canvas_delta(self.segment.line.dt.x),
-                coords.grid_to_canvas_delta(self.segment.line.dt.y))
+                view.gridx_to_canvasx(p0.x),
+                view.gridy_to_canvasy(p0.y),
+                view.grid_to_canvas_delta(self.segment.line.dt.x),
+                view.grid_to_canvas_delta(self.segment.line.dt.y))
+
+    def move_line(self, p0, p1):
+        '''
+        Moves the line's endpoints to p0 and p1.  The canvas item, if any, is
+        redrawn by the workspace's Renderer when notified of the change.
+        '''
+        self._set_line(p0, p1)
         self.workspace.notify_handles_changed(self, [0, 1])
 
     def translate(self, dv):
@@ -40,6 +55,14 @@ class LineElem(Elem):
         '''
         self.move_line(self.segment.line.p0 + dv, self.segment.line.p1 + dv)
 
+    def translate_model(self, dv):
+        '''
+        Translates the line by the delta-vector dv without touching the canvas
+        or sending a handles-changed notification.  Used for group
+        translations where the canvas item is moved via a shared tag.
+        '''
+        self._set_line(self.segment.line.p0 + dv, self.segment.line.p1 + dv)
+
     def is_handle_interactive(self, _index):
         '''
         Both line handles are interactive and used to drag the endpoints around.
@@ -66,5 +89,16 @@ class LineElem(Elem):
         '''
         return R.overlaps_segment(self.segment)
 
+    def bounding_rect(self):
+        '''
+        Returns the smallest rectangle containing the line segment.
+        '''
+        return geom.Rect(self.segment.line.p0, self.segment.line.p1)
+
+    def record(self):
+        p0 = self.segment.line.p0
+        p1 = self.segment.line.p1
+        return (p0.x, p0.y, p1.x, p1.y, None)
+
     def add_inspector(self, _workspace):
         return None
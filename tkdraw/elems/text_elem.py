@@ -1,12 +1,12 @@
-import tkinter.font
-
 from .elem import Elem
 from ..inspectors import TextEntryInspector
 from .. import coords
 from .. import geom
+from .. import store
 
 
 class TextElem(Elem):
+    KIND    = store.KIND_TEXT
     NN_SLOP = 0
 
     def __init__(self, workspace, p0, text):
@@ -15,10 +15,6 @@ class TextElem(Elem):
         '''
         super().__init__()
 
-        self.tk_elem = workspace.add_text(p0, text=text, anchor='c',
-                                          justify='center')
-        self.tk_font = tkinter.font.nametofont(self.tk_elem.cget('font'))
-
         self.workspace   = workspace
         self.p0          = p0
         self.text        = None
@@ -31,40 +27,58 @@ class TextElem(Elem):
         self.set_text(text)
         self.move_text(p0)
 
-    def _update_handles(self):
+    def _set_brect(self):
         self.brect      = geom.Rect(self.p0 - self.dv, self.p0 + self.dv)
         self.handles[0] = self.brect.nw
         self.handles[1] = self.brect.ne
         self.handles[2] = self.brect.se
         self.handles[3] = self.brect.sw
+
+    def _update_handles(self):
+        self._set_brect()
         self.workspace.notify_handles_changed(self, [0, 1, 2, 3])
 
     def set_text(self, text):
+        font  = self.workspace.text_font
+        cache = self.workspace.font_cache
         lines = (text + '\n').splitlines()
-        w     = max(self.tk_font.measure(l) for l in lines)
-        h     = self.tk_font.metrics('linespace') * len(lines)
+        w     = max(cache.measure(font, l) for l in lines)
+        h     = cache.metrics(font, 'linespace') * len(lines)
 
         self.text        = text
         self.text_width  = coords.canvas_to_grid_delta(w)
         self.text_height = coords.canvas_to_grid_delta(h)
         self.dv          = geom.Vec(self.text_width / 2, self.text_height / 2)
-        self.tk_elem.configure(text=text)
 
         self._update_handles()
 
     def __repr__(self):
         return 'TextElem(%u, %u)' % (self.p0.x, self.p0.y)
 
+    def create_tk_elem(self):
+        ws   = self.workspace
+        font = ws.renderer.text_font_spec(ws.view.scale)
+        return ws.add_text(self.p0, text=self.text, anchor='c',
+                           justify='center', font=font)
+
+    def draw(self):
+        view = self.workspace.view
+        font = self.workspace.renderer.text_font_spec(view.scale)
+        self.tk_elem.configure(text=self.text, font=font)
+        self.tk_elem.move_to(view.gridx_to_canvasx(self.p0.x),
+                             view.gridy_to_canvasy(self.p0.y))
+
     def move_text(self, p0):
         self.p0 = p0
-        self.tk_elem.move_to(coords.gridx_to_canvasx(p0.x),
-                             coords.gridy_to_canvasy(p0.y))
-
         self._update_handles()
 
     def translate(self, dv):
         self.move_text(self.p0 + dv)
 
+    def translate_model(self, dv):
+        self.p0 = self.p0 + dv
+        self._set_brect()
+
     def is_handle_interactive(self, _index):
         return False
 
@@ -77,5 +91,11 @@ class TextElem(Elem):
     def overlaps_rect(self, R):
         return self.brect.overlaps_rect(R)
 
+    def bounding_rect(self):
+        return self.brect
+
+    def record(self):
+        return (self.p0.x, self.p0.y, self.dv.x, self.dv.y, self.text)
+
     def add_inspector(self, workspace):
         return TextEntryInspector(workspace, elem=self)
@@ -0,0 +1,207 @@
+'''
+Export of documents to SVG and Encapsulated PostScript, straight from the
+document's ElemStore columns rather than from the Tk canvas, which only holds
+the elems in view.  No Elem objects are materialized and nothing needs a
+display.  Output is written in chunks of CHUNK_RECORDS records so that memory
+use stays constant however large the document is.
+
+The output is laid out as the canvas is at the default zoom, with
+coords.GRID_SPACING units per grid unit, inside a margin of MARGIN units.
+Text is drawn centered in its bounding rectangle, in a generic sans-serif
+font sized to fit the rectangle's height.
+'''
+import argparse
+import itertools
+import math
+
+from . import coords
+from . import journal
+from .store import KIND_LINE, KIND_TEXT
+
+
+CHUNK_RECORDS = 4096
+MARGIN        = coords.GRID_SPACING
+
+# Font size as a fraction of the height of each line of text.
+FONT_SIZE = 0.8
+
+
+def _mask(kinds, kind):
+    '''
+    Returns a bytes object holding 1 where kinds holds kind and 0 elsewhere,
+    for use as itertools.compress() selectors.
+    '''
+    table = bytes(1 if k == kind else 0 for k in range(256))
+    return kinds.tobytes().translate(table)
+
+
+def bounds(es):
+    '''
+    Returns the bounding rectangle (l, t, r, b) of the records in the store,
+    in grid coordinates, or None if it is empty.  The line endpoints are
+    reduced a whole column at a time.
+    '''
+    xs = []
+    ys = []
+    lines = _mask(es.kinds, KIND_LINE)
+    if any(lines):
+        for col, vals in ((es.x0, xs), (es.x1, xs), (es.y0, ys), (es.y1, ys)):
+            vals.append(min(itertools.compress(col, lines)))
+            vals.append(max(itertools.compress(col, lines)))
+    for slot in itertools.compress(range(len(es.kinds)),
+                                   _mask(es.kinds, KIND_TEXT)):
+        x, y, dx, dy = es.x0[slot], es.y0[slot], es.x1[slot], es.y1[slot]
+        xs += (x - dx, x + dx)
+        ys += (y - dy, y + dy)
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def layout(es, s=coords.GRID_SPACING):
+    '''
+    Returns the scale and origin of the transform from grid coordinates to
+    output coordinates, and the width and height of the output, for an output
+    with s units per grid unit.
+    '''
+    l, t, r, b = bounds(es) or (0, 0, 0, 0)
+    return s, (MARGIN - l * s, MARGIN - t * s), (
+        math.ceil((r - l) * s + 2 * MARGIN),
+        math.ceil((b - t) * s + 2 * MARGIN))
+
+
+def _text_lines(text, y, dy, s):
+    '''
+    Splits text into lines, returning the lines, the output y coordinate of
+    the middle of the first line and the line height, for text centered on
+    output y coordinate y with half-height dy grid units.
+    '''
+    lines  = (text + '\n').splitlines()
+    height = 2 * dy * s / len(lines)
+    return lines, y - dy * s + height / 2, height
+
+
+def _write_chunked(f, es, emit):
+    chunk = []
+    for rec in zip(es.kinds, es.x0, es.y0, es.x1, es.y1, es.texts):
+        if rec[0] in (KIND_LINE, KIND_TEXT):
+            emit(chunk, *rec)
+            if len(chunk) >= CHUNK_RECORDS:
+                f.write(''.join(chunk))
+                chunk.clear()
+    f.write(''.join(chunk))
+
+
+def _xml_escape(text):
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+                .replace('>', '&gt;'))
+
+
+def write_svg(es, f):
+    '''
+    Writes the records in the ElemStore to the text file f as SVG.
+    '''
+    s, (ox, oy), (w, h) = layout(es)
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" width="%u" height="%u" '
+            'viewBox="0 0 %u %u">\n'
+            '<rect width="100%%" height="100%%" fill="white"/>\n'
+            '<g stroke="black" stroke-width="1" font-family="sans-serif" '
+            'text-anchor="middle" dominant-baseline="central">\n'
+            % (w, h, w, h))
+
+    def emit(chunk, kind, x0, y0, x1, y1, text):
+        if kind == KIND_LINE:
+            chunk.append('<line x1="%g" y1="%g" x2="%g" y2="%g"/>\n' % (
+                         x0 * s + ox, y0 * s + oy, x1 * s + ox, y1 * s + oy))
+            return
+
+        x = x0 * s + ox
+        lines, y, height = _text_lines(text, y0 * s + oy, y1, s)
+        chunk.append('<text x="%g" stroke="none" font-size="%g">' % (
+                     x, height * FONT_SIZE))
+        for i, l in enumerate(lines):
+            chunk.append('<tspan x="%g" y="%g">%s</tspan>' % (
+                         x, y + i * height, _xml_escape(l)))
+        chunk.append('</text>\n')
+
+    _write_chunked(f, es, emit)
+    f.write('</g>\n</svg>\n')
+
+
+def _ps_escape(text):
+    return (text.replace('\\', '\\\\').replace('(', '\\(')
+                .replace(')', '\\)'))
+
+
+def write_ps(es, f):
+    '''
+    Writes the records in the ElemStore to the text file f as Encapsulated
+    PostScript.  PostScript's y axis points up, so y coordinates are flipped.
+    '''
+    s, (ox, oy), (w, h) = layout(es)
+    f.write('%%!PS-Adobe-3.0 EPSF-3.0\n'
+            '%%%%BoundingBox: 0 0 %u %u\n'
+            '%%%%Creator: tkdraw\n'
+            '%%%%EndComments\n'
+            '/L { moveto lineto stroke } bind def\n'
+            '/T { /Helvetica exch selectfont dup stringwidth pop 2 div\n'
+            '     4 -1 roll exch sub 3 -1 roll moveto show } bind def\n'
+            '1 setlinewidth\n'
+            % (w, h))
+
+    def emit(chunk, kind, x0, y0, x1, y1, text):
+        if kind == KIND_LINE:
+            chunk.append('%g %g %g %g L\n' % (
+                         x1 * s + ox, h - (y1 * s + oy),
+                         x0 * s + ox, h - (y0 * s + oy)))
+            return
+
+        # T takes x, the baseline y, the string and the font size.
+        x = x0 * s + ox
+        lines, y, height = _text_lines(text, y0 * s + oy, y1, s)
+        size = height * FONT_SIZE
+        for i, l in enumerate(lines):
+            chunk.append('%g %g (%s) %g T\n' % (
+                         x, h - (y + i * height) - size / 3, _ps_escape(l),
+                         size))
+
+    _write_chunked(f, es, emit)
+    f.write('showpage\n%%EOF\n')
+
+
+WRITERS = {'.svg' : write_svg,
+           '.ps'  : write_ps,
+           '.eps' : write_ps,
+           }
+
+
+def export(es, path):
+    '''
+    Exports the ElemStore to path, in the format given by its extension.
+    '''
+    for ext, writer in WRITERS.items():
+        if path.lower().endswith(ext):
+            break
+    else:
+        raise ValueError('Unknown export format for %s.' % path)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        writer(es, f)
+
+
+def main(args):
+    export(journal.load_store(args.path), args.output)
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Exports a tkdraw drawing to SVG or PostScript.')
+    parser.add_argument('path', help='Drawing to export.')
+    parser.add_argument('output',
+                        help='File to write, ending in .svg, .ps or .eps.')
+    main(parser.parse_args())
+
+
+if __name__ == '__main__':
+    _main()
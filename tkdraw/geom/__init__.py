@@ -2,10 +2,16 @@ from .vec import Vec
 from .line import Line
 from .line_segment import LineSegment
 from .rect import Rect
+from .grid_index import GridIndex
+from .point_index import PointIndex
+from .sweep import segment_intersections
 
 
-__all__ = ['Line',
+__all__ = ['GridIndex',
+           'Line',
            'LineSegment',
+           'PointIndex',
            'Rect',
            'Vec',
+           'segment_intersections',
            ]
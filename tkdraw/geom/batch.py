@@ -0,0 +1,174 @@
+'''
+Vectorized versions of the geometry queries in the other geom modules, for
+answering a query against a large collection of objects in a single call.
+Collections are stored struct-of-arrays style in NumPy arrays.
+
+The kernels perform the same floating-point operations in the same order as
+the scalar implementations in LineSegment and Rect, so the results match them
+exactly rather than just to within rounding error.
+
+This module requires NumPy, which is an optional dependency of tkdraw; it is
+therefore not imported by the geom package itself.
+'''
+import numpy as np
+
+
+def _as_column(a):
+    return np.asarray(a, dtype=np.float64)
+
+
+class SegmentArray:
+    '''
+    A collection of N line segments from (x0, y0) to (x1, y1).  The
+    coordinates can be given as any sequences or buffers of numbers, such as
+    lists, array.array objects or NumPy arrays.
+    '''
+    def __init__(self, x0, y0, x1, y1):
+        self.x0 = _as_column(x0)
+        self.y0 = _as_column(y0)
+        self.x1 = _as_column(x1)
+        self.y1 = _as_column(y1)
+        self.dx = self.x1 - self.x0
+        self.dy = self.y1 - self.y0
+
+    def __len__(self):
+        return len(self.x0)
+
+    @staticmethod
+    def from_segments(segments):
+        '''
+        Builds a SegmentArray from an iterable of LineSegment objects.
+        '''
+        lines = [s.line for s in segments]
+        return SegmentArray([l.p0.x for l in lines], [l.p0.y for l in lines],
+                            [l.p1.x for l in lines], [l.p1.y for l in lines])
+
+    def nearest_points_t(self, P):
+        '''
+        Returns an array of the t values of the nearest point on each segment
+        to the point P, clamped to the range [0, 1].  Degenerate segments with
+        both endpoints the same yield t = 0.
+        '''
+        vx  = P.x - self.x0
+        vy  = P.y - self.y0
+        dt2 = self.dx * self.dx + self.dy * self.dy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (vx * self.dx + vy * self.dy) / dt2
+        t[dt2 == 0] = 0
+        return np.clip(t, 0, 1)
+
+    def nearest_points(self, P):
+        '''
+        Returns a tuple (xs, ys) of arrays holding the nearest point on each
+        segment to the point P.
+        '''
+        t = self.nearest_points_t(P)
+        return self.x0 + self.dx * t, self.y0 + self.dy * t
+
+    def distances_squared(self, P):
+        '''
+        Returns an array holding the squared distance from the point P to each
+        segment.
+        '''
+        xs, ys = self.nearest_points(P)
+        dx     = xs - P.x
+        dy     = ys - P.y
+        return dx * dx + dy * dy
+
+    def overlaps_rect(self, R):
+        '''
+        Returns a boolean array that is True for each segment that partially or
+        fully overlaps the rectangle R.  This mirrors Rect.overlaps_segment():
+        each segment's line is intersected with the four edges of R and the
+        segment overlaps if any of the intersections fall within it or on
+        either side of it.
+        '''
+        edges = ((R.l, R.t, R.r - R.l, R.t - R.t),
+                 (R.r, R.t, R.r - R.r, R.b - R.t),
+                 (R.r, R.b, R.l - R.r, R.b - R.b),
+                 (R.l, R.b, R.l - R.l, R.t - R.b))
+        n     = len(self)
+        t_min = np.full(n, np.inf)
+        t_max = np.full(n, -np.inf)
+        hit   = np.zeros(n, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for ex, ey, edx, edy in edges:
+                det = self.dx * edy - edx * self.dy
+                dx  = ex - self.x0
+                dy  = ey - self.y0
+                t   = (edy * dx - edx * dy) / det
+                u   = (self.dy * dx - self.dx * dy) / det
+                ok  = (det != 0) & (0 <= u) & (u <= 1)
+                hit |= ok
+                t_min = np.where(ok, np.minimum(t_min, t), t_min)
+                t_max = np.where(ok, np.maximum(t_max, t), t_max)
+        return hit & (t_min <= 1) & (t_max >= 0)
+
+    def in_rect(self, R):
+        '''
+        Returns the indices of the segments that overlap the rectangle R.
+        '''
+        return np.flatnonzero(self.overlaps_rect(R))
+
+
+class RectArray:
+    '''
+    A collection of N axis-aligned rectangles given by their normalized left,
+    top, right and bottom coordinates.
+    '''
+    def __init__(self, l, t, r, b):
+        self.l = _as_column(l)
+        self.t = _as_column(t)
+        self.r = _as_column(r)
+        self.b = _as_column(b)
+
+    def __len__(self):
+        return len(self.l)
+
+    @staticmethod
+    def from_rects(rects):
+        '''
+        Builds a RectArray from an iterable of Rect objects.
+        '''
+        rects = list(rects)
+        return RectArray([R.l for R in rects], [R.t for R in rects],
+                         [R.r for R in rects], [R.b for R in rects])
+
+    def overlaps_rect(self, R):
+        '''
+        Returns a boolean array that is True for each rectangle that overlaps
+        the rectangle R, even if just at a point.
+        '''
+        return ~((self.r < R.l) | (R.r < self.l) |
+                 (self.b < R.t) | (R.b < self.t))
+
+    def overlaps_point(self, P):
+        '''
+        Returns a boolean array that is True for each rectangle containing the
+        point P.
+        '''
+        return ((self.l <= P.x) & (P.x <= self.r) &
+                (self.t <= P.y) & (P.y <= self.b))
+
+    def in_rect(self, R):
+        '''
+        Returns the indices of the rectangles that overlap the rectangle R.
+        '''
+        return np.flatnonzero(self.overlaps_rect(R))
+
+    def nearest_points(self, P):
+        '''
+        Returns a tuple (xs, ys) of arrays holding the nearest point within or
+        on each rectangle to the point P.
+        '''
+        return np.clip(P.x, self.l, self.r), np.clip(P.y, self.t, self.b)
+
+    def distances_squared(self, P):
+        '''
+        Returns an array holding the squared distance from the point P to each
+        rectangle, which is 0 for rectangles containing P.
+        '''
+        xs, ys = self.nearest_points(P)
+        dx     = xs - P.x
+        dy     = ys - P.y
+        return dx * dx + dy * dy
@@ -0,0 +1,252 @@
+import math
+
+from .vec import Vec
+from .rect import Rect
+
+
+class GridIndex:
+    '''
+    Implements a spatial index over a set of items, each of which is described
+    by a bounding rectangle.  Space is carved up into a uniform grid of square
+    cells of dimension cell_size and each item is recorded in every cell that
+    its bounding rectangle touches.  A query then only needs to look at the
+    cells that overlap the query region rather than every item in the index.
+
+    An item that is a line segment can also be given its endpoints, in which
+    case it is only recorded in the cells that the segment itself passes
+    through, as found by an Amanatides-Woo grid traversal.  A long diagonal
+    line then occupies a number of cells proportional to its length rather
+    than to the area of its bounding rectangle.
+
+    Items must be hashable; they are typically Elem objects or ElemStore
+    slots.  Only the bounds of each item's rectangle and the endpoints of
+    each line are kept, as plain tuples, so that indexing very large
+    documents stays cheap in memory.
+    '''
+    def __init__(self, cell_size=16):
+        self.cell_size = cell_size
+        self._cells    = {}
+        self._items    = {}
+        self._lines    = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def _cell_range(self, bounds):
+        cs         = self.cell_size
+        l, t, r, b = bounds
+        return (math.floor(l / cs), math.floor(t / cs),
+                math.floor(r / cs), math.floor(b / cs))
+
+    def _line_cells(self, line):
+        '''
+        Returns the list of cells that the line segment (x0, y0) - (x1, y1)
+        passes through.  The walk steps from cell to cell in the order in
+        which the segment crosses the cell boundaries; tx and ty are the
+        values of the segment's parameter t at the next vertical and
+        horizontal boundary.  Where the segment passes exactly through a cell
+        corner, the cell that owns the corner point is included as well.
+        '''
+        cs             = self.cell_size
+        x0, y0, x1, y1 = line
+        cx, cy = math.floor(x0 / cs), math.floor(y0 / cs)
+        ex, ey = math.floor(x1 / cs), math.floor(y1 / cs)
+        if cx == ex and cy == ey:
+            return [(cx, cy)]
+
+        dx, dy = x1 - x0, y1 - y0
+        sx     = 1 if dx > 0 else -1
+        sy     = 1 if dy > 0 else -1
+        if dx:
+            tx  = ((cx + (sx > 0)) * cs - x0) / dx
+            tdx = cs / abs(dx)
+        else:
+            tx = tdx = math.inf
+        if dy:
+            ty  = ((cy + (sy > 0)) * cs - y0) / dy
+            tdy = cs / abs(dy)
+        else:
+            ty = tdy = math.inf
+
+        cells = [(cx, cy)]
+        while cx != ex or cy != ey:
+            if cx != ex and (cy == ey or tx < ty):
+                cx += sx
+                tx += tdx
+            elif cy != ey and (cx == ex or ty < tx):
+                cy += sy
+                ty += tdy
+            else:
+                corner = (cx + (sx > 0), cy + (sy > 0))
+                cx    += sx
+                cy    += sy
+                tx    += tdx
+                ty    += tdy
+                if corner != (cx, cy):
+                    cells.append(corner)
+            cells.append((cx, cy))
+        return cells
+
+    def _item_cells(self, bounds, line):
+        if line is not None:
+            return self._line_cells(line)
+        cx0, cy0, cx1, cy1 = self._cell_range(bounds)
+        return [(cx, cy)
+                for cy in range(cy0, cy1 + 1)
+                for cx in range(cx0, cx1 + 1)]
+
+    def _add_to_cells(self, item, cells):
+        for c in cells:
+            cell = self._cells.get(c)
+            if cell is None:
+                self._cells[c] = cell = set()
+            cell.add(item)
+
+    def _remove_from_cells(self, item, cells):
+        for c in cells:
+            cell = self._cells[c]
+            cell.discard(item)
+            if not cell:
+                del self._cells[c]
+
+    def rect(self, item):
+        '''
+        Returns the bounding rectangle that the item was indexed with.
+        '''
+        l, t, r, b = self._items[item]
+        return Rect(Vec(l, t), Vec(r, b))
+
+    def insert(self, item, R, line=None):
+        '''
+        Adds the item to the index with bounding rectangle R.  If the item is
+        a line segment, line can give its endpoints as (x0, y0, x1, y1), which
+        must lie within R.
+        '''
+        assert item not in self._items
+        bounds = (R.l, R.t, R.r, R.b)
+        self._items[item] = bounds
+        if line is not None:
+            self._lines[item] = line
+        self._add_to_cells(item, self._item_cells(bounds, line))
+
+    def remove(self, item):
+        '''
+        Removes the item from the index.
+        '''
+        bounds = self._items.pop(item)
+        line   = self._lines.pop(item, None)
+        self._remove_from_cells(item, self._item_cells(bounds, line))
+
+    def update(self, item, R, line=None):
+        '''
+        Updates the bounding rectangle, and the endpoints if it is a line
+        segment, of an item that is already in the index.  Only the cells that
+        the item enters or leaves are touched.
+        '''
+        old_bounds = self._items[item]
+        old_line   = self._lines.pop(item, None)
+        bounds     = (R.l, R.t, R.r, R.b)
+        self._items[item] = bounds
+        if line is not None:
+            self._lines[item] = line
+        if old_line is not None or line is not None:
+            if line == old_line:
+                return
+            old_cells = self._item_cells(old_bounds, old_line)
+            cells     = self._item_cells(bounds, line)
+            if cells == old_cells:
+                return
+            old_cells = set(old_cells)
+            cells     = set(cells)
+            self._remove_from_cells(item, old_cells - cells)
+            self._add_to_cells(item, cells - old_cells)
+            return
+
+        old_cr = self._cell_range(old_bounds)
+        cr     = self._cell_range(bounds)
+        if cr == old_cr:
+            return
+
+        ox0, oy0, ox1, oy1 = old_cr
+        cx0, cy0, cx1, cy1 = cr
+        for cy in range(oy0, oy1 + 1):
+            for cx in range(ox0, ox1 + 1):
+                if not (cx0 <= cx <= cx1 and cy0 <= cy <= cy1):
+                    cell = self._cells[(cx, cy)]
+                    cell.discard(item)
+                    if not cell:
+                        del self._cells[(cx, cy)]
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                if not (ox0 <= cx <= ox1 and oy0 <= cy <= oy1):
+                    cell = self._cells.get((cx, cy))
+                    if cell is None:
+                        self._cells[(cx, cy)] = cell = set()
+                    cell.add(item)
+
+    def query_rect(self, R):
+        '''
+        Returns the set of items whose bounding rectangles overlap the
+        rectangle R, even if just at a point.  Line segments are only returned
+        if they pass through a cell that R overlaps, so callers should do
+        their own exact test against the segment.
+        '''
+        cx0, cy0, cx1, cy1 = self._cell_range((R.l, R.t, R.r, R.b))
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # The query covers more cells than are occupied, so it's cheaper
+            # to just walk the occupied ones.
+            candidates = set()
+            for (cx, cy), cell in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(cell)
+        else:
+            candidates = set()
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    cell = self._cells.get((cx, cy))
+                    if cell is not None:
+                        candidates.update(cell)
+
+        items = self._items
+        ql, qt, qr, qb = R.l, R.t, R.r, R.b
+        result = set()
+        for item in candidates:
+            l, t, r, b = items[item]
+            if l <= qr and ql <= r and t <= qb and qt <= b:
+                result.add(item)
+        return result
+
+    def query_cells(self, R):
+        '''
+        Returns the sorted list of (cx, cy) cell coordinates of the occupied
+        cells that overlap the rectangle R.  Cell (cx, cy) covers the square
+        from (cx, cy) * cell_size to (cx + 1, cy + 1) * cell_size.  This gives
+        a coarse picture of where the items are, at a cost that depends on
+        the area of R rather than the number of items.
+        '''
+        cx0, cy0, cx1, cy1 = self._cell_range((R.l, R.t, R.r, R.b))
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            cells = [(cx, cy) for cx, cy in self._cells
+                     if cx0 <= cx <= cx1 and cy0 <= cy <= cy1]
+        else:
+            cells = [(cx, cy)
+                     for cy in range(cy0, cy1 + 1)
+                     for cx in range(cx0, cx1 + 1)
+                     if (cx, cy) in self._cells]
+        return sorted(cells, key=lambda c: (c[1], c[0]))
+
+    def query_point(self, P, radius=0):
+        '''
+        Returns the set of items whose bounding rectangles come within the
+        specified radius of the point P.  The radius test is done using a
+        square rather than a circle, so callers must do their own exact
+        distance check on the results.
+        '''
+        dv = Vec(radius, radius)
+        return self.query_rect(Rect(P - dv, P + dv))
@@ -30,7 +30,7 @@ class Line:
         return not self.__eq__(other)
 
     def __call__(self, t):
-        return self.p0 + self.dt * t
+        return self.p0.add_scaled(self.dt, t)
 
     def nearest_point_t(self, p):
         '''
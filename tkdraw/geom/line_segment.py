@@ -1,6 +1,24 @@
 from .line import Line
 
 
+def _orientation(p, q, r):
+    '''
+    Returns the sign of the cross product (q - p) x (r - p): positive if r is
+    counter-clockwise from q about p, negative if clockwise and 0 if p, q and
+    r are collinear.
+    '''
+    c = (q.x - p.x) * (r.y - p.y) - (q.y - p.y) * (r.x - p.x)
+    return (c > 0) - (c < 0)
+
+
+def _in_box(p, q, r):
+    '''
+    Returns True if r lies in the bounding box of p and q.
+    '''
+    return (min(p.x, q.x) <= r.x <= max(p.x, q.x) and
+            min(p.y, q.y) <= r.y <= max(p.y, q.y))
+
+
 class LineSegment:
     def __init__(self, p0, p1):
         self.line = Line(p0, p1)
@@ -37,32 +55,51 @@ class LineSegment:
             return t, u
         return None, None
 
+    def intersects(self, s):
+        '''
+        Returns True if we share at least one point with the line segment s,
+        including if we are collinear and overlap.  Unlike intersection_t(),
+        this uses no division, so it is exact for integer coordinates.
+        '''
+        a, b = self.line.p0, self.line.p1
+        c, d = s.line.p0, s.line.p1
+        o1 = _orientation(a, b, c)
+        o2 = _orientation(a, b, d)
+        o3 = _orientation(c, d, a)
+        o4 = _orientation(c, d, b)
+        if o1 != o2 and o3 != o4:
+            return True
+
+        # Otherwise they can only touch where an endpoint of one lies on the
+        # other.
+        return ((o1 == 0 and _in_box(a, b, c)) or
+                (o2 == 0 and _in_box(a, b, d)) or
+                (o3 == 0 and _in_box(c, d, a)) or
+                (o4 == 0 and _in_box(c, d, b)))
+
     def shortest_connecting_segment(self, s):
         '''
         Given another line segment, s, find the shortest line segment that
         would connect a point on us to a point on s.
         '''
-        if (not self.line.dt.is_collinear(s.line.dt) or
-                not self.line.dt.is_collinear(s.line.p0 - self.line.p0)):
-            # If they intersect, we return a LineSegment connecting the "two"
-            # intersection points, which may or may not both be exactly the same
-            # due to floating-point error.
-            t, u = self.intersection_t(s)
-            if t is not None:
-                p0 = self(t)
-                p1 = s(u)
-                return LineSegment(p0, p1)
-
-            # Not collinear and they don't intersect.  Do projections and find
-            # the shortest one.
-            ls = [LineSegment(self.line.p0, s.nearest_point(self.line.p0)),
-                  LineSegment(self.line.p1, s.nearest_point(self.line.p1)),
-                  LineSegment(s.line.p0, self.nearest_point(s.line.p0)),
-                  LineSegment(s.line.p1, self.nearest_point(s.line.p1)),
-                  ]
-        else:
-            # Both line segments lie upon the same line.
-            raise Exception('Same line not handled yet.')
+        # If they intersect, we return a LineSegment connecting the "two"
+        # intersection points, which may or may not both be exactly the same
+        # due to floating-point error.
+        t, u = self.intersection_t(s)
+        if t is not None:
+            p0 = self(t)
+            p1 = s(u)
+            return LineSegment(p0, p1)
+
+        # They don't intersect at a single point.  Do projections and find the
+        # shortest one.  If they are collinear and overlap, an endpoint of one
+        # of them projects onto itself on the other, giving a zero-length
+        # segment at the start of the overlap.
+        ls = [LineSegment(self.line.p0, s.nearest_point(self.line.p0)),
+              LineSegment(self.line.p1, s.nearest_point(self.line.p1)),
+              LineSegment(s.line.p0, self.nearest_point(s.line.p0)),
+              LineSegment(s.line.p1, self.nearest_point(s.line.p1)),
+              ]
 
         best = ls[0]
         for i in range(1, len(ls)):
@@ -0,0 +1,104 @@
+import math
+
+
+class PointIndex:
+    '''
+    Implements a spatial hash over a set of items, each of which is a single
+    point.  Space is carved up into square cells of dimension cell_size and
+    each item is recorded in the one cell containing its point, so that
+    inserting, moving and removing an item take constant time.  A query for
+    the points near P only visits the cells within the query radius of P,
+    which is constant time as long as the radius is small next to cell_size
+    and the points aren't piled up in one place.
+
+    Items must be hashable.  Points are kept as (x, y) tuples.
+    '''
+    def __init__(self, cell_size=4):
+        self.cell_size = cell_size
+        self._cells    = {}
+        self._points   = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, item):
+        return item in self._points
+
+    def __iter__(self):
+        return iter(self._points)
+
+    def _cell(self, x, y):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def point(self, item):
+        '''
+        Returns the point that the item was indexed with, as an (x, y) tuple.
+        '''
+        return self._points[item]
+
+    def insert(self, item, P):
+        '''
+        Adds the item to the index at point P.
+        '''
+        assert item not in self._points
+        self._points[item] = (P.x, P.y)
+        c    = self._cell(P.x, P.y)
+        cell = self._cells.get(c)
+        if cell is None:
+            self._cells[c] = cell = set()
+        cell.add(item)
+
+    def remove(self, item):
+        '''
+        Removes the item from the index.
+        '''
+        c    = self._cell(*self._points.pop(item))
+        cell = self._cells[c]
+        cell.discard(item)
+        if not cell:
+            del self._cells[c]
+
+    def update(self, item, P):
+        '''
+        Moves an item that is already in the index to point P.
+        '''
+        if self._points[item] != (P.x, P.y):
+            self.remove(item)
+            self.insert(item, P)
+
+    def query_point(self, P, radius=0):
+        '''
+        Returns the set of items whose points are within the specified radius
+        of the point P.
+        '''
+        cx0, cy0 = self._cell(P.x - radius, P.y - radius)
+        cx1, cy1 = self._cell(P.x + radius, P.y + radius)
+        points   = self._points
+        r2       = radius * radius
+        result   = set()
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                for item in self._cells.get((cx, cy), ()):
+                    x, y = points[item]
+                    if (x - P.x)**2 + (y - P.y)**2 <= r2:
+                        result.add(item)
+        return result
+
+    def nearest(self, P, radius, accept=None):
+        '''
+        Returns the item whose point is nearest to the point P, considering
+        only items within the specified radius of P and, if accept is given,
+        only items for which accept(item) is true.  Ties are broken in favor
+        of the smallest item.  Returns None if there is no such item.
+        '''
+        points = self._points
+        best   = None
+        best_d = None
+        for item in self.query_point(P, radius):
+            if accept is not None and not accept(item):
+                continue
+            x, y = points[item]
+            d    = (x - P.x)**2 + (y - P.y)**2
+            if best is None or (d, item) < (best_d, best):
+                best, best_d = item, d
+        return best
@@ -3,29 +3,74 @@ from .line_segment import LineSegment
 
 
 class Rect:
-    def __init__(self, p0, p1):
-        self.p0     = p0
-        self.p1     = p1
-
-        l = min(p0.x, p1.x)
-        r = max(p0.x, p1.x)
-        t = min(p0.y, p1.y)
-        b = max(p0.y, p1.y)
-
-        self.width  = r - l
-        self.height = b - t
+    '''
+    Implements an axis-aligned rectangle.  Only the normalized left, top,
+    right and bottom coordinates are computed up front; the corner Vecs and
+    edge LineSegments are derived from them on first access and cached, since
+    most rectangles are only ever used for overlap tests.
+    '''
+    __slots__ = ('p0', 'p1', 'l', 't', 'r', 'b', 'width', 'height', '_nw',
+                 '_ne', '_se', '_sw', '_segments')
 
-        self.nw = Vec(l, t)
-        self.ne = Vec(r, t)
-        self.se = Vec(r, b)
-        self.sw = Vec(l, b)
-
-        self.segments = [
-            LineSegment(self.nw, self.ne),
-            LineSegment(self.ne, self.se),
-            LineSegment(self.se, self.sw),
-            LineSegment(self.sw, self.nw),
-            ]
+    def __init__(self, p0, p1):
+        self.p0 = p0
+        self.p1 = p1
+
+        if p0.x <= p1.x:
+            self.l, self.r = p0.x, p1.x
+        else:
+            self.l, self.r = p1.x, p0.x
+        if p0.y <= p1.y:
+            self.t, self.b = p0.y, p1.y
+        else:
+            self.t, self.b = p1.y, p0.y
+
+        self.width  = self.r - self.l
+        self.height = self.b - self.t
+
+        self._nw       = None
+        self._ne       = None
+        self._se       = None
+        self._sw       = None
+        self._segments = None
+
+    def __repr__(self):
+        return 'Rect((%s, %s), (%s, %s))' % (self.l, self.t, self.r, self.b)
+
+    @property
+    def nw(self):
+        if self._nw is None:
+            self._nw = Vec(self.l, self.t)
+        return self._nw
+
+    @property
+    def ne(self):
+        if self._ne is None:
+            self._ne = Vec(self.r, self.t)
+        return self._ne
+
+    @property
+    def se(self):
+        if self._se is None:
+            self._se = Vec(self.r, self.b)
+        return self._se
+
+    @property
+    def sw(self):
+        if self._sw is None:
+            self._sw = Vec(self.l, self.b)
+        return self._sw
+
+    @property
+    def segments(self):
+        if self._segments is None:
+            self._segments = [
+                LineSegment(self.nw, self.ne),
+                LineSegment(self.ne, self.se),
+                LineSegment(self.se, self.sw),
+                LineSegment(self.sw, self.nw),
+                ]
+        return self._segments
 
     def __add__(self, other):
         return Rect(self.p0 + other, self.p1 + other)
@@ -38,7 +83,7 @@ class Rect:
         '''
         Returns a (0, 0) - (0, 0) rectangle.
         '''
-        return Rect(Vec(0, 0), Vec(0, 0))
+        return Rect(Vec.ZERO, Vec.ZERO)
 
     @staticmethod
     def origin(w, h):
@@ -59,7 +104,7 @@ class Rect:
         '''
         Returns a (0, 0) - (v.x, v.y) rectangle.
         '''
-        return Rect(Vec(0, 0), v)
+        return Rect(Vec.ZERO, v)
 
     def line_intersection_ts(self, L):
         '''
@@ -89,30 +134,49 @@ class Rect:
         Returns True if the point P is contained within the rectangle, False
         otherwise.
         '''
-        return self.nw.x <= P.x <= self.se.x and self.nw.y <= P.y <= self.se.y
+        return self.l <= P.x <= self.r and self.t <= P.y <= self.b
 
     def overlaps_rect(self, R):
         '''
         Returns True if the rectangles overlap, even if just at a point.  We
         don't overlap if one rectangle is above or to the left of the other.
         '''
-        if self.ne.x < R.nw.x or R.ne.x < self.nw.x:
+        if self.r < R.l or R.r < self.l:
             return False
-        if self.sw.y < R.nw.y or R.sw.y < self.nw.y:
+        if self.b < R.t or R.b < self.t:
             return False
         return True
 
+    def difference(self, R):
+        '''
+        Returns a list of up to four rectangles that together cover the region
+        of this rectangle that is not covered by the rectangle R.  Since
+        rectangles are closed, the returned rectangles share their edges with
+        R.
+        '''
+        if not self.overlaps_rect(R):
+            return [self]
+
+        rs = []
+        if self.t < R.t:
+            rs.append(Rect(Vec(self.l, self.t), Vec(self.r, R.t)))
+        if self.b > R.b:
+            rs.append(Rect(Vec(self.l, R.b), Vec(self.r, self.b)))
+        t = max(self.t, R.t)
+        b = min(self.b, R.b)
+        if self.l < R.l:
+            rs.append(Rect(Vec(self.l, t), Vec(R.l, b)))
+        if self.r > R.r:
+            rs.append(Rect(Vec(R.r, t), Vec(self.r, b)))
+        return rs
+
     def nearest_point(self, P):
         '''
         Returns the nearest contained within or on the rectangle bounds to the
         point P.
         '''
-        if P.x < self.nw.x:
-            return self.segments[3].nearest_point(P)
-        if P.x > self.ne.x:
-            return self.segments[1].nearest_point(P)
-        if P.y < self.nw.y:
-            return self.segments[0].nearest_point(P)
-        if P.y > self.se.y:
-            return self.segments[2].nearest_point(P)
-        return P
+        x = self.l if P.x < self.l else self.r if P.x > self.r else P.x
+        y = self.t if P.y < self.t else self.b if P.y > self.b else P.y
+        if x == P.x and y == P.y:
+            return P
+        return Vec(x, y)
@@ -0,0 +1,168 @@
+'''
+Finds every intersecting pair in a collection of line segments with a
+Bentley-Ottmann plane sweep, in O((n + k) log n) comparisons for n segments
+and k intersecting pairs.
+
+The sweep line is vertical and moves left to right, visiting event points in
+(x, y) order: segment endpoints and the intersections found so far.  The
+status holds the segments that cross the sweep line, ordered by where they
+cross it, and only neighbouring segments in the status are ever tested against
+each other.  The status is kept in a plain list; its inserts and deletes move
+O(n) pointers but only need O(log n) comparisons to locate, and moving the
+pointers is so cheap next to a comparison that this is faster than a balanced
+tree in Python for any realistic n.
+
+Degenerate inputs are handled, following de Berg et al.'s version of the
+algorithm: vertical segments, zero-length segments, endpoints lying on other
+segments, many segments through one point and collinear segments that overlap.
+Collinear overlapping segments are reported once, at the first point they
+share.  All arithmetic is exact: coordinates are converted to Fractions,
+unless they are already ints, so there is no rounding error to misorder the
+status or to miss an intersection.  Exact arithmetic is slower than floating
+point, so the sweep only wins over testing every pair when n is more than a
+hundred or so and most segments don't intersect each other.
+'''
+import fractions
+import heapq
+
+
+def _exact(v):
+    return v if isinstance(v, int) else fractions.Fraction(v)
+
+
+class _Segment:
+    __slots__ = ('index', 'x0', 'y0', 'x1', 'y1', 'dx', 'dy', 'k', 'slope')
+
+    def __init__(self, index, p0, p1):
+        x0, y0, x1, y1 = _exact(p0.x), _exact(p0.y), _exact(p1.x), _exact(p1.y)
+        if (x1, y1) < (x0, y0):
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        self.index = index
+        self.x0    = x0
+        self.y0    = y0
+        self.x1    = x1
+        self.y1    = y1
+        self.dx    = x1 - x0
+        self.dy    = y1 - y0
+
+        # The order of the segments leaving a common point, from the lowest y
+        # to the highest just to the right of it.  Vertical segments leave it
+        # upwards, so they come after all the others.
+        if self.dx:
+            self.k     = fractions.Fraction(self.dy, self.dx)
+            self.slope = (0, self.k)
+        else:
+            self.k     = None
+            self.slope = (1, 0)
+
+    def y_at(self, x, y):
+        '''
+        Returns where we cross the sweep line when it is at the event point
+        (x, y).  A vertical segment crosses it at the event point itself.
+        '''
+        if self.k is None:
+            return y
+        return self.y0 + (x - self.x0) * self.k
+
+    def intersection(self, s):
+        '''
+        Returns the single point at which we intersect the segment s, or None
+        if we don't intersect it or are parallel to it.
+        '''
+        det = self.dx * s.dy - self.dy * s.dx
+        if not det:
+            return None
+        ex = s.x0 - self.x0
+        ey = s.y0 - self.y0
+        t  = ex * s.dy - ey * s.dx
+        u  = ex * self.dy - ey * self.dx
+        if det < 0:
+            det, t, u = -det, -t, -u
+        if not (0 <= t <= det and 0 <= u <= det):
+            return None
+        t = fractions.Fraction(t, det) if isinstance(t, int) else t / det
+        return self.x0 + t * self.dx, self.y0 + t * self.dy
+
+
+def segment_intersections(segments):
+    '''
+    Returns the sorted list of pairs (i, j), with i < j, of the indices of the
+    LineSegments in segments that share at least one point.
+    '''
+    queue  = []
+    starts = {}
+    for i, S in enumerate(segments):
+        s  = _Segment(i, S.line.p0, S.line.p1)
+        p0 = (s.x0, s.y0)
+        p1 = (s.x1, s.y1)
+        starts.setdefault(p0, []).append(s)
+        starts.setdefault(p1, [])
+        queue.append(p0)
+        queue.append(p1)
+    queued = set(queue)
+    queue  = list(queued)
+    heapq.heapify(queue)
+
+    status = []
+    pairs  = []
+
+    def bisect(x, y, inclusive):
+        # Returns the index of the first segment in the status that crosses
+        # the sweep line above y, or at or above y if inclusive.
+        lo = 0
+        hi = len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            sy  = status[mid].y_at(x, y)
+            if sy < y or (sy == y and not inclusive):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def check(sl, sr, p):
+        q = sl.intersection(sr)
+        if q is not None and q > p and q not in queued:
+            queued.add(q)
+            heapq.heappush(queue, q)
+
+    while queue:
+        p    = heapq.heappop(queue)
+        x, y = p
+
+        # The segments starting here, and those in the status passing
+        # through here, which includes the ones ending here.
+        upper   = starts.get(p, ())
+        lo      = bisect(x, y, True)
+        hi      = bisect(x, y, False)
+        through = status[lo:hi]
+        del status[lo:hi]
+
+        # Every pair of segments meeting here intersects here.  A collinear
+        # pair overlaps, and is only reported at the first point it shares,
+        # which is where one of the pair starts.
+        here   = list(upper) + through
+        nupper = len(upper)
+        for a, sa in enumerate(here):
+            for sb in here[a + 1:]:
+                if a < nupper or sa.dx * sb.dy != sa.dy * sb.dx:
+                    pairs.append((min(sa.index, sb.index),
+                                  max(sa.index, sb.index)))
+
+        # Reinsert the segments that continue past here, in their order just
+        # to the right of here.
+        cont = [s for s in here if (s.x1, s.y1) != p]
+        cont.sort(key=lambda s: (s.slope, s.index))
+        status[lo:lo] = cont
+        if not cont:
+            if 0 < lo < len(status):
+                check(status[lo - 1], status[lo], p)
+        else:
+            if lo > 0:
+                check(status[lo - 1], status[lo], p)
+            hi = lo + len(cont)
+            if hi < len(status):
+                check(status[hi - 1], status[hi], p)
+
+    pairs.sort()
+    return pairs
@@ -0,0 +1,64 @@
+'''
+Benchmarks segment_intersections() against testing every pair of segments
+with LineSegment.intersects(), on random short segments like the wires of a
+schematic, scattered over an area that grows with their number so that the
+number of crossings per segment stays about the same.  Run with:
+
+    python3 -m tkdraw.geom.tests.bench_sweep
+'''
+import random
+import time
+
+from .. import Vec, LineSegment, segment_intersections
+
+
+SIZES  = (100, 300, 1000, 3000)
+LENGTH = 10
+
+
+def make_segments(n, seed=1):
+    r    = random.Random(seed)
+    size = int((n * 100) ** 0.5)
+    segments = []
+    for _ in range(n):
+        x = r.randrange(size)
+        y = r.randrange(size)
+        if r.random() < 0.5:
+            # Wires are mostly horizontal or vertical.
+            if r.random() < 0.5:
+                p1 = Vec(x + r.randrange(1, LENGTH), y)
+            else:
+                p1 = Vec(x, y + r.randrange(1, LENGTH))
+        else:
+            p1 = Vec(x + r.randrange(-LENGTH, LENGTH),
+                     y + r.randrange(-LENGTH, LENGTH))
+        segments.append(LineSegment(Vec(x, y), p1))
+    return segments
+
+
+def naive(segments):
+    return [(i, j)
+            for i in range(len(segments))
+            for j in range(i + 1, len(segments))
+            if segments[i].intersects(segments[j])]
+
+
+def measure(f, segments):
+    t0 = time.perf_counter()
+    pairs = f(segments)
+    return time.perf_counter() - t0, pairs
+
+
+def main():
+    for n in SIZES:
+        segments = make_segments(n)
+        t_sweep, pairs = measure(segment_intersections, segments)
+        t_naive, check = measure(naive, segments)
+        assert pairs == check
+        print('%5u segments %5u pairs:  sweep %7.3fs  naive %7.3fs  '
+              '(%.1fx)' % (n, len(pairs), t_sweep, t_naive,
+                           t_naive / t_sweep))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+'''
+Micro-benchmarks comparing geom.Vec against a plain __dict__-based vector
+class like the one Vec used to be.  Run with:
+
+    python3 -m tkdraw.geom.tests.bench_vec
+'''
+import timeit
+import tracemalloc
+
+from .. import Vec
+
+
+N = 1000000
+
+
+class DictVec:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        return DictVec(self.x + other.x, self.y + other.y)
+
+    def __mul__(self, number):
+        return DictVec(self.x * number, self.y * number)
+
+
+def measure_memory(cls):
+    tracemalloc.start()
+    vs = [cls(i, i) for i in range(N)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vs
+    return size
+
+
+def measure_create(cls):
+    return min(timeit.repeat(lambda: [cls(i, i) for i in range(N)],
+                             number=1, repeat=3))
+
+
+def measure_add(cls):
+    v0 = cls(1, 2)
+    v1 = cls(3, 4)
+    return min(timeit.repeat(lambda: v0 + v1, number=N, repeat=3))
+
+
+def measure_lerp(cls):
+    p0 = cls(1, 2)
+    dt = cls(3, 4)
+    return min(timeit.repeat(lambda: p0 + dt * 0.5, number=N, repeat=3))
+
+
+def measure_add_scaled():
+    p0 = Vec(1, 2)
+    dt = Vec(3, 4)
+    return min(timeit.repeat(lambda: p0.add_scaled(dt, 0.5), number=N,
+                             repeat=3))
+
+
+def main():
+    print('%u vectors:' % N)
+    for cls in (DictVec, Vec):
+        print('  %-8s create %.3fs  add %.3fs  lerp %.3fs  memory %6.1f MB' % (
+            cls.__name__, measure_create(cls), measure_add(cls),
+            measure_lerp(cls), measure_memory(cls) / 1e6))
+
+    # Vec can also do the lerp in one allocation, as Line.__call__ does.
+    print('  %-8s lerp with add_scaled() %.3fs' % ('Vec', measure_add_scaled()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import unittest
+import random
+
+from .. import Vec, Rect, LineSegment
+
+try:
+    from .. import batch
+except ImportError:
+    batch = None
+
+
+def random_coord(rng):
+    if rng.random() < 0.5:
+        return rng.randint(-20, 20)
+    return rng.uniform(-20, 20)
+
+
+def random_vec(rng):
+    return Vec(random_coord(rng), random_coord(rng))
+
+
+def random_segments(rng, n):
+    segments = []
+    while len(segments) < n:
+        p0 = random_vec(rng)
+        if rng.random() < 0.2:
+            # Axis-aligned segments exercise the det == 0 cases against the
+            # rectangle edges.
+            p1 = Vec(p0.x, random_coord(rng))
+        else:
+            p1 = random_vec(rng)
+        if p0 != p1:
+            segments.append(LineSegment(p0, p1))
+    return segments
+
+
+def random_rect(rng):
+    return Rect(random_vec(rng), random_vec(rng))
+
+
+@unittest.skipIf(batch is None, 'NumPy not available')
+class TestBatch(unittest.TestCase):
+    def test_segment_nearest_points(self):
+        rng = random.Random(1)
+        segments = random_segments(rng, 500)
+        sa = batch.SegmentArray.from_segments(segments)
+        self.assertEqual(len(sa), 500)
+        for _ in range(20):
+            P = random_vec(rng)
+            xs, ys = sa.nearest_points(P)
+            nn     = sa.distances_squared(P)
+            for i, s in enumerate(segments):
+                p = s.nearest_point(P)
+                self.assertEqual((xs[i], ys[i]), (p.x, p.y))
+                self.assertEqual(nn[i], (p - P).norm_squared())
+
+    def test_segment_overlaps_rect(self):
+        rng = random.Random(2)
+        segments = random_segments(rng, 500)
+        sa = batch.SegmentArray.from_segments(segments)
+        for _ in range(50):
+            R = random_rect(rng)
+            mask = sa.overlaps_rect(R)
+            for i, s in enumerate(segments):
+                self.assertEqual(bool(mask[i]), R.overlaps_segment(s))
+            self.assertEqual(
+                list(sa.in_rect(R)),
+                [i for i, s in enumerate(segments) if R.overlaps_segment(s)])
+
+    def test_segment_overlaps_rect_edges(self):
+        R  = Rect(Vec(1, 1), Vec(3, 2))
+        ss = [LineSegment(Vec(0, 1), Vec(4, 1)),
+              LineSegment(Vec(3, 2), Vec(4, 4)),
+              LineSegment(Vec(-1, 1.5), Vec(0, 1.5)),
+              LineSegment(Vec(1.5, 1.5), Vec(2.5, 1.5)),
+              LineSegment(Vec(0, 10), Vec(10, 10)),
+              ]
+        sa = batch.SegmentArray.from_segments(ss)
+        self.assertEqual(list(sa.overlaps_rect(R)),
+                         [R.overlaps_segment(s) for s in ss])
+
+    def test_degenerate_segment(self):
+        sa = batch.SegmentArray([1], [2], [1], [2])
+        xs, ys = sa.nearest_points(Vec(5, 5))
+        self.assertEqual((xs[0], ys[0]), (1, 2))
+
+    def test_rects(self):
+        rng = random.Random(3)
+        rects = [random_rect(rng) for _ in range(500)]
+        ra = batch.RectArray.from_rects(rects)
+        for _ in range(50):
+            R = random_rect(rng)
+            P = random_vec(rng)
+            overlaps = ra.overlaps_rect(R)
+            contains = ra.overlaps_point(P)
+            nn       = ra.distances_squared(P)
+            for i, r in enumerate(rects):
+                self.assertEqual(bool(overlaps[i]), r.overlaps_rect(R))
+                self.assertEqual(bool(contains[i]), r.overlaps_point(P))
+                self.assertEqual(nn[i], (r.nearest_point(P) - P).norm_squared())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import fractions
+import math
+import random
+import unittest
+
+from .. import Vec, Rect, GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+    def test_query_rect(self):
+        gi = GridIndex(cell_size=4)
+        gi.insert('a', Rect(Vec(0, 0), Vec(2, 2)))
+        gi.insert('b', Rect(Vec(10, 10), Vec(30, 12)))
+        gi.insert('c', Rect(Vec(-7, 5), Vec(-5, 9)))
+        self.assertEqual(len(gi), 3)
+        self.assertEqual(gi.query_rect(Rect(Vec(1, 1), Vec(1, 1))), {'a'})
+        self.assertEqual(gi.query_rect(Rect(Vec(2, 2), Vec(10, 10))),
+                         {'a', 'b'})
+        self.assertEqual(gi.query_rect(Rect(Vec(3, 3), Vec(9, 9))), set())
+        self.assertEqual(gi.query_rect(Rect(Vec(-100, -100),
+                                            Vec(100, 100))),
+                         {'a', 'b', 'c'})
+        self.assertEqual(gi.query_point(Vec(-4, 4), 1), {'c'})
+        self.assertEqual(gi.query_point(Vec(-4, 4), 0.5), set())
+
+    def test_query_cells(self):
+        gi = GridIndex(cell_size=4)
+        gi.insert('a', Rect(Vec(0, 0), Vec(2, 2)))
+        gi.insert('b', Rect(Vec(5, 1), Vec(9, 2)))
+        gi.insert('c', Rect(Vec(-7, 5), Vec(-5, 9)))
+        self.assertEqual(gi.query_cells(Rect(Vec(0, 0), Vec(100, 100))),
+                         [(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(gi.query_cells(Rect(Vec(-100, -100),
+                                             Vec(100, 100))),
+                         [(0, 0), (1, 0), (2, 0), (-2, 1), (-2, 2)])
+        self.assertEqual(gi.query_cells(Rect(Vec(-3, 5), Vec(-1, 6))), [])
+
+    def test_update_remove(self):
+        gi = GridIndex(cell_size=4)
+        gi.insert('a', Rect(Vec(0, 0), Vec(2, 2)))
+        R = Rect(Vec(20, 20), Vec(22, 30))
+        gi.update('a', R)
+        self.assertEqual(gi.query_point(Vec(1, 1)), set())
+        self.assertEqual(gi.query_point(Vec(21, 29)), {'a'})
+        R2 = gi.rect('a')
+        self.assertEqual((R2.l, R2.t, R2.r, R2.b), (R.l, R.t, R.r, R.b))
+        gi.remove('a')
+        self.assertNotIn('a', gi)
+        self.assertEqual(gi.query_point(Vec(21, 29)), set())
+        self.assertEqual(gi._cells, {})
+
+    def test_line(self):
+        # A long diagonal line only occupies the cells along it rather than
+        # all the cells of its bounding rectangle.
+        gi = GridIndex(cell_size=16)
+        gi.insert('a', Rect(Vec(0, 0), Vec(1000, 1000)),
+                  line=(0, 0, 1000, 1000))
+        self.assertEqual(len(gi._cells), 63)
+        self.assertEqual(gi.query_point(Vec(500, 500)), {'a'})
+        self.assertEqual(gi.query_point(Vec(900, 100)), set())
+
+        # Off the cell corners it crosses one cell boundary at a time.
+        gi.update('a', Rect(Vec(1, 3), Vec(1001, 703)),
+                  line=(1001, 3, 1, 703))
+        self.assertEqual(len(gi._cells), 62 + 43 + 1)
+        self.assertEqual(gi.query_point(Vec(501, 353)), {'a'})
+        gi.remove('a')
+        self.assertEqual(gi._cells, {})
+
+    def test_line_cells(self):
+        # Every point along a line lies in one of its cells, including where
+        # it passes through cell corners in any direction.
+        rng = random.Random(1234)
+        gi  = GridIndex(cell_size=4)
+        lines = [(0, 8, 8, 0), (8, 0, 0, 8), (8, 8, 0, 0), (2, 4, 2, 12),
+                 (12, 4, 0, 4)]
+        for _ in range(200):
+            lines.append(tuple(rng.choice((rng.randint(-20, 20),
+                                           rng.uniform(-20, 20)))
+                               for _ in range(4)))
+        for x0, y0, x1, y1 in lines:
+            cells = set(gi._line_cells((x0, y0, x1, y1)))
+            x0, y0, x1, y1 = (fractions.Fraction(v)
+                              for v in (x0, y0, x1, y1))
+            for i in range(101):
+                x = x0 + (x1 - x0) * i / 100
+                y = y0 + (y1 - y0) * i / 100
+                self.assertIn((math.floor(x / 4), math.floor(y / 4)), cells)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(1234)
+        gi  = GridIndex(cell_size=8)
+        rs  = {}
+        for i in range(300):
+            p0 = Vec(rng.randint(-100, 100), rng.randint(-100, 100))
+            p1 = p0 + Vec(rng.randint(0, 30), rng.randint(0, 30))
+            rs[i] = Rect(p0, p1)
+            gi.insert(i, rs[i])
+        for i in range(0, 300, 3):
+            dv = Vec(rng.randint(-20, 20), rng.randint(-20, 20))
+            rs[i] = rs[i] + dv
+            gi.update(i, rs[i])
+        for i in range(1, 300, 7):
+            del rs[i]
+            gi.remove(i)
+
+        for _ in range(100):
+            p0 = Vec(rng.randint(-120, 120), rng.randint(-120, 120))
+            p1 = p0 + Vec(rng.randint(0, 60), rng.randint(0, 60))
+            Q  = Rect(p0, p1)
+            expected = set(i for i, R in rs.items() if R.overlaps_rect(Q))
+            self.assertEqual(gi.query_rect(Q), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import random
+
+from .. import Vec, PointIndex
+
+
+class TestPointIndex(unittest.TestCase):
+    def test_query_point(self):
+        pi = PointIndex(cell_size=4)
+        pi.insert('a', Vec(0, 0))
+        pi.insert('b', Vec(3, 4))
+        pi.insert('c', Vec(-7.5, 5))
+        self.assertEqual(len(pi), 3)
+        self.assertEqual(pi.query_point(Vec(0, 0)), {'a'})
+        self.assertEqual(pi.query_point(Vec(0, 0), 5), {'a', 'b'})
+        self.assertEqual(pi.query_point(Vec(0, 0), 4.9), {'a'})
+        self.assertEqual(pi.query_point(Vec(-7, 5), 0.5), {'c'})
+        self.assertEqual(pi.nearest(Vec(2, 2), 5), 'b')
+        self.assertIsNone(pi.nearest(Vec(20, 20), 5))
+        self.assertEqual(pi.nearest(Vec(2, 2), 5, lambda i: i != 'b'), 'a')
+        self.assertIsNone(pi.nearest(Vec(2, 2), 5, lambda i: i == 'c'))
+
+    def test_update_remove(self):
+        pi = PointIndex(cell_size=4)
+        pi.insert('a', Vec(1, 1))
+        pi.update('a', Vec(21, 29))
+        self.assertEqual(pi.point('a'), (21, 29))
+        self.assertEqual(pi.query_point(Vec(1, 1), 1), set())
+        self.assertEqual(pi.query_point(Vec(21, 29)), {'a'})
+        pi.remove('a')
+        self.assertNotIn('a', pi)
+        self.assertEqual(pi._cells, {})
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(1234)
+        pi  = PointIndex(cell_size=3)
+        ps  = {}
+        for i in range(300):
+            ps[i] = Vec(rng.uniform(-50, 50), rng.uniform(-50, 50))
+            pi.insert(i, ps[i])
+        for i in range(0, 300, 3):
+            ps[i] = ps[i] + Vec(rng.uniform(-5, 5), rng.uniform(-5, 5))
+            pi.update(i, ps[i])
+        for i in range(1, 300, 7):
+            del ps[i]
+            pi.remove(i)
+
+        for _ in range(100):
+            P = Vec(rng.uniform(-60, 60), rng.uniform(-60, 60))
+            r = rng.uniform(0, 8)
+            expected = set(i for i, Q in ps.items()
+                           if (Q - P).norm_squared() <= r * r)
+            self.assertEqual(pi.query_point(P, r), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,33 @@ class TestRect(unittest.TestCase):
         self.assertIn(LineSegment(Vec(-5, 3), Vec(-5, 2)), r.segments)
         self.assertIn(LineSegment(Vec(-5, 3), Vec(1, 3)), r.segments)
 
+    def test_corners(self):
+        r = Rect(Vec(1, 2), Vec(-5, 3))
+        self.assertEqual((r.l, r.t, r.r, r.b), (-5, 2, 1, 3))
+        self.assertEqual(r.nw, Vec(-5, 2))
+        self.assertEqual(r.ne, Vec(1, 2))
+        self.assertEqual(r.se, Vec(1, 3))
+        self.assertEqual(r.sw, Vec(-5, 3))
+        self.assertIs(r.segments, r.segments)
+
+    def test_overlaps(self):
+        r = Rect(Vec(1, 1), Vec(3, 2))
+        self.assertTrue(r.overlaps_point(Vec(1, 2)))
+        self.assertTrue(r.overlaps_point(Vec(2, 1.5)))
+        self.assertFalse(r.overlaps_point(Vec(0, 1.5)))
+        self.assertTrue(r.overlaps_rect(Rect(Vec(3, 2), Vec(4, 4))))
+        self.assertTrue(r.overlaps_rect(Rect(Vec(0, 0), Vec(4, 4))))
+        self.assertFalse(r.overlaps_rect(Rect(Vec(3.5, 0), Vec(4, 4))))
+        self.assertFalse(r.overlaps_rect(Rect(Vec(0, 2.5), Vec(4, 4))))
+
+    def test_nearest_point(self):
+        r = Rect(Vec(1, 1), Vec(3, 2))
+        P = Vec(2, 1.5)
+        self.assertIs(r.nearest_point(P), P)
+        self.assertEqual(r.nearest_point(Vec(0, 1.5)), Vec(1, 1.5))
+        self.assertEqual(r.nearest_point(Vec(5, 5)), Vec(3, 2))
+        self.assertEqual(r.nearest_point(Vec(2, -7)), Vec(2, 1))
+
     def test_line_intersection_ts(self):
         # 2 wide x 1 high
         r = Rect(Vec(1, 1), Vec(3, 2))
@@ -65,6 +92,22 @@ class TestRect(unittest.TestCase):
         self.assertTrue(r.overlaps_segment(LineSegment(
             Vec(4, 4), Vec(3, 2))))
 
+    def test_difference(self):
+        r = Rect(Vec(0, 0), Vec(10, 10))
+        self.assertEqual(r.difference(Rect(Vec(20, 20), Vec(30, 30))), [r])
+        self.assertEqual(r.difference(Rect(Vec(-1, -1), Vec(11, 11))), [])
+
+        rs = r.difference(Rect(Vec(2, 3), Vec(4, 5)))
+        self.assertEqual(len(rs), 4)
+        self.assertEqual(sum(R.width * R.height for R in rs), 100 - 4)
+        for P in (Vec(1, 1), Vec(3, 8), Vec(9, 4), Vec(1, 4), Vec(4, 4)):
+            self.assertTrue(any(R.overlaps_point(P) for R in rs))
+        self.assertFalse(any(R.overlaps_point(Vec(3, 4)) for R in rs))
+
+        rs = r.difference(Rect(Vec(0, 0), Vec(10, 6)))
+        self.assertEqual(len(rs), 1)
+        self.assertEqual((rs[0].nw, rs[0].se), (Vec(0, 6), Vec(10, 10)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import random
+
+from .. import Vec, LineSegment, segment_intersections
+
+
+def S(x0, y0, x1, y1):
+    return LineSegment(Vec(x0, y0), Vec(x1, y1))
+
+
+def naive(segments):
+    return [(i, j)
+            for i in range(len(segments))
+            for j in range(i + 1, len(segments))
+            if segments[i].intersects(segments[j])]
+
+
+class TestIntersects(unittest.TestCase):
+    def test_intersects(self):
+        self.assertTrue(S(0, 0, 4, 4).intersects(S(0, 4, 4, 0)))
+        self.assertFalse(S(0, 0, 1, 1).intersects(S(0, 4, 4, 0)))
+        self.assertTrue(S(0, 0, 2, 2).intersects(S(2, 2, 4, 0)))
+        self.assertTrue(S(0, 0, 4, 0).intersects(S(2, 0, 2, 5)))
+        self.assertTrue(S(0, 0, 4, 0).intersects(S(3, 0, 6, 0)))
+        self.assertTrue(S(0, 0, 4, 0).intersects(S(4, 0, 6, 0)))
+        self.assertFalse(S(0, 0, 4, 0).intersects(S(5, 0, 6, 0)))
+        self.assertFalse(S(0, 0, 4, 0).intersects(S(0, 1, 4, 1)))
+        self.assertTrue(S(1, 1, 1, 1).intersects(S(0, 0, 2, 2)))
+
+    def test_collinear_connecting_segment(self):
+        s = S(0, 0, 4, 0).shortest_connecting_segment(S(6, 0, 9, 0))
+        self.assertEqual(s, S(4, 0, 6, 0))
+        s = S(0, 0, 4, 0).shortest_connecting_segment(S(2, 0, 9, 0))
+        self.assertEqual(s.line.dt2, 0)
+
+
+class TestSweep(unittest.TestCase):
+    def test_crossings(self):
+        segments = [S(0, 0, 10, 10),
+                    S(0, 10, 10, 0),
+                    S(5, -5, 5, 20),
+                    S(20, 0, 30, 0),
+                    S(0, 5, 4, 5),
+                    ]
+        self.assertEqual(segment_intersections(segments),
+                         [(0, 1), (0, 2), (1, 2)])
+
+    def test_collinear(self):
+        segments = [S(0, 0, 10, 0),
+                    S(5, 0, 15, 0),
+                    S(10, 0, 20, 0),
+                    S(12, 0, 13, 0),
+                    S(15, 0, 10, 0),
+                    S(0, 0, 10, 0),
+                    S(30, 0, 40, 0),
+                    ]
+        self.assertEqual(segment_intersections(segments), naive(segments))
+        self.assertIn((0, 5), segment_intersections(segments))
+        self.assertNotIn((0, 3), segment_intersections(segments))
+
+    def test_vertical(self):
+        segments = [S(5, 0, 5, 10),
+                    S(5, 5, 5, 15),
+                    S(0, 3, 10, 3),
+                    S(0, 12, 10, 12),
+                    S(5, 10, 8, 10),
+                    S(5, 20, 5, 30),
+                    S(5, 7, 5, 7),
+                    ]
+        self.assertEqual(segment_intersections(segments), naive(segments))
+
+    def test_common_point(self):
+        segments = [S(0, 0, 4, 4), S(4, 0, 0, 4), S(2, 0, 2, 4),
+                    S(0, 2, 4, 2), S(2, 2, 5, 9), S(-3, 1, 2, 2)]
+        self.assertEqual(len(segment_intersections(segments)), 15)
+
+    def test_float(self):
+        segments = [S(0.1, 0.2, 0.7, 0.9),
+                    S(0.1, 0.9, 0.7, 0.2),
+                    S(0.3, 0.3, 0.4, 0.3),
+                    ]
+        self.assertEqual(segment_intersections(segments), [(0, 1)])
+
+    def test_random(self):
+        r = random.Random(1)
+        for n, size in ((50, 20), (200, 100), (100, 6)):
+            segments = []
+            for _ in range(n):
+                x = r.randrange(size)
+                y = r.randrange(size)
+                if r.random() < 0.3:
+                    # Axis-aligned segments, which are often collinear.
+                    d = r.randrange(0, 6)
+                    if r.random() < 0.5:
+                        segments.append(S(x, y, x + d, y))
+                    else:
+                        segments.append(S(x, y, x, y + d))
+                else:
+                    segments.append(S(x, y, x + r.randrange(-8, 9),
+                                      y + r.randrange(-8, 9)))
+            self.assertEqual(segment_intersections(segments),
+                             naive(segments))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import pickle
 import math
 
 from .. import Vec
@@ -182,6 +183,43 @@ class TestVec(unittest.TestCase):
         self.assertFalse(v4.is_perpendicular(v3))
         self.assertFalse(v4.is_perpendicular(v4))
 
+    def test_sum(self):
+        vs = [Vec(1, 2), Vec(3, 4), Vec(-5, 7)]
+        self.assertEqual(Vec.sum(vs), Vec(-1, 13))
+        self.assertEqual(Vec.sum([]), Vec.ZERO)
+
+    def test_add_scaled(self):
+        v0 = Vec(12, 34)
+        v1 = Vec(56, 78)
+        self.assertEqual(v0.add_scaled(v1, 0.5), v0 + v1 * 0.5)
+
+
+class TestVecValue(unittest.TestCase):
+    def test_slots(self):
+        v0 = Vec(1, 2)
+        with self.assertRaises(AttributeError):
+            setattr(v0, 'z', 3)
+        self.assertFalse(hasattr(v0, '__dict__'))
+
+    def test_hash(self):
+        v0 = Vec(1, 2)
+        v1 = Vec(1., 2.)
+        v2 = Vec(2, 1)
+        self.assertEqual(hash(v0), hash(v1))
+        self.assertEqual(len(set([v0, v1, v2])), 2)
+        self.assertEqual({v0: 'a'}[v1], 'a')
+        self.assertNotEqual(v0, (1, 2))
+
+    def test_pickle(self):
+        v0 = Vec(1.5, -2)
+        self.assertEqual(pickle.loads(pickle.dumps(v0)), v0)
+
+    def test_constants(self):
+        self.assertEqual(Vec.ZERO, Vec(0, 0))
+        self.assertEqual(Vec.UNIT_X, Vec(1, 0))
+        self.assertEqual(Vec.UNIT_Y, Vec(0, 1))
+        self.assertFalse(Vec.ZERO)
+
 
 if __name__ == '__main__':
     unittest.main()
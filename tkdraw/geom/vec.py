@@ -5,22 +5,41 @@ class Vec:
     '''
     Implements a 2-dimensional vector class, using rectangular coordinates for
     the data model.
+
+    Vecs are created in huge numbers, so the class uses __slots__ to avoid a
+    per-instance __dict__.  Vecs are hashable so that they can be used as dict
+    keys and set members, which means that they must be treated as immutable:
+    x and y must never be assigned to once a Vec has been created.  This
+    isn't enforced, since guarding against assignment would make every Vec
+    more expensive to construct.
     '''
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+    def __reduce__(self):
+        return (Vec, (self.x, self.y))
+
     def __repr__(self):
         return 'Vec(%s, %s)' % (self.x, self.y)
 
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def __bool__(self):
         return self.x != 0 or self.y != 0
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        try:
+            return self.x == other.x and self.y == other.y
+        except AttributeError:
+            return NotImplemented
 
     def __ne__(self, other):
-        return not self.__eq__(other)
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
 
     def __add__(self, other):
         return Vec(self.x + other.x, self.y + other.y)
@@ -60,6 +79,26 @@ class Vec:
         '''
         return Vec(r * math.cos(theta), r * math.sin(theta))
 
+    @staticmethod
+    def sum(vecs):
+        '''
+        Returns the sum of an iterable of Vecs.  This accumulates the
+        coordinates directly instead of allocating a Vec for every partial
+        sum.
+        '''
+        x = 0
+        y = 0
+        for v in vecs:
+            x += v.x
+            y += v.y
+        return Vec(x, y)
+
+    def add_scaled(self, other, k):
+        '''
+        Returns self + other * k without allocating the intermediate product.
+        '''
+        return Vec(self.x + other.x * k, self.y + other.y * k)
+
     def arg(self):
         '''
         Returns the argument (angle) of the vector.
@@ -70,7 +109,7 @@ class Vec:
         '''
         Returns the square of the norm (length) of the vector.
         '''
-        return self.x**2 + self.y**2
+        return self.x * self.x + self.y * self.y
 
     def norm(self):
         '''
@@ -106,3 +145,8 @@ class Vec:
         defined as perpendicular to everything.
         '''
         return self.x * other.x == -self.y * other.y
+
+
+Vec.ZERO   = Vec(0, 0)
+Vec.UNIT_X = Vec(1, 0)
+Vec.UNIT_Y = Vec(0, 1)
@@ -0,0 +1,264 @@
+'''
+Undo/redo history.  The Document reports every edit to the History through
+its mutation hooks and the History records a small Command that knows how to
+invert it, rather than a snapshot of the document.  Commands refer to elems by
+store slot, which stays valid across deletion and restoration since deleted
+elems are always restored into the slots they came from.
+
+Consecutive edits of the same kind to the same elems, such as a run of arrow
+key nudges or the keystrokes typed into a text elem, are coalesced into a
+single Command as long as they arrive within COALESCE_INTERVAL seconds of
+each other.  Translations only coalesce if they are both nudges, so that a
+drag is always undone on its own rather than together with the nudges
+around it.
+
+The history is capped at max_bytes, as estimated by each Command's nbytes,
+with the oldest Commands evicted first.  The edits that an undo or redo makes
+go through the same Document hooks as any other, so they are journaled.
+'''
+import collections
+import time
+
+from . import store
+
+
+MAX_BYTES         = 64 * 1024 * 1024
+COALESCE_INTERVAL = 1.0
+
+
+class Command:
+    '''
+    Base class for undoable commands.  The timestamp t is the time the most
+    recent edit was coalesced into the command.
+    '''
+    def __init__(self, t):
+        self.t = t
+
+    @property
+    def nbytes(self):
+        raise NotImplementedError
+
+    def undo(self, workspace):
+        raise NotImplementedError
+
+    def redo(self, workspace):
+        raise NotImplementedError
+
+    def coalesce(self, _cmd):
+        '''
+        Tries to merge the later command cmd into this one, returning True if
+        it was merged.
+        '''
+        return False
+
+
+def _elems(workspace, slots):
+    return [workspace.doc.elem(slot) for slot in slots]
+
+
+class AddCommand(Command):
+    def __init__(self, t, records):
+        super().__init__(t)
+        self.records = records
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def undo(self, workspace):
+        workspace.editor.delete_elems(_elems(workspace, self.records.slots))
+
+    def redo(self, workspace):
+        workspace.editor.restore_elems(self.records)
+
+
+class DeleteCommand(AddCommand):
+    def undo(self, workspace):
+        super().redo(workspace)
+
+    def redo(self, workspace):
+        super().undo(workspace)
+
+
+class TranslateCommand(Command):
+    def __init__(self, t, slots, dv, nudge=False):
+        super().__init__(t)
+        self.slots = slots
+        self.dv    = dv
+        self.nudge = nudge
+
+    @property
+    def nbytes(self):
+        return 8 * len(self.slots)
+
+    def _translate(self, workspace, dv):
+        # Only the elems that already have Elem objects are moved through
+        # them; the rest are moved in the store without materializing them.
+        workspace.editor.translate_slots(self.slots, dv)
+        workspace.doc.slots_translated(self.slots, dv)
+
+    def undo(self, workspace):
+        self._translate(workspace, -self.dv)
+
+    def redo(self, workspace):
+        self._translate(workspace, self.dv)
+
+    def coalesce(self, cmd):
+        if (not isinstance(cmd, TranslateCommand) or not self.nudge or
+                not cmd.nudge or cmd.slots != self.slots):
+            return False
+        self.dv = self.dv + cmd.dv
+        return True
+
+
+class HandleDragCommand(Command):
+    def __init__(self, t, slot, index, h0, h1):
+        super().__init__(t)
+        self.slot  = slot
+        self.index = index
+        self.h0    = h0
+        self.h1    = h1
+
+    @property
+    def nbytes(self):
+        return 128
+
+    def _drag(self, workspace, h0, h1):
+        elem = workspace.doc.elem(self.slot)
+        elem.drag_handle(self.index, h1)
+        workspace.doc.elem_handle_dragged(elem, self.index, h0, h1)
+
+    def undo(self, workspace):
+        self._drag(workspace, self.h1, self.h0)
+
+    def redo(self, workspace):
+        self._drag(workspace, self.h0, self.h1)
+
+    def coalesce(self, cmd):
+        if (not isinstance(cmd, HandleDragCommand) or cmd.slot != self.slot or
+                cmd.index != self.index):
+            return False
+        self.h1 = cmd.h1
+        return True
+
+
+class TextCommand(Command):
+    def __init__(self, t, slot, old_text, new_text):
+        super().__init__(t)
+        self.slot     = slot
+        self.old_text = old_text
+        self.new_text = new_text
+
+    @property
+    def nbytes(self):
+        return 128 + len(self.old_text) + len(self.new_text)
+
+    def _set_text(self, workspace, old_text, new_text):
+        elem = workspace.doc.elem(self.slot)
+        elem.set_text(new_text)
+        workspace.doc.elem_text_changed(elem, old_text)
+
+    def undo(self, workspace):
+        self._set_text(workspace, self.new_text, self.old_text)
+
+    def redo(self, workspace):
+        self._set_text(workspace, self.old_text, self.new_text)
+
+    def coalesce(self, cmd):
+        if not isinstance(cmd, TextCommand) or cmd.slot != self.slot:
+            return False
+        self.new_text = cmd.new_text
+        return True
+
+
+class History:
+    '''
+    Undo and redo stacks of Commands.  The record_*() methods are called by
+    the Document's mutation hooks; edits made while undoing or redoing are
+    reported through the same hooks and ignored here.
+    '''
+    def __init__(self, workspace, max_bytes=MAX_BYTES,
+                 coalesce_interval=COALESCE_INTERVAL, clock=time.monotonic):
+        self.workspace         = workspace
+        self.max_bytes         = max_bytes
+        self.coalesce_interval = coalesce_interval
+        self.clock             = clock
+        self.undo_stack        = collections.deque()
+        self.redo_stack        = []
+        self.nbytes            = 0
+        self._replaying        = False
+        self._sealed           = True
+
+    def _push(self, cmd):
+        for c in self.redo_stack:
+            self.nbytes -= c.nbytes
+        self.redo_stack.clear()
+
+        if self.undo_stack and not self._sealed:
+            prev = self.undo_stack[-1]
+            if cmd.t - prev.t <= self.coalesce_interval:
+                nbytes = prev.nbytes
+                if prev.coalesce(cmd):
+                    prev.t       = cmd.t
+                    self.nbytes += prev.nbytes - nbytes
+                    return
+
+        self.undo_stack.append(cmd)
+        self.nbytes += cmd.nbytes
+        self._sealed = False
+        while self.nbytes > self.max_bytes:
+            self.nbytes -= self.undo_stack.popleft().nbytes
+
+    def _replay(self, src, dst, method):
+        if not src:
+            return False
+
+        cmd = src.pop()
+        self._replaying = True
+        try:
+            getattr(cmd, method)(self.workspace)
+        finally:
+            self._replaying = False
+        dst.append(cmd)
+
+        # Don't let a later edit coalesce into whatever is now on top of the
+        # undo stack.
+        self._sealed = True
+        return True
+
+    def undo(self):
+        '''
+        Undoes the most recent command.  Returns False if there was nothing to
+        undo.
+        '''
+        return self._replay(self.undo_stack, self.redo_stack, 'undo')
+
+    def redo(self):
+        '''
+        Redoes the most recently undone command.  Returns False if there was
+        nothing to redo.
+        '''
+        return self._replay(self.redo_stack, self.undo_stack, 'redo')
+
+    def record_add(self, slots):
+        if not self._replaying:
+            es = self.workspace.doc.store
+            self._push(AddCommand(self.clock(), store.Records(es, slots)))
+
+    def record_delete(self, slots):
+        if not self._replaying:
+            es = self.workspace.doc.store
+            self._push(DeleteCommand(self.clock(), store.Records(es, slots)))
+
+    def record_translate(self, slots, dv, nudge=False):
+        if not self._replaying:
+            self._push(TranslateCommand(self.clock(), sorted(slots), dv,
+                                        nudge))
+
+    def record_handle_drag(self, slot, index, h0, h1):
+        if not self._replaying:
+            self._push(HandleDragCommand(self.clock(), slot, index, h0, h1))
+
+    def record_text(self, slot, old_text, new_text):
+        if not self._replaying:
+            self._push(TextCommand(self.clock(), slot, old_text, new_text))
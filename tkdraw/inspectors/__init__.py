@@ -1,8 +1,10 @@
 from .coordinates import CoordinatesInspector
+from .stats import StatsInspector
 from .text_entry import TextEntryInspector
 
 
 __all__ = [
     'CoordinatesInspector',
+    'StatsInspector',
     'TextEntryInspector',
 ]
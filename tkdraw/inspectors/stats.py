@@ -0,0 +1,34 @@
+STATS_LINES = 8
+
+
+class StatsInspector:
+    '''
+    Shows the items on the document canvas and the p50/p99 latencies of the
+    slowest handlers, by p99, in a panel pinned to the bottom of the
+    inspector.
+    '''
+    def __init__(self, inspect_canvas, nlines=STATS_LINES):
+        self.inspect_canvas = inspect_canvas
+
+        dy = 14 + 12 * (nlines + 1) + 3
+        self.header_elem = inspect_canvas.add_pinned_field(
+                dy, 'STATS (p50/p99 ms)', font=inspect_canvas.header_font)
+        self.field_elems = [
+            inspect_canvas.add_pinned_field(dy - 14 - 12 * i, '')
+            for i in range(nlines + 1)]
+
+    def update(self, stats):
+        lines = ['items: %u' % stats.items_on_canvas()]
+        slowest = sorted(((hs.latency.percentile(99), name, hs)
+                          for name, hs in stats.handlers.items()
+                          if hs.latency.count), reverse=True)
+        for p99, name, hs in slowest[:len(self.field_elems) - 1]:
+            lines.append('%s %.2f/%.2f' % (name, hs.latency.percentile(50) *
+                                           1000, p99 * 1000))
+        lines += [''] * (len(self.field_elems) - len(lines))
+        for elem, text in zip(self.field_elems, lines):
+            elem.set_text(text)
+
+    def destroy(self):
+        for elem in [self.header_elem] + self.field_elems:
+            self.inspect_canvas.delete_pinned_field(elem)
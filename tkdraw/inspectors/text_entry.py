@@ -30,4 +30,6 @@ class TextEntryInspector:
     def _multiline_updated(self, _e):
         if self.elem is not None and self.mentry.edit_modified():
             self.mentry.edit_modified(False)
+            old_text = self.elem.text
             self.elem.set_text(self.get_text())
+            self.workspace.doc.elem_text_changed(self.elem, old_text)
@@ -0,0 +1,275 @@
+'''
+Append-only journal of Document edits, for crash safety without rewriting the
+whole document on every edit.  A journaled document lives in two files: a
+snapshot at path, written with docfile, and a journal at path + '.journal'
+holding the edits made since the snapshot was taken.
+
+The journal is a sequence of records, each consisting of a RECORD_HEADER
+giving the record's sequence number, operation and payload size, then the
+payload, then a CRC32 of the header and payload.  Payloads are:
+
+    OP_ADD        slot, kind, (x0, y0, x1, y1), followed by UTF-8 text
+    OP_DELETE     a list of slots
+    OP_TRANSLATE  (dx, dy), followed by a list of slots
+    OP_SET        slot, (x0, y0, x1, y1), followed by UTF-8 text
+
+The geometry of each record is as documented by ElemStore, and records are
+always replayed into the same slots they were journaled from.  A torn record
+at the end of the journal, left by a crash mid-write, fails its CRC check and
+it and everything after it are discarded.
+
+Records are encoded on the Tk thread, which is cheap, and handed to a
+background thread that writes them out and fsyncs the journal in batches.
+Every so often the journal is compacted: the Tk thread takes a copy of the
+ElemStore columns, which is little more than a memcpy, and the background
+thread writes it out as a new snapshot and truncates the journal.
+'''
+import array
+import os
+import struct
+import sys
+import threading
+import zlib
+
+from . import docfile
+from . import document
+from . import store
+
+
+OP_ADD       = 1
+OP_DELETE    = 2
+OP_TRANSLATE = 3
+OP_SET       = 4
+
+RECORD_HEADER = struct.Struct('<QBI')
+RECORD_CRC    = struct.Struct('<I')
+ADD_PAYLOAD   = struct.Struct('<QB4d')
+DV_PAYLOAD    = struct.Struct('<2d')
+SET_PAYLOAD   = struct.Struct('<Q4d')
+
+FSYNC_INTERVAL  = 0.5
+COMPACT_RECORDS = 10000
+
+
+def journal_path(path):
+    return path + '.journal'
+
+
+def _slots_bytes(slots):
+    a = array.array('Q', slots)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a.tobytes()
+
+
+def _bytes_slots(data):
+    a = array.array('Q')
+    a.frombytes(data)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a
+
+
+def _apply(es, op, payload):
+    if op == OP_ADD:
+        slot, kind, x0, y0, x1, y1 = ADD_PAYLOAD.unpack_from(payload)
+        text = None
+        if kind == store.KIND_TEXT:
+            text = str(payload[ADD_PAYLOAD.size:], 'utf-8')
+        es.insert(slot, kind, x0, y0, x1, y1, text)
+    elif op == OP_DELETE:
+        for slot in _bytes_slots(payload):
+            es.delete(slot)
+    elif op == OP_TRANSLATE:
+        dx, dy = DV_PAYLOAD.unpack_from(payload)
+        for slot in _bytes_slots(payload[DV_PAYLOAD.size:]):
+            es.translate(slot, dx, dy)
+    elif op == OP_SET:
+        slot, x0, y0, x1, y1 = SET_PAYLOAD.unpack_from(payload)
+        text = None
+        if es.kinds[slot] == store.KIND_TEXT:
+            text = str(payload[SET_PAYLOAD.size:], 'utf-8')
+        es.set(slot, x0, y0, x1, y1, text)
+    else:
+        raise ValueError('Unknown journal op %u.' % op)
+
+
+def replay(es, data, seq):
+    '''
+    Applies the journal records in data with sequence numbers above seq to
+    the ElemStore.  Returns a tuple (seq, length) giving the sequence number
+    of the last record applied and the length of the valid prefix of data.
+    '''
+    pos = 0
+    while pos + RECORD_HEADER.size <= len(data):
+        rseq, op, size = RECORD_HEADER.unpack_from(data, pos)
+        end = pos + RECORD_HEADER.size + size
+        if end + RECORD_CRC.size > len(data):
+            break
+        crc, = RECORD_CRC.unpack_from(data, end)
+        if crc != zlib.crc32(data[pos:end]):
+            break
+        if rseq > seq:
+            _apply(es, op, data[pos + RECORD_HEADER.size:end])
+            seq = rseq
+        pos = end + RECORD_CRC.size
+    return seq, pos
+
+
+class Journal:
+    '''
+    Journals the edits made to a Document.  The Document calls the log_*()
+    methods from its edit hooks; none of them do any I/O on the calling
+    thread.  Errors raised on the background thread are re-raised on the
+    next call from the Tk thread.
+    '''
+    def __init__(self, path, seq=0, fsync_interval=FSYNC_INTERVAL,
+                 compact_records=COMPACT_RECORDS):
+        self.path            = path
+        self.seq             = seq
+        self.fsync_interval  = fsync_interval
+        self.compact_records = compact_records
+        self.nrecords        = 0
+        self.error           = None
+        self._queue          = []
+        self._closed         = False
+        self._cond           = threading.Condition()
+        self._thread         = threading.Thread(target=self._run,
+                                                name='tkdraw-journal',
+                                                daemon=True)
+        self._thread.start()
+
+    def _check_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def _append(self, op, payload):
+        self._check_error()
+        self.seq += 1
+        data  = RECORD_HEADER.pack(self.seq, op, len(payload)) + payload
+        data += RECORD_CRC.pack(zlib.crc32(data))
+        with self._cond:
+            self._queue.append(data)
+            self._cond.notify()
+        self.nrecords += 1
+
+    def log_add(self, slot, kind, x0, y0, x1, y1, text):
+        self._append(OP_ADD, ADD_PAYLOAD.pack(slot, kind, x0, y0, x1, y1) +
+                     (text or '').encode('utf-8'))
+
+    def log_delete(self, slots):
+        self._append(OP_DELETE, _slots_bytes(slots))
+
+    def log_translate(self, slots, dx, dy):
+        self._append(OP_TRANSLATE, DV_PAYLOAD.pack(dx, dy) +
+                     _slots_bytes(slots))
+
+    def log_set(self, slot, x0, y0, x1, y1, text):
+        self._append(OP_SET, SET_PAYLOAD.pack(slot, x0, y0, x1, y1) +
+                     (text or '').encode('utf-8'))
+
+    def needs_compaction(self):
+        return self.nrecords >= self.compact_records
+
+    def compact(self, es):
+        '''
+        Queues a snapshot of the ElemStore, which must reflect every record
+        journaled so far, to be written by the background thread.
+        '''
+        self._check_error()
+        snapshot = (es.copy(), self.seq)
+        with self._cond:
+            self._queue.append(snapshot)
+            self._cond.notify()
+        self.nrecords = 0
+
+    def close(self, es=None):
+        '''
+        Shuts down the background thread after it has written everything that
+        was queued, optionally compacting the ElemStore into the snapshot
+        first.
+        '''
+        if es is not None:
+            self.compact(es)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._check_error()
+
+    def _write(self, f, items):
+        for item in items:
+            if isinstance(item, tuple):
+                es, seq = item
+                docfile.save_store(es, self.path, seq)
+                f.truncate(0)
+            else:
+                f.write(item)
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _run(self):
+        try:
+            with open(journal_path(self.path), 'ab') as f:
+                self._run_loop(f)
+        except Exception as e:
+            self.error = e
+
+    def _run_loop(self, f):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                items, self._queue = self._queue, []
+                closed = self._closed
+
+            self._write(f, items)
+            if closed:
+                return
+
+            # Give more records a chance to accumulate so that we fsync them
+            # in batches rather than once per edit.
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed, self.fsync_interval)
+
+
+def load_store(path):
+    '''
+    Loads the journaled document at path into an ElemStore without opening
+    it for editing: the journal is replayed over the snapshot but a torn
+    record at its end is left alone.
+    '''
+    es, seq = docfile.load_store(path)
+    jpath   = journal_path(path)
+    if os.path.exists(jpath):
+        with open(jpath, 'rb') as f:
+            replay(es, f.read(), seq)
+    return es
+
+
+def open_document(path, **kwargs):
+    '''
+    Opens the journaled document at path, creating it if it doesn't exist.
+    The snapshot is loaded and any journal records made since it was taken
+    are replayed on top of it, discarding a torn record at the end of the
+    journal if there is one.  Returns a Document with a Journal attached;
+    any keyword arguments are passed through to the Document constructor.
+    '''
+    if os.path.exists(path):
+        es, seq = docfile.load_store(path)
+    else:
+        es, seq = store.ElemStore(), 0
+        docfile.save_store(es, path, seq)
+
+    jpath = journal_path(path)
+    if os.path.exists(jpath):
+        with open(jpath, 'rb') as f:
+            data = f.read()
+        seq, length = replay(es, data, seq)
+        if length != len(data):
+            with open(jpath, 'r+b') as f:
+                f.truncate(length)
+
+    doc = document.Document(elem_store=es, **kwargs)
+    doc.journal = Journal(path, seq)
+    return doc
@@ -0,0 +1,245 @@
+'''
+Raster export of documents to grayscale PNG, for previews of drawings too
+large to export as vector graphics usefully.
+
+The output is laid out as by the vector exporter, and split into square tiles
+of TILE_SIZE pixels.  The records overlapping each tile are found through a
+GridIndex with one cell per tile, and each tile is rasterized by a worker in a
+ProcessPoolExecutor, so throughput scales with the number of cores.  Workers
+are sent only plain tuples of coordinates and draw with pure-Python scanline
+code, so they need neither Tk nor the document.  Tiles with no records in them
+aren't sent to a worker at all.
+
+The tiles are stitched together as their rows complete and the PNG is written
+as it goes, so memory use is bounded by a few rows of tiles however large the
+image is.  Lines are drawn in LINE_INK and text as the outline of its bounding
+rectangle in TEXT_INK, on a white background.
+'''
+import argparse
+import collections
+import concurrent.futures
+import math
+import os
+import struct
+import zlib
+
+from . import coords
+from . import export
+from . import geom
+from . import journal
+from .store import KIND_LINE, KIND_TEXT
+
+
+TILE_SIZE = 256
+LINE_INK  = 0x00
+TEXT_INK  = 0x80
+PAPER     = 0xFF
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Compressed image data is written out in IDAT chunks of about this size.
+IDAT_SIZE = 65536
+
+
+def _draw_line(pixels, tx, ty, w, h, x0, y0, x1, y1, ink):
+    '''
+    Draws the line from (x0, y0) to (x1, y1), in image pixel coordinates, into
+    the w x h tile at (tx, ty).  One pixel is set in each pixel column the line
+    crosses, or each row if it is steep, where the line passes the column's or
+    row's center.  Only the columns or rows inside the tile are visited, so the
+    pixels set don't depend on how the image is tiled.
+    '''
+    if abs(x1 - x0) >= abs(y1 - y0):
+        if x0 > x1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        slope = (y1 - y0) / (x1 - x0) if x1 != x0 else 0
+        for px in range(max(math.floor(x0), tx),
+                        min(math.floor(x1), tx + w - 1) + 1):
+            x  = min(max(px + 0.5, x0), x1)
+            py = math.floor(y0 + (x - x0) * slope) - ty
+            if 0 <= py < h:
+                pixels[py * w + px - tx] = ink
+    else:
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        slope = (x1 - x0) / (y1 - y0)
+        for py in range(max(math.floor(y0), ty),
+                        min(math.floor(y1), ty + h - 1) + 1):
+            y  = min(max(py + 0.5, y0), y1)
+            px = math.floor(x0 + (y - y0) * slope) - tx
+            if 0 <= px < w:
+                pixels[(py - ty) * w + px] = ink
+
+
+def _render_tile(tile):
+    '''
+    Rasterizes a tile, returning its rows of pixels.  The tile is a tuple
+    holding its position and size in pixels, the transform from grid
+    coordinates to pixels, and lists of lines as (x0, y0, x1, y1) and text
+    bounding rectangles as (l, t, r, b) in grid coordinates.
+    '''
+    tx, ty, w, h, s, ox, oy, lines, boxes = tile
+    pixels = bytearray([PAPER]) * (w * h)
+    for l, t, r, b in boxes:
+        l = l * s + ox
+        t = t * s + oy
+        r = r * s + ox
+        b = b * s + oy
+        for x0, y0, x1, y1 in ((l, t, r, t), (r, t, r, b), (r, b, l, b),
+                               (l, b, l, t)):
+            _draw_line(pixels, tx, ty, w, h, x0, y0, x1, y1, TEXT_INK)
+    for x0, y0, x1, y1 in lines:
+        _draw_line(pixels, tx, ty, w, h, x0 * s + ox, y0 * s + oy,
+                   x1 * s + ox, y1 * s + oy, LINE_INK)
+    return bytes(pixels)
+
+
+def _index(es, cell_size):
+    index = geom.GridIndex(cell_size=cell_size)
+    for slot in es:
+        line = None
+        if es.kinds[slot] == KIND_LINE:
+            line = (es.x0[slot], es.y0[slot], es.x1[slot], es.y1[slot])
+        index.insert(slot, es.bounding_rect(slot), line)
+    return index
+
+
+class _PNGWriter:
+    '''
+    Writes an 8-bit grayscale PNG to the binary file f a row at a time.
+    '''
+    def __init__(self, f, w, h):
+        self.f     = f
+        self._z    = zlib.compressobj()
+        self._data = []
+        self._size = 0
+        f.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 0, 0, 0, 0))
+
+    def _chunk(self, tag, data):
+        self.f.write(struct.pack('>I', len(data)) + tag + data +
+                     struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    def _flush_data(self):
+        self._chunk(b'IDAT', b''.join(self._data))
+        self._data = []
+        self._size = 0
+
+    def _add_data(self, data):
+        self._data.append(data)
+        self._size += len(data)
+        if self._size >= IDAT_SIZE:
+            self._flush_data()
+
+    def write_row(self, row):
+        # Each row is preceded by its filter type, 0 for none.
+        self._add_data(self._z.compress(b'\x00' + row))
+
+    def close(self):
+        self._add_data(self._z.flush())
+        self._flush_data()
+        self._chunk(b'IEND', b'')
+
+
+def write_png(es, f, scale=coords.GRID_SPACING, tile_size=TILE_SIZE,
+              workers=None):
+    '''
+    Writes the records in the ElemStore to the binary file f as a PNG with
+    scale pixels per grid unit.  Tiles are rasterized by a pool of worker
+    processes, as many as there are cores if workers is None, or in this
+    process if workers is 1.
+    '''
+    s, (ox, oy), (w, h) = export.layout(es, scale)
+    ntx   = math.ceil(w / tile_size)
+    nty   = math.ceil(h / tile_size)
+    index = _index(es, tile_size / s)
+
+    def make_tile(i, j):
+        tx = i * tile_size
+        ty = j * tile_size
+        tw = min(tile_size, w - tx)
+        th = min(tile_size, h - ty)
+
+        # Query a pixel wider than the tile, since a line that just misses
+        # it may still round into it.
+        R = geom.Rect(geom.Vec((tx - 1 - ox) / s, (ty - 1 - oy) / s),
+                      geom.Vec((tx + tw + 1 - ox) / s,
+                               (ty + th + 1 - oy) / s))
+        lines = []
+        boxes = []
+        for slot in sorted(index.query_rect(R)):
+            kind, x0, y0, x1, y1, _ = es.record(slot)
+            if kind == KIND_LINE:
+                lines.append((x0, y0, x1, y1))
+            elif kind == KIND_TEXT:
+                boxes.append((x0 - x1, y0 - y1, x0 + x1, y0 + y1))
+        if not lines and not boxes:
+            return tw, th, None
+        return tw, th, (tx, ty, tw, th, s, ox, oy, lines, boxes)
+
+    def render_rows(submit):
+        # Keep enough rows of tiles in flight to keep every worker busy.
+        depth   = max(2, math.ceil(2 * (workers or os.cpu_count() or 1) / ntx))
+        pending = collections.deque()
+        for j in range(nty):
+            pending.append([(tw, th, submit(tile) if tile else None)
+                            for tw, th, tile in
+                            (make_tile(i, j) for i in range(ntx))])
+            if len(pending) > depth:
+                yield pending.popleft()
+        yield from pending
+
+    png   = _PNGWriter(f, w, h)
+    blank = bytes([PAPER]) * tile_size
+
+    def write_rows(rows, result):
+        for row in rows:
+            tiles = [(tw, result(r) if r is not None else None)
+                     for tw, _, r in row]
+            for y in range(row[0][1]):
+                png.write_row(b''.join(
+                    p[y * tw:(y + 1) * tw] if p is not None else blank[:tw]
+                    for tw, p in tiles))
+
+    if workers == 1:
+        write_rows(render_rows(lambda tile: tile), _render_tile)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            write_rows(render_rows(lambda tile: pool.submit(_render_tile,
+                                                            tile)),
+                       lambda future: future.result())
+    png.close()
+
+
+def rasterize(es, path, **kwargs):
+    '''
+    Writes the ElemStore to path as a PNG.  Keyword arguments are passed to
+    write_png().
+    '''
+    with open(path, 'wb') as f:
+        write_png(es, f, **kwargs)
+
+
+def main(args):
+    rasterize(journal.load_store(args.path), args.output, scale=args.scale,
+              tile_size=args.tile_size, workers=args.workers)
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Exports a tkdraw drawing to a PNG image.')
+    parser.add_argument('path', help='Drawing to export.')
+    parser.add_argument('output', help='PNG file to write.')
+    parser.add_argument('--scale', type=float, default=coords.GRID_SPACING,
+                        help='Pixels per grid unit (default: %(default)s).')
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE,
+                        help='Tile width and height in pixels '
+                             '(default: %(default)s).')
+    parser.add_argument('--workers', type=int,
+                        help='Number of worker processes (default: one per '
+                             'core).')
+    main(parser.parse_args())
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,323 @@
+'''
+Virtualized rendering of a Document's elems onto the workspace canvas.  Tk's
+canvas slows to a crawl once it holds a few hundred thousand items, so rather
+than giving every elem a canvas item for its whole life, only elems whose
+bounding rectangles come within CULL_MARGIN canvas units of the view get one.
+The visibility query is served by the Document's spatial index.
+
+When an elem drops out of view its canvas item is hidden and returned to a
+pool, from which it is reissued to the next elem needing the same kind of item
+to come into view; canvas items are only ever created when a pool runs dry.
+Elems are only detached once they are twice the margin out of view, so that
+small view changes or edits near the edge of the view don't thrash the pools.
+Every item the Renderer creates carries RENDER_TAG so that panning the view
+is a single canvas move.
+
+The level of detail drops as the view zooms out, so that the work done per
+frame is bounded by the size of the canvas rather than the size of the
+document:
+
+    - Elems smaller than MIN_PIXELS canvas units across aren't drawn.
+    - Below TEXT_LOD_SCALE, text elems are drawn as their bounding boxes.
+    - Once the spatial index's cells shrink below OVERVIEW_CELL_PIXELS, no
+      elems are drawn at all; instead, each horizontal run of occupied index
+      cells is drawn as a single rectangle.
+
+Elems that aren't in the document, such as a line still being drawn by the
+LineTool, can be attached explicitly and stay attached until detached; they
+are always drawn in full.
+'''
+from . import coords
+from . import geom
+from . import store
+
+
+CULL_MARGIN          = 200
+MIN_PIXELS           = 1
+TEXT_LOD_SCALE       = coords.GRID_SPACING / 2
+OVERVIEW_CELL_PIXELS = 4
+
+RENDER_TAG = 'render'
+
+# Pool key for text elems drawn as their bounding boxes; elems drawn in full
+# are pooled by their KIND.
+BOX = 'box'
+
+
+def _expand(R, m):
+    dv = geom.Vec(m, m)
+    return geom.Rect(R.nw - dv, R.se + dv)
+
+
+class Renderer:
+    def __init__(self, workspace, margin=CULL_MARGIN):
+        self.workspace    = workspace
+        self.margin       = margin
+        self.view         = None
+        self.overview     = False
+        self.attached     = {}
+        self._pools       = {}
+        self._attach_rect = None
+        self._detach_rect = None
+        self._runs        = []
+        self._nruns       = 0
+        self._refresh     = None
+        self._text_fonts  = {}
+
+    @property
+    def npooled(self):
+        return sum(len(p) for p in self._pools.values())
+
+    def _lod_key(self, kind, R, explicit=False):
+        if not explicit:
+            if max(R.width, R.height) * self.view.scale < MIN_PIXELS:
+                return None
+        if kind == store.KIND_TEXT and self.view.scale < TEXT_LOD_SCALE:
+            return BOX
+        return kind
+
+    def _create(self, elem, key):
+        if key == BOX:
+            item = self.workspace.add_rectangle(elem.bounding_rect(),
+                                                outline='gray')
+        else:
+            item = elem.create_tk_elem()
+        item.add_tag(RENDER_TAG)
+        return item
+
+    def _draw(self, elem, key):
+        if key == BOX:
+            self.workspace.resize_rectangle(elem.tk_elem, elem.bounding_rect())
+        else:
+            elem.draw()
+
+    def attach(self, elem, key=None):
+        '''
+        Gives the elem a canvas item, reusing a pooled one if possible, and
+        applies its canvas tags to it.  Unless a pool key is given, the elem
+        is drawn in full detail.
+        '''
+        if key is None:
+            key = self._lod_key(elem.KIND, None, explicit=True)
+        pool = self._pools.get(key)
+        if pool:
+            elem.tk_elem = pool.pop()
+            elem.tk_elem.show()
+            self._draw(elem, key)
+        else:
+            elem.tk_elem = self._create(elem, key)
+        for tag in elem.tags:
+            elem.tk_elem.add_tag(tag)
+        self.attached[elem] = key
+
+    def detach(self, elem):
+        '''
+        Takes the elem's canvas item away from it, stripping its tags, hiding
+        it and returning it to the pool.
+        '''
+        key  = self.attached.pop(elem)
+        item = elem.tk_elem
+        for tag in elem.tags:
+            item.remove_tag(tag)
+        item.hide()
+        self._pools.setdefault(key, []).append(item)
+        elem.tk_elem = None
+
+    @staticmethod
+    def tag_elems(elems, tag):
+        '''
+        Add the canvas tag to all the elems.  Elems that are out of view get
+        the tag applied to their canvas items when they come into view.
+        '''
+        for e in elems:
+            e.tags.add(tag)
+            if e.tk_elem is not None:
+                e.tk_elem.add_tag(tag)
+
+    @staticmethod
+    def untag_elems(elems, tag):
+        '''
+        Remove the canvas tag from all the elems.
+        '''
+        for e in elems:
+            e.tags.discard(tag)
+            if e.tk_elem is not None:
+                e.tk_elem.remove_tag(tag)
+
+    def text_font_spec(self, scale):
+        '''
+        Returns the font to draw text elems with at the specified view scale:
+        the workspace's text font, sized so that text keeps its size relative
+        to the grid.
+        '''
+        spec = self._text_fonts.get(scale)
+        if spec is None:
+            if scale == coords.GRID_SPACING:
+                spec = 'TkDefaultFont'
+            else:
+                a    = self.workspace.text_font.actual()
+                size = abs(a['size']) * scale / coords.GRID_SPACING
+                spec = '{%s} %d %s %s' % (a['family'], -max(1, round(size)),
+                                          a['weight'], a['slant'])
+            self._text_fonts[scale] = spec
+        return spec
+
+    def set_view(self, view, R):
+        '''
+        Sets the View and the visible rectangle R, in grid coordinates.
+        Attached elems are redrawn and elems that have come into or gone out
+        of view are attached or detached.
+        '''
+        old_view          = self.view
+        self.view         = view
+        m                 = view.canvas_to_grid_delta(self.margin)
+        self._attach_rect = _expand(R, m)
+        self._detach_rect = _expand(R, 2 * m)
+
+        doc      = self.workspace.doc
+        overview = view.scale * doc.index.cell_size < OVERVIEW_CELL_PIXELS
+        if overview:
+            for e in [e for e in self.attached if e.slot is not None]:
+                self.detach(e)
+        elif self.overview:
+            self._draw_overview([])
+        self.overview = overview
+
+        if old_view is not None and old_view.scale == view.scale:
+            dv = view.offset - old_view.offset
+            if dv:
+                self.workspace.canvas.move(RENDER_TAG, dv.x, dv.y)
+        else:
+            for e, key in list(self.attached.items()):
+                self._update(e, key, self._lod_key(e.KIND, e.bounding_rect(),
+                                                   e.slot is None))
+
+        if overview:
+            self._draw_overview(self._overview_runs())
+            return
+
+        index = doc.index
+        keep  = index.query_rect(self._detach_rect)
+        for e in [e for e in self.attached
+                  if e.slot is not None and e.slot not in keep]:
+            self.detach(e)
+
+        kinds = doc.store.kinds
+        for slot in index.query_rect(self._attach_rect):
+            key = self._lod_key(kinds[slot], index.rect(slot))
+            if key is not None:
+                e = doc.elem(slot)
+                if e.tk_elem is None:
+                    self.attach(e, key)
+
+    def _update(self, elem, key, new_key, redraw=True):
+        if new_key != key:
+            self.detach(elem)
+            if new_key is not None:
+                self.attach(elem, new_key)
+        elif redraw:
+            self._draw(elem, key)
+
+    def update_elem(self, elem, redraw=True):
+        '''
+        Called when an elem's geometry changes, to attach or detach it if it
+        has moved into or out of view or changed level of detail, and
+        otherwise redraw it if redraw is True.
+        '''
+        if self.view is None:
+            return
+
+        explicit = elem.slot is None
+        if self.overview and not explicit:
+            if elem in self.attached:
+                self.detach(elem)
+            self.invalidate()
+            return
+
+        R   = elem.bounding_rect()
+        key = self.attached.get(elem)
+        if key is None:
+            if R.overlaps_rect(self._attach_rect):
+                key = self._lod_key(elem.KIND, R, explicit)
+                if key is not None:
+                    self.attach(elem, key)
+            return
+
+        new_key = None
+        if explicit or R.overlaps_rect(self._detach_rect):
+            new_key = self._lod_key(elem.KIND, R, explicit)
+        self._update(elem, key, new_key, redraw)
+
+    def update_slots(self, slots):
+        '''
+        Called when records are added to the document's store behind the back
+        of any Elem object, to attach the ones that are in view.  Records out
+        of view aren't materialized at all.
+        '''
+        if self.view is None:
+            return
+        if self.overview:
+            self.invalidate()
+            return
+
+        doc = self.workspace.doc
+        for slot in slots:
+            R = doc.store.bounding_rect(slot)
+            if R.overlaps_rect(self._attach_rect):
+                key = self._lod_key(doc.store.kinds[slot], R)
+                if key is not None:
+                    e = doc.elem(slot)
+                    if e.tk_elem is None:
+                        self.attach(e, key)
+
+    def invalidate(self):
+        '''
+        Called when elems have been added, moved or deleted without going
+        through update_elem() or update_slots(), so that the overview can be
+        redrawn.  The redraw is deferred to idle time so that a burst of edits
+        only pays for it once.
+        '''
+        if self.overview and self._refresh is None:
+            self._refresh = self.workspace.after_idle(self._refresh_overview)
+
+    def _refresh_overview(self):
+        self._refresh = None
+        if self.overview:
+            with self.workspace.canvas.batch():
+                self._draw_overview(self._overview_runs())
+
+    def _overview_runs(self):
+        '''
+        Returns a list of grid rectangles covering the horizontal runs of
+        occupied spatial index cells in view.
+        '''
+        index = self.workspace.doc.index
+        cs    = index.cell_size
+        runs  = []
+        start = prev = None
+        for cx, cy in index.query_cells(self._attach_rect):
+            if prev is not None and prev == (cx - 1, cy):
+                prev = (cx, cy)
+                continue
+            if start is not None:
+                runs.append((start, prev))
+            start = prev = (cx, cy)
+        if start is not None:
+            runs.append((start, prev))
+        return [geom.Rect(geom.Vec(cx0 * cs, cy * cs),
+                          geom.Vec((cx1 + 1) * cs, (cy + 1) * cs))
+                for (cx0, cy), (cx1, _) in runs]
+
+    def _draw_overview(self, rects):
+        for i, R in enumerate(rects):
+            if i < len(self._runs):
+                self.workspace.resize_rectangle(self._runs[i], R)
+                if i >= self._nruns:
+                    self._runs[i].show()
+            else:
+                r = self.workspace.add_rectangle(R, fill='gray', outline='')
+                r.add_tag(RENDER_TAG)
+                self._runs.append(r)
+        for r in self._runs[len(rects):self._nruns]:
+            r.hide()
+        self._nruns = len(rects)
@@ -0,0 +1,250 @@
+'''
+Latency instrumentation for the Workspace's event handlers and tool callbacks.
+
+While enabled, Stats times every event handler registered through
+TKBase.register_handler() or Canvas.register_handler(), such as the
+DrawCanvas <Configure> handler, and every handle_*() callback of every tool.
+For each one it keeps rolling histograms of the time taken and of the number
+of Tk calls made.  A batch flushed as a single Tcl script counts as one call.
+Tool callbacks often run inside an event handler, and each is charged for
+everything done inside it.
+
+Instrumentation works by wrapping the handlers, tool methods and canvas
+widget methods in place when enabled and unwrapping them when disabled, so it
+costs nothing at all while disabled.
+
+Handlers are named by their event sequence, prefixed by the canvas they are
+bound to if it isn't the root window, and tool callbacks by their method name
+without the handle_ prefix.  For example, a <Configure> on the document canvas
+is 'canvas<Configure>' and a tool's handle_mouse_moved() is 'mouse_moved'.
+'''
+import functools
+import json
+import math
+import time
+
+
+# Histograms cover the most recent ROLL_WINDOW to 2 * ROLL_WINDOW samples,
+# bucketed in SUBBUCKETS buckets per power of 2 from 2**MIN_EXP to 2**MAX_EXP,
+# which bounds the error of a percentile to a 1 / (2 * SUBBUCKETS) fraction.
+# Values below 2**MIN_EXP count as 0.
+ROLL_WINDOW = 1000
+SUBBUCKETS  = 8
+MIN_EXP     = -24
+MAX_EXP     = 32
+
+PERCENTILES = (50, 90, 99)
+
+TK_METHODS = ('addtag_withtag',
+              'bbox',
+              'coords',
+              'create_image',
+              'create_line',
+              'create_oval',
+              'create_polygon',
+              'create_rectangle',
+              'create_text',
+              'create_window',
+              'delete',
+              'dtag',
+              'find_all',
+              'itemcget',
+              'itemconfig',
+              'itemconfigure',
+              'move',
+              'tag_lower',
+              )
+
+
+class Histogram:
+    '''
+    A rolling histogram of non-negative values with logarithmic buckets.
+    '''
+    NBUCKETS = (MAX_EXP - MIN_EXP) * SUBBUCKETS + 1
+
+    def __init__(self, window=ROLL_WINDOW):
+        self.window = window
+        self.count  = 0
+        self.total  = 0
+        self.max    = 0
+        self._cur   = [0] * self.NBUCKETS
+        self._prev  = [0] * self.NBUCKETS
+        self._ncur  = 0
+
+    @staticmethod
+    def bucket(v):
+        if v <= 0:
+            return 0
+        m, e = math.frexp(v)
+        if e <= MIN_EXP:
+            return 0
+        if e > MAX_EXP:
+            return Histogram.NBUCKETS - 1
+        return 1 + (e - MIN_EXP - 1) * SUBBUCKETS + int((m - 0.5) * 2 *
+                                                        SUBBUCKETS)
+
+    @staticmethod
+    def bucket_limit(b):
+        '''
+        Returns the upper limit of the values in bucket b.
+        '''
+        if b == 0:
+            return 0
+        e, j = divmod(b - 1, SUBBUCKETS)
+        return math.ldexp(0.5 + (j + 1) / (2 * SUBBUCKETS), e + MIN_EXP + 1)
+
+    def add(self, v):
+        self._cur[self.bucket(v)] += 1
+        self._ncur  += 1
+        self.count  += 1
+        self.total  += v
+        self.max     = max(self.max, v)
+        if self._ncur >= self.window:
+            self._prev = self._cur
+            self._cur  = [0] * self.NBUCKETS
+            self._ncur = 0
+
+    def percentile(self, p):
+        '''
+        Returns an upper bound on the p'th percentile of the recent values.
+        '''
+        counts = [a + b for a, b in zip(self._cur, self._prev)]
+        rank   = math.ceil(p * sum(counts) / 100)
+        n      = 0
+        for b, c in enumerate(counts):
+            n += c
+            if c and n >= rank:
+                return min(self.bucket_limit(b), self.max)
+        return 0
+
+
+class HandlerStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.calls   = Histogram()
+
+    def summary(self):
+        s = {'count'       : self.latency.count,
+             'max_ms'      : self.latency.max * 1000,
+             'mean_ms'     : self.latency.total * 1000 / self.latency.count,
+             'total_calls' : self.calls.total,
+             'max_calls'   : self.calls.max,
+             }
+        for p in PERCENTILES:
+            s['p%u_ms' % p]    = self.latency.percentile(p) * 1000
+            s['p%u_calls' % p] = self.calls.percentile(p)
+        return s
+
+
+class Stats:
+    def __init__(self, workspace, clock=time.perf_counter):
+        self.workspace = workspace
+        self.clock     = clock
+        self.enabled   = False
+        self.handlers  = {}
+        self.calls     = 0
+        self.nitems    = None
+        self._saved    = []
+
+    def _targets(self):
+        ws = self.workspace
+        return (('', ws),
+                ('canvas', ws.canvas),
+                ('tools', ws.tool_canvas),
+                ('inspector', ws.inspect_canvas))
+
+    def _canvases(self):
+        return [c for _, c in self._targets()[1:]]
+
+    def _timed(self, name, f):
+        hs = self.handlers.get(name)
+        if hs is None:
+            hs = self.handlers[name] = HandlerStats()
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            calls = self.calls
+            t0    = self.clock()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                hs.latency.add(self.clock() - t0)
+                hs.calls.add(self.calls - calls)
+        return wrapper
+
+    def _counted(self, f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            self.calls += 1
+            return f(*args, **kwargs)
+        return wrapper
+
+    def enable(self):
+        '''
+        Wraps the handlers, tool callbacks and canvas widget methods.
+        '''
+        if self.enabled:
+            return
+        self.enabled = True
+
+        for prefix, target in self._targets():
+            for seq, handler in list(target.handlers.items()):
+                self._saved.append((target, seq, handler))
+                target.register_handler(seq, self._timed(prefix + seq, handler))
+
+        for t in self.workspace.tools:
+            for name in dir(t):
+                if name.startswith('handle_'):
+                    setattr(t, name, self._timed(name[7:], getattr(t, name)))
+
+        for c in self._canvases():
+            c._run = self._counted(c._run)
+            for name in TK_METHODS:
+                setattr(c._canvas, name,
+                        self._counted(getattr(c._canvas, name)))
+
+    def disable(self):
+        '''
+        Restores everything enable() wrapped.  The collected stats are kept.
+        '''
+        if not self.enabled:
+            return
+        self.enabled = False
+
+        for target, seq, handler in self._saved:
+            target.register_handler(seq, handler)
+        self._saved = []
+
+        for t in self.workspace.tools:
+            for name in list(vars(t)):
+                if name.startswith('handle_'):
+                    delattr(t, name)
+
+        for c in self._canvases():
+            del c._run
+            for name in TK_METHODS:
+                delattr(c._canvas, name)
+
+    def items_on_canvas(self):
+        '''
+        Counts the items on the document canvas, remembering the count in
+        nitems.
+        '''
+        self.nitems = len(self.workspace.canvas.find_all())
+        return self.nitems
+
+    def summary(self):
+        return {name: hs.summary() for name, hs in self.handlers.items()
+                if hs.latency.count}
+
+    def export(self, path):
+        '''
+        Writes the stats to path as JSON, with a summary of each handler's
+        latencies in milliseconds and Tk calls.  The count of items on the
+        canvas is the one last counted, since the canvas may be gone by the
+        time the stats are exported.
+        '''
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'items_on_canvas' : self.nitems,
+                       'handlers'        : self.summary()},
+                      f, indent=4, sort_keys=True)
@@ -0,0 +1,225 @@
+import array
+
+from . import geom
+
+
+KIND_FREE = 0
+KIND_LINE = 1
+KIND_TEXT = 2
+
+
+class ElemStore:
+    '''
+    Columnar storage for the elems in a Document.  Rather than holding a Python
+    object per elem, each elem occupies a slot in a set of parallel arrays
+    that record its kind and geometry:
+
+        KIND_LINE: (x0, y0) - (x1, y1) are the endpoints of the line.
+        KIND_TEXT: (x0, y0) is the center of the text and (x1, y1) is half the
+                   width and height of its bounding rectangle; the text itself
+                   is kept in the texts list.
+
+    The slot number also serves as the elem's id.  Deleted slots are marked
+    KIND_FREE and added to a free set to be reused by later additions, so
+    adding and deleting are both O(1), as is recreating a record in a
+    particular free slot.
+    '''
+    def __init__(self):
+        self.kinds  = array.array('B')
+        self.x0     = array.array('d')
+        self.y0     = array.array('d')
+        self.x1     = array.array('d')
+        self.y1     = array.array('d')
+        self.texts  = []
+        self._free  = set()
+        self._count = 0
+
+    @staticmethod
+    def from_columns(kinds, x0, y0, x1, y1, texts):
+        '''
+        Builds an ElemStore directly from a complete set of columns, such as
+        ones loaded from a file.  Free slots are recovered from the kinds
+        column, so slot numbers are preserved exactly.
+        '''
+        es = ElemStore()
+        n  = len(kinds)
+        assert len(x0) == len(y0) == len(x1) == len(y1) == len(texts) == n
+        es.kinds  = kinds
+        es.x0     = x0
+        es.y0     = y0
+        es.x1     = x1
+        es.y1     = y1
+        es.texts  = texts
+        es._free  = {slot for slot, k in enumerate(kinds) if k == KIND_FREE}
+        es._count = n - len(es._free)
+        return es
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, slot):
+        return 0 <= slot < len(self.kinds) and self.kinds[slot] != KIND_FREE
+
+    def __iter__(self):
+        '''
+        Iterates over the live slots in the store.
+        '''
+        for slot, kind in enumerate(self.kinds):
+            if kind != KIND_FREE:
+                yield slot
+
+    @property
+    def capacity(self):
+        '''
+        The number of slots, live or free, in the store.
+        '''
+        return len(self.kinds)
+
+    def _alloc(self):
+        if self._free:
+            return self._free.pop()
+        return self._grow()
+
+    def _grow(self):
+        self.kinds.append(KIND_FREE)
+        self.x0.append(0)
+        self.y0.append(0)
+        self.x1.append(0)
+        self.y1.append(0)
+        self.texts.append(None)
+        return len(self.kinds) - 1
+
+    def add(self, kind, x0, y0, x1, y1, text=None):
+        '''
+        Adds a record to the store, returning the slot it was placed in.
+        '''
+        assert kind != KIND_FREE
+        slot = self._alloc()
+        self.kinds[slot] = kind
+        self.set(slot, x0, y0, x1, y1, text)
+        self._count += 1
+        return slot
+
+    def insert(self, slot, kind, x0, y0, x1, y1, text=None):
+        '''
+        Adds a record to the store in a specific slot, which must be free.
+        This is used to recreate deleted records in the slots they originally
+        occupied, for instance when replaying a journal.
+        '''
+        assert kind != KIND_FREE
+        while len(self.kinds) <= slot:
+            self._free.add(self._grow())
+        assert self.kinds[slot] == KIND_FREE
+        self._free.remove(slot)
+        self.kinds[slot] = kind
+        self.set(slot, x0, y0, x1, y1, text)
+        self._count += 1
+
+    def translate(self, slot, dx, dy):
+        '''
+        Translates the record in the specified slot by (dx, dy).
+        '''
+        self.x0[slot] += dx
+        self.y0[slot] += dy
+        if self.kinds[slot] == KIND_LINE:
+            self.x1[slot] += dx
+            self.y1[slot] += dy
+
+    def copy(self):
+        '''
+        Returns an independent copy of the store.  The columns and the free
+        set are copied wholesale rather than rebuilt from the kinds column,
+        so this costs a few memory copies of the size of the store and no
+        work per slot in Python.
+        '''
+        es        = ElemStore()
+        es.kinds  = array.array('B', self.kinds)
+        es.x0     = array.array('d', self.x0)
+        es.y0     = array.array('d', self.y0)
+        es.x1     = array.array('d', self.x1)
+        es.y1     = array.array('d', self.y1)
+        es.texts  = list(self.texts)
+        es._free  = set(self._free)
+        es._count = self._count
+        return es
+
+    def slots_of_kind(self, kind):
+        '''
+        Returns a list of the slots holding records of the specified kind.
+        '''
+        return [slot for slot, k in enumerate(self.kinds) if k == kind]
+
+    def delete(self, slot):
+        '''
+        Deletes the record in the specified slot, freeing the slot for reuse.
+        '''
+        assert self.kinds[slot] != KIND_FREE
+        self.kinds[slot] = KIND_FREE
+        self.texts[slot] = None
+        self._free.add(slot)
+        self._count -= 1
+
+    def set(self, slot, x0, y0, x1, y1, text=None):
+        '''
+        Updates the geometry and text of the record in the specified slot.
+        '''
+        self.x0[slot]    = x0
+        self.y0[slot]    = y0
+        self.x1[slot]    = x1
+        self.y1[slot]    = y1
+        self.texts[slot] = text
+
+    def record(self, slot):
+        '''
+        Returns the record in the specified slot as a tuple of the form
+        (kind, x0, y0, x1, y1, text).
+        '''
+        return (self.kinds[slot], self.x0[slot], self.y0[slot], self.x1[slot],
+                self.y1[slot], self.texts[slot])
+
+    def bounding_rect(self, slot):
+        '''
+        Returns the bounding rectangle of the record in the specified slot.
+        '''
+        x0 = self.x0[slot]
+        y0 = self.y0[slot]
+        x1 = self.x1[slot]
+        y1 = self.y1[slot]
+        if self.kinds[slot] == KIND_TEXT:
+            return geom.Rect(geom.Vec(x0 - x1, y0 - y1),
+                             geom.Vec(x0 + x1, y0 + y1))
+        return geom.Rect(geom.Vec(x0, y0), geom.Vec(x1, y1))
+
+
+class Records:
+    '''
+    A compact, columnar copy of the records in a subset of an ElemStore's
+    slots, used to recreate those records later in the same slots.
+    Iterating yields tuples of the form (slot, kind, x0, y0, x1, y1, text).
+    '''
+    def __init__(self, es, slots):
+        self.slots = array.array('Q', slots)
+        self.kinds = array.array('B', (es.kinds[s] for s in self.slots))
+        self.x0    = array.array('d', (es.x0[s] for s in self.slots))
+        self.y0    = array.array('d', (es.y0[s] for s in self.slots))
+        self.x1    = array.array('d', (es.x1[s] for s in self.slots))
+        self.y1    = array.array('d', (es.y1[s] for s in self.slots))
+        self.texts = {s: es.texts[s] for s in self.slots
+                      if es.texts[s] is not None}
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __iter__(self):
+        texts = self.texts
+        for i, s in enumerate(self.slots):
+            yield (s, self.kinds[i], self.x0[i], self.y0[i], self.x1[i],
+                   self.y1[i], texts.get(s))
+
+    @property
+    def nbytes(self):
+        '''
+        The approximate memory footprint of the records.
+        '''
+        return 41 * len(self.slots) + sum(64 + len(t)
+                                          for t in self.texts.values())
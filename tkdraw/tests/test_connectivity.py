@@ -0,0 +1,123 @@
+import random
+import unittest
+
+from .. import connectivity
+from ..geom import Vec
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+from ..tk import headless
+from ..workspace import Workspace
+
+
+def partition(nets, es):
+    return {frozenset(nets.net(slot)) for slot in es
+            if es.kinds[slot] == KIND_LINE}
+
+
+class TestConnectivity(unittest.TestCase):
+    def setUp(self):
+        es = ElemStore()
+        es.add(KIND_LINE, 0, 0, 10, 0)      # 0
+        es.add(KIND_LINE, 10, 0, 10, 10)    # 1: shares an endpoint with 0
+        es.add(KIND_LINE, 5, 0, 5, -5)      # 2: T-junction on 0
+        es.add(KIND_LINE, 2, -3, 2, 3)      # 3: crosses 0 without joining
+        es.add(KIND_LINE, 20, 0, 30, 0)     # 4
+        es.add(KIND_TEXT, 10, 10, 2, 1, 't')
+        self.ws = headless.headless_class(Workspace)(motion_fps=0,
+                                                     elem_store=es)
+        self.ws.resize(1200, 800)
+        self.doc  = self.ws.doc
+        self.nets = self.doc.connectivity
+
+    def assertConsistent(self):
+        fresh = connectivity.Connectivity(self.doc.store, self.doc.index)
+        self.assertEqual(partition(self.nets, self.doc.store),
+                         partition(fresh, self.doc.store))
+        for slot in self.doc.store:
+            self.assertEqual(self.nets.neighbours(slot),
+                             fresh.neighbours(slot))
+
+    def test_nets(self):
+        self.assertEqual(self.nets.net(0), {0, 1, 2})
+        self.assertEqual(self.nets.net(3), {3})
+        self.assertEqual(self.nets.net(5), {5})
+        self.assertEqual(self.nets.neighbours(0), {1, 2})
+        self.assertEqual(self.nets.net_id(1), self.nets.net_id(2))
+
+    def test_edits(self):
+        doc = self.doc
+
+        # Dragging a handle onto another line joins the nets.
+        doc.elem(4).move_line(Vec(10, 5), Vec(30, 0))
+        self.assertEqual(self.nets.net(4), {0, 1, 2, 4})
+
+        # Deleting the line holding a net together splits it.
+        self.ws.editor.delete_elems([doc.elem(1)])
+        self.assertEqual(self.nets.net(0), {0, 2})
+        self.assertEqual(self.nets.net(4), {4})
+
+        # Translating a connected group keeps it connected, and undoing the
+        # deletion reconnects the restored line, which 0's end now lies on.
+        self.ws.editor.translate_elems([doc.elem(0), doc.elem(2)],
+                                       Vec(0, 1), 'group')
+        self.assertEqual(self.nets.net(0), {0, 2})
+        self.ws.editor.undo()
+        self.assertEqual(self.nets.net(4), {0, 1, 2, 4})
+        self.assertConsistent()
+
+    def test_random(self):
+        rng = random.Random(5)
+        doc = self.doc
+        for _ in range(300):
+            slots = [s for s in doc.store
+                     if doc.store.kinds[s] == KIND_LINE]
+            r = rng.random()
+            if r < 0.4 or not slots:
+                p0 = Vec(rng.randrange(12), rng.randrange(12))
+                p1 = p0 + Vec(rng.randrange(-3, 4), rng.randrange(-3, 4))
+                doc.elem_add(self.ws._materialize_elem(
+                    _line_store(p0, p1), 0))
+            elif r < 0.6:
+                self.ws.editor.delete_elems([doc.elem(rng.choice(slots))])
+            elif r < 0.8:
+                e = doc.elem(rng.choice(slots))
+                e.drag_handle(rng.randrange(2),
+                              Vec(rng.randrange(12), rng.randrange(12)))
+            else:
+                dv = Vec(rng.randrange(-2, 3), rng.randrange(-2, 3))
+                self.ws.editor.translate_elems(
+                    [doc.elem(s) for s in rng.sample(
+                        slots, min(3, len(slots)))], dv, 'group')
+            self.assertConsistent()
+
+    def test_group_move(self):
+        # Moving a whole net together leaves it alone, and moving part of it
+        # away splits it once.
+        doc   = self.doc
+        elems = [doc.elem(slot) for slot in (0, 1, 2)]
+        net   = self.nets.net_id(0)
+        self.ws.editor.translate_elems(elems, Vec(0, 100), 'group')
+        self.assertEqual(self.nets.net_id(0), net)
+        self.assertEqual(self.nets.net(2), {0, 1, 2})
+        self.ws.editor.translate_elems(elems[1:], Vec(100, 0), 'group')
+        self.assertEqual(self.nets.net(0), {0})
+        self.assertEqual(self.nets.net(1), {1})
+        self.assertEqual(self.nets.net(2), {2})
+        self.assertConsistent()
+
+    def test_select_connected(self):
+        ws = self.ws
+        ws.select_tool(ws.tools[0])
+        tool = ws.selected_tool
+        tool._selection_add_elem(self.doc.elem(2))
+        ws.generate(ws.canvas, '<KeyPress>', keysym='c', char='c')
+        self.assertEqual({e.slot for e in tool.selected_elems}, {0, 1, 2})
+
+
+def _line_store(p0, p1):
+    es = ElemStore()
+    es.add(KIND_LINE, p0.x, p0.y, p1.x, p1.y)
+    return es
+
+
+if __name__ == '__main__':
+    unittest.main()
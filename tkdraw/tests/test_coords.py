@@ -0,0 +1,43 @@
+import unittest
+
+from .. import coords
+from ..geom import Vec
+
+
+class TestView(unittest.TestCase):
+    def test_default(self):
+        view = coords.View()
+        for x in (-3, 0, 7):
+            self.assertEqual(view.gridx_to_canvasx(x),
+                             coords.gridx_to_canvasx(x))
+            self.assertEqual(view.canvasy_to_gridy_round(x * 10 + 4),
+                             coords.canvasy_to_gridy_round(x * 10 + 4))
+
+    def test_zoom_pan(self):
+        view = coords.View().zoomed(2, 105, 55)
+        self.assertEqual(view.scale, 20)
+        self.assertEqual(view.grid_to_canvas(10, 5), (105, 55))
+        self.assertEqual(view.grid_to_canvas(11, 5), (125, 55))
+
+        view = view.panned(10, -20)
+        self.assertEqual(view.grid_to_canvas(10, 5), (115, 35))
+        self.assertEqual(view.canvasx_to_gridx_float(135), 11)
+
+    def test_grid_step(self):
+        self.assertEqual(coords.View().grid_step(), 1)
+        self.assertEqual(coords.View(2).grid_step(), 4)
+        self.assertEqual(coords.View(0.3).grid_pitch(), 0.3 * 32)
+
+    def test_grid_origin(self):
+        self.assertEqual(coords.View().grid_origin(), Vec(-5, -5))
+        self.assertEqual(coords.View(10, Vec(-25, 30)).grid_origin(),
+                         Vec(-5, 0))
+        self.assertEqual(coords.View(2, Vec(3, 0)).grid_origin(), Vec(-5, 0))
+
+    def test_grid_dots(self):
+        self.assertEqual(coords.grid_dots(10, 35), [0, 10, 20, 30])
+        self.assertEqual(coords.grid_dots(2.5, 10), [0, 2, 5, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import tempfile
+import os
+
+from .. import docfile
+from .. import document
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+
+
+class TestDocFile(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.tkd')
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_round_trip(self):
+        es = ElemStore()
+        es.add(KIND_LINE, 1, 2, 3, 4)
+        s1 = es.add(KIND_TEXT, 5, 6, 2.5, 1, 'héllo\nworld')
+        es.add(KIND_LINE, -1, 0.5, 7, 8)
+        es.add(KIND_TEXT, 9, 9, 1, 1, '')
+        es.delete(s1)
+        docfile.save(document.Document(elem_store=es), self.path)
+
+        doc = docfile.load(self.path, nn_radius=2)
+        self.assertEqual(doc.nn_radius, 2)
+        self.assertEqual(list(doc.store), list(es))
+        self.assertEqual([doc.store.record(s) for s in doc.store],
+                         [es.record(s) for s in es])
+        self.assertEqual(doc.index.query_point(es.bounding_rect(3).p0), {3})
+
+        # The freed slot is still free and gets reused.
+        self.assertEqual(doc.store.add(KIND_LINE, 0, 0, 0, 0), s1)
+
+    def test_empty(self):
+        docfile.save(document.Document(), self.path)
+        self.assertEqual(len(docfile.load(self.path)), 0)
+
+    def test_bad_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'TKDRAW')
+        self.assertRaises(docfile.FormatError, docfile.load, self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(docfile.HEADER.pack(b'NOTADRAW', 1, 0, 0, 0, 0, 0))
+        self.assertRaises(docfile.FormatError, docfile.load, self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(docfile.HEADER.pack(docfile.MAGIC, docfile.VERSION + 1,
+                                        0, 0, 0, 0, 0))
+        self.assertRaises(docfile.FormatError, docfile.load, self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(docfile.HEADER.pack(docfile.MAGIC, docfile.VERSION, 0, 0,
+                                        10, 0, 0))
+        self.assertRaises(docfile.FormatError, docfile.load, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
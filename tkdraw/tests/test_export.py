@@ -0,0 +1,81 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from .. import docfile
+from .. import export
+from .. import journal
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.es = ElemStore()
+        self.es.add(KIND_LINE, 1, 2, 5, 2)
+        slot = self.es.add(KIND_LINE, 0, 0, 1, 1)
+        self.es.add(KIND_TEXT, 3, 4, 2, 1, 'a<b>\n(c)')
+        self.es.delete(slot)
+
+    def test_bounds(self):
+        self.assertEqual(export.bounds(self.es), (1, 2, 5, 5))
+        self.assertIsNone(export.bounds(ElemStore()))
+
+    def test_svg(self):
+        f = io.StringIO()
+        export.write_svg(self.es, f)
+        root = ET.fromstring(f.getvalue())
+        self.assertEqual(root.get('width'), '60')
+        self.assertEqual(root.get('height'), '50')
+
+        lines = root.findall('.//%sline' % SVG)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual([lines[0].get(a) for a in ('x1', 'y1', 'x2', 'y2')],
+                         ['10', '10', '50', '10'])
+
+        spans = root.findall('.//%stspan' % SVG)
+        self.assertEqual([s.text for s in spans], ['a<b>', '(c)'])
+        self.assertEqual([s.get('y') for s in spans], ['25', '35'])
+
+    def test_ps(self):
+        f = io.StringIO()
+        export.write_ps(self.es, f)
+        ps = f.getvalue().splitlines()
+        self.assertIn('%%BoundingBox: 0 0 60 50', ps)
+        self.assertIn('50 40 10 40 L', ps)
+        self.assertEqual(len([l for l in ps if l.endswith(' T')]), 2)
+        self.assertTrue(any('(\\(c\\))' in l for l in ps))
+
+    def test_chunks(self):
+        es = ElemStore()
+        for i in range(export.CHUNK_RECORDS * 2 + 1):
+            es.add(KIND_LINE, i, 0, i, 1)
+        f = io.StringIO()
+        export.write_svg(es, f)
+        self.assertEqual(f.getvalue().count('<line '), len(es))
+
+    def test_journaled(self):
+        d = tempfile.mkdtemp()
+        try:
+            path = os.path.join(d, 'test.tkd')
+            docfile.save_store(ElemStore(), path)
+            j = journal.Journal(path)
+            for slot in self.es:
+                j.log_add(slot, *self.es.record(slot))
+            j.close()
+
+            out = os.path.join(d, 'test.svg')
+            export.main(type('Args', (), {'path': path, 'output': out}))
+            with open(out, encoding='utf-8') as f:
+                self.assertEqual(f.read().count('<tspan'), 2)
+        finally:
+            shutil.rmtree(d)
+
+
+if __name__ == '__main__':
+    unittest.main()
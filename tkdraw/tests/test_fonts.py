@@ -0,0 +1,64 @@
+import unittest
+
+from ..tk import headless
+from ..tk.fonts import FontCache
+
+
+class CountingFont(headless.Font):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nmeasures = 0
+        self.nmetrics  = 0
+
+    def measure(self, text):
+        self.nmeasures += 1
+        return super().measure(text)
+
+    def metrics(self, *options):
+        self.nmetrics += 1
+        return super().metrics(*options)
+
+
+class TestFontCache(unittest.TestCase):
+    def test_measure(self):
+        cache = FontCache(maxsize=3)
+        f1    = CountingFont(size=-10)
+        f2    = CountingFont(size=-20)
+        self.assertEqual(cache.measure(f1, 'abc'), 18)
+        self.assertEqual(cache.measure(f2, 'abc'), 36)
+        self.assertEqual(cache.measure(f1, 'abc'), 18)
+        self.assertEqual((f1.nmeasures, f2.nmeasures), (1, 1))
+
+        # 'abc' in f2 is the least recently used and gets evicted.
+        cache.measure(f1, 'x')
+        cache.measure(f1, 'y')
+        cache.measure(f1, 'abc')
+        cache.measure(f2, 'abc')
+        self.assertEqual((f1.nmeasures, f2.nmeasures), (3, 2))
+
+    def test_metrics(self):
+        cache = FontCache()
+        f     = CountingFont(size=-10)
+        self.assertEqual(cache.metrics(f, 'linespace'), 11)
+        self.assertEqual(cache.metrics(f, 'ascent'), 8)
+        self.assertEqual(f.nmetrics, 1)
+
+        f.size = -20
+        cache.invalidate(f)
+        self.assertEqual(cache.metrics(f, 'linespace'), 21)
+
+    def test_edit(self):
+        # Editing one line of a long text only measures the changed line.
+        cache = FontCache()
+        f     = CountingFont()
+        lines = ['line %u' % i for i in range(500)]
+        for l in lines:
+            cache.measure(f, l)
+        lines[250] = 'edited'
+        for l in lines:
+            cache.measure(f, l)
+        self.assertEqual(f.nmeasures, 501)
+
+
+if __name__ == '__main__':
+    unittest.main()
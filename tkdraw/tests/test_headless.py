@@ -0,0 +1,116 @@
+import unittest
+
+from .. import geom
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class TestCanvasWidget(unittest.TestCase):
+    def setUp(self):
+        self.root = headless.Root()
+        self.c    = headless.CanvasWidget(self.root, 100, 100)
+
+    def test_items(self):
+        l = self.c.create_line(0, 0, 10, 10, tags='a')
+        r = self.c.create_rectangle((5, 5, 20, 20), tags=('a', 'b'))
+        self.c.move('a', 1, 2)
+        self.assertEqual(self.c.coords(l), [1, 2, 11, 12])
+        self.assertEqual(self.c.coords(r), [6, 7, 21, 22])
+
+        self.c.tag_lower(r, l)
+        self.assertEqual(self.c.find_all(), (r, l))
+        self.c.delete('b')
+        self.assertEqual(self.c.find_all(), (l,))
+        self.assertEqual(self.c.ops['move'], 1)
+        self.assertEqual(self.c.ops['create_line'], 1)
+
+    def test_bbox(self):
+        font = headless.Font(self.root, size=-10)
+        t    = self.c.create_text(50, 50, text='abcd\nef', font=font)
+        self.assertEqual(self.c.bbox(t), (38, 39, 62, 61))
+        self.c.itemconfigure(t, anchor='nw', font='{Arial} -20 bold roman')
+        self.assertEqual(self.c.bbox(t), (50, 50, 98, 92))
+
+        self.c.itemconfigure(t, state='hidden')
+        self.assertIsNone(self.c.bbox(t))
+
+
+class TestCanvas(unittest.TestCase):
+    def test_batch(self):
+        tkb = headless.TKBase()
+        c   = tkb.add_canvas(100, 100)
+        l   = c.add_line(geom.Vec(0, 0), geom.Vec(1, 1))
+        with c.batch():
+            l.coords(1, 2, 3, 4)
+            l.coords(5, 6, 7, 8)
+            l.add_tag('t')
+            c.move('t', 1, 1)
+        w = c._canvas
+        self.assertEqual(w.coords(l._elem_id), [6, 7, 8, 9])
+        self.assertEqual(tkb.op_counts()['script'], 1)
+
+        # The collapsed coords() is only issued once, plus the read above.
+        self.assertEqual(w.ops['coords'], 2)
+
+
+class TestRoot(unittest.TestCase):
+    def test_after(self):
+        root = headless.Root()
+        log  = []
+        root.after(20, lambda: log.append('b'))
+        root.after(10, lambda: log.append('a'))
+        t = root.after_idle(lambda: log.append('x'))
+        root.after_cancel(t)
+        root.after_idle(lambda: root.after_idle(lambda: log.append('i')))
+        root.update()
+        self.assertEqual(log, ['i'])
+        root.mainloop()
+        self.assertEqual(log, ['i', 'a', 'b'])
+        self.assertEqual(root.time, 20)
+
+    def test_text_modified(self):
+        root = headless.Root()
+        text = headless.Text(root)
+        log  = []
+        text.replace('1.0', 'end', 'hello\nworld')
+        text.bind('<<Modified>>', lambda e: log.append(e.widget.get('2.0')))
+        root.update()
+        self.assertEqual(log, ['w'])
+        self.assertEqual(text.get('1.0', 'end'), 'hello\nworld\n')
+
+
+class TestWorkspace(unittest.TestCase):
+    def setUp(self):
+        self.ws = headless.headless_class(Workspace)()
+        self.ws.resize(1200, 800)
+
+    def fire(self, sequence, p, **kwargs):
+        x, y = self.ws.view.grid_to_canvas(p.x, p.y)
+        self.ws.generate(self.ws.canvas, sequence, x=x, y=y, **kwargs)
+        self.ws._root.update()
+
+    def test_draw_line(self):
+        ws = self.ws
+        self.assertEqual(ws.canvas.width, 1200 - 300)
+        ws.select_tool(ws.tools[1])
+
+        p0 = geom.Vec(2, 3)
+        p1 = geom.Vec(8, 3)
+        self.fire('<Motion>', p0)
+        self.fire('<Button-1>', p0)
+        self.fire('<Motion>', p1)
+        self.fire('<ButtonRelease-1>', p1)
+        self.assertEqual(len(ws.doc), 1)
+
+        e = ws.doc.elem(0)
+        self.assertEqual(ws.canvas._canvas.coords(e.tk_elem._elem_id),
+                         [*ws.view.grid_to_canvas(p0.x, p0.y),
+                          *ws.view.grid_to_canvas(p1.x, p1.y)])
+
+        ws.reset_op_counts()
+        ws.generate(ws.canvas, '<KeyPress>', keysym='minus', char='-')
+        self.assertEqual(ws.op_counts()['script'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+
+from .. import history
+from ..geom import Vec
+from ..store import ElemStore, KIND_LINE
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class FakeDoc:
+    def __init__(self):
+        self.store = ElemStore()
+
+
+class FakeWorkspace:
+    def __init__(self):
+        self.doc      = FakeDoc()
+        self.replayed = []
+
+
+class FakeCommand(history.Command):
+    def __init__(self, t, name, nbytes=100):
+        super().__init__(t)
+        self.name    = name
+        self._nbytes = nbytes
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def undo(self, workspace):
+        workspace.replayed.append(('undo', self.name))
+
+    def redo(self, workspace):
+        workspace.replayed.append(('redo', self.name))
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.ws  = FakeWorkspace()
+        self.h   = history.History(self.ws, max_bytes=1000,
+                                   clock=lambda: self.now)
+
+    def test_undo_redo(self):
+        self.h._push(FakeCommand(0, 'a'))
+        self.h._push(FakeCommand(0, 'b'))
+        self.assertTrue(self.h.undo())
+        self.assertTrue(self.h.undo())
+        self.assertFalse(self.h.undo())
+        self.assertTrue(self.h.redo())
+        self.assertEqual(self.ws.replayed,
+                         [('undo', 'b'), ('undo', 'a'), ('redo', 'a')])
+
+        # A new command discards the redo stack.
+        self.h._push(FakeCommand(0, 'c'))
+        self.assertFalse(self.h.redo())
+        self.assertEqual(self.h.nbytes, 200)
+
+    def test_eviction(self):
+        for i in range(15):
+            self.h._push(FakeCommand(0, i))
+        self.assertEqual(len(self.h.undo_stack), 10)
+        self.assertEqual(self.h.undo_stack[0].name, 5)
+        self.assertEqual(self.h.nbytes, 1000)
+
+    def test_coalesce_translate(self):
+        self.h.record_translate([3, 1], Vec(1, 0), nudge=True)
+        self.now = 0.5
+        self.h.record_translate([1, 3], Vec(0, 1), nudge=True)
+        self.now = 1.0
+        self.h.record_translate([1, 3], Vec(1, 0), nudge=True)
+        self.assertEqual(len(self.h.undo_stack), 1)
+        self.assertEqual(self.h.undo_stack[0].dv, Vec(2, 1))
+
+        # Different elems or a long enough pause start a new command.
+        self.h.record_translate([1], Vec(1, 0), nudge=True)
+        self.now = 5
+        self.h.record_translate([1], Vec(1, 0), nudge=True)
+        self.assertEqual(len(self.h.undo_stack), 3)
+
+        # So does a drag, which nothing coalesces with either.
+        self.h.record_translate([1], Vec(5, 5))
+        self.h.record_translate([1], Vec(1, 0), nudge=True)
+        self.h.record_translate([1], Vec(5, 5))
+        self.h.record_translate([1], Vec(5, 5))
+        self.assertEqual(len(self.h.undo_stack), 7)
+
+    def test_record_delete(self):
+        es = self.ws.doc.store
+        s0 = es.add(KIND_LINE, 1, 2, 3, 4)
+        s1 = es.add(KIND_LINE, 5, 6, 7, 8)
+        self.h.record_delete([s0, s1])
+        cmd = self.h.undo_stack[0]
+        self.assertIsInstance(cmd, history.DeleteCommand)
+        self.assertEqual(list(cmd.records),
+                         [(s0, KIND_LINE, 1, 2, 3, 4, None),
+                          (s1, KIND_LINE, 5, 6, 7, 8, None)])
+
+
+class TestWorkspaceHistory(unittest.TestCase):
+    def setUp(self):
+        es = ElemStore()
+        es.add(KIND_LINE, 0, 0, 5, 0)
+        self.ws = headless.headless_class(Workspace)(motion_fps=0,
+                                                     elem_store=es)
+        self.ws.resize(1200, 800)
+
+    def test_arrow_without_selection(self):
+        ws = self.ws
+        ws.editor.delete_elems([ws.doc.elem(0)])
+        ws.editor.undo()
+        ws.generate(ws.canvas, '<KeyPress>', keysym='Left')
+        self.assertEqual(len(ws.history.undo_stack), 0)
+        self.assertTrue(ws.history.redo())
+        self.assertEqual(len(ws.doc), 0)
+
+    def test_translate_out_of_view(self):
+        es = ElemStore()
+        for i in range(1000):
+            es.add(KIND_LINE, 0, 10 * i, 5, 10 * i)
+        ws = headless.headless_class(Workspace)(motion_fps=0, elem_store=es)
+        ws.resize(1200, 800)
+
+        # Count the elems materialized by the undo.
+        doc         = ws.doc
+        materialize = doc.materialize
+        slots       = []
+
+        def counting_materialize(elem_store, slot):
+            slots.append(slot)
+            return materialize(elem_store, slot)
+        doc.materialize = counting_materialize
+
+        self.assertIn(0, doc.elems)
+        ws.editor.translate_slots(range(1000), Vec(1, 0))
+        doc.slots_translated(list(range(1000)), Vec(1, 0))
+        del slots[:]
+        ws.editor.undo()
+        self.assertLess(len(slots), 100)
+        self.assertEqual(doc.store.record(999), (KIND_LINE, 0, 9990, 5, 9990,
+                                                 None))
+        self.assertEqual(doc.index.query_point(Vec(0, 9990)), {999})
+
+        # An elem in view was moved through its Elem object.
+        e = doc.elems[0]
+        self.assertEqual(e.record(), (0, 0, 5, 0, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
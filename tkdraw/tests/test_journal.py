@@ -0,0 +1,155 @@
+import unittest
+import tempfile
+import shutil
+import os
+
+from .. import journal
+from .. import geom
+from ..store import KIND_LINE, KIND_TEXT
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class FakeElem:
+    NN_SLOP = 0
+
+    def __init__(self, kind, x0, y0, x1, y1, text=None):
+        self.KIND = kind
+        self.slot = None
+        self.rec  = (x0, y0, x1, y1, text)
+
+    def record(self):
+        return self.rec
+
+    def bounding_rect(self):
+        x0, y0, x1, y1, _ = self.rec
+        return geom.Rect(geom.Vec(x0, y0), geom.Vec(x1, y1))
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir  = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.tkd')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def records(self, doc):
+        return [doc.store.record(s) for s in doc.store]
+
+    def edit(self, doc):
+        l0 = FakeElem(KIND_LINE, 0, 0, 1, 1)
+        l1 = FakeElem(KIND_LINE, 2, 2, 3, 3)
+        t0 = FakeElem(KIND_TEXT, 5, 5, 1, 1, 'hi')
+        for e in (l0, l1, t0):
+            doc.elem_add(e)
+        doc.elems_delete([l0])
+        l1.rec = (3, 3, 4, 4, None)
+        doc.elem_changed(l1)
+        doc.elems_translated([l1], geom.Vec(1, 1))
+        l1.rec = (3, 3, 9, 9, None)
+        doc.elem_changed(l1)
+        doc.elem_handle_dragged(l1, 1, geom.Vec(4, 4), geom.Vec(9, 9))
+        t0.rec = (5, 5, 2, 1, 'hello')
+        doc.elem_changed(t0)
+        doc.elem_text_changed(t0, 'hi')
+        doc.elem_add(FakeElem(KIND_LINE, 7, 7, 8, 8))
+
+    def test_replay(self):
+        doc = journal.open_document(self.path)
+        self.edit(doc)
+        expected = self.records(doc)
+
+        # Simulate a crash by shutting down the journal without compacting.
+        doc.journal.close()
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), expected)
+        doc.close()
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), expected)
+        self.assertEqual(os.path.getsize(journal.journal_path(self.path)), 0)
+        doc.close()
+
+    def test_compaction(self):
+        doc = journal.open_document(self.path)
+        doc.journal.compact_records = 3
+        self.edit(doc)
+        expected = self.records(doc)
+        doc.journal.close()
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), expected)
+        doc.journal.close()
+
+    def test_torn_record(self):
+        doc = journal.open_document(self.path)
+        self.edit(doc)
+        doc.journal.close()
+
+        jpath = journal.journal_path(self.path)
+        size  = os.path.getsize(jpath)
+        with open(jpath, 'r+b') as f:
+            f.truncate(size - 3)
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(len(doc), 2)
+        doc.elem_add(FakeElem(KIND_LINE, 7, 7, 8, 8))
+        expected = self.records(doc)
+        doc.journal.close()
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), expected)
+        doc.journal.close()
+
+    def test_materialize_write_back(self):
+        # An elem whose record changes when it is materialized, as a text
+        # elem's does if the font has changed, has the change journaled.
+        doc = journal.open_document(self.path)
+        doc.elem_add(FakeElem(KIND_TEXT, 5, 5, 1, 1, 'hi'))
+        doc.close()
+
+        doc = journal.open_document(
+                self.path, materialize=lambda es, slot: FakeElem(
+                    KIND_TEXT, 5, 5, 2, 1, es.texts[slot]))
+        doc.elem(0)
+        expected = self.records(doc)
+        self.assertEqual(expected, [(KIND_TEXT, 5, 5, 2, 1, 'hi')])
+        doc.journal.close()
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), expected)
+        doc.close()
+
+    def test_save_mid_drag(self):
+        # Saving while a drag is in progress mustn't snapshot the partial
+        # translation, or it would be applied twice on replay.
+        doc = journal.open_document(self.path)
+        doc.elem_add(FakeElem(KIND_LINE, 0, 0, 10, 0))
+        doc.close()
+
+        ws = headless.headless_class(Workspace)(motion_fps=0, path=self.path)
+        ws.resize(1200, 800)
+        ws.select_tool(ws.tools[0])
+
+        def fire(sequence, gx, gy):
+            x, y = ws.view.grid_to_canvas(gx, gy)
+            ws.generate(ws.canvas, sequence, x=x, y=y)
+            ws._root.update()
+
+        fire('<Motion>', 5, 0)
+        fire('<Button-1>', 5, 0)
+        fire('<Motion>', 5, 3)
+        ws.editor.save()
+        fire('<ButtonRelease-1>', 5, 3)
+
+        # Simulate a crash so that the journal is replayed onto the snapshot.
+        ws.doc.journal.close()
+
+        doc = journal.open_document(self.path)
+        self.assertEqual(self.records(doc), [(KIND_LINE, 0, 3, 10, 3, None)])
+        doc.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import io
+import struct
+import unittest
+import zlib
+
+from .. import raster
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+
+
+def decode(data):
+    '''
+    Decodes an 8-bit grayscale PNG written by raster, returning its rows.
+    '''
+    assert data[:8] == raster.PNG_SIGNATURE
+    pos    = 8
+    chunks = []
+    while pos < len(data):
+        n, = struct.unpack('>I', data[pos:pos + 4])
+        tag  = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + n]
+        crc, = struct.unpack('>I', data[pos + 8 + n:pos + 12 + n])
+        assert crc == zlib.crc32(tag + body) & 0xFFFFFFFF
+        chunks.append((tag, body))
+        pos += 12 + n
+
+    w, h, depth, color = struct.unpack('>IIBB', chunks[0][1][:10])
+    assert (depth, color) == (8, 0)
+    raw  = zlib.decompress(b''.join(b for t, b in chunks if t == b'IDAT'))
+    rows = [raw[y * (w + 1):(y + 1) * (w + 1)] for y in range(h)]
+    assert all(r[0] == 0 for r in rows)
+    assert chunks[-1][0] == b'IEND'
+    return [r[1:] for r in rows]
+
+
+class TestRaster(unittest.TestCase):
+    def setUp(self):
+        self.es = ElemStore()
+        self.es.add(KIND_LINE, 0, 0, 30, 0)
+        self.es.add(KIND_LINE, 0, 0, 30, 20)
+        slot = self.es.add(KIND_LINE, 5, 5, 9, 9)
+        self.es.add(KIND_TEXT, 20, 5, 4, 2, 'text')
+        self.es.delete(slot)
+
+    def render(self, **kwargs):
+        f = io.BytesIO()
+        raster.write_png(self.es, f, **kwargs)
+        return decode(f.getvalue())
+
+    def test_render(self):
+        rows = self.render(tile_size=64, workers=1)
+        self.assertEqual(len(rows), 220)
+        self.assertEqual(len(rows[0]), 320)
+
+        # The horizontal line, offset by the margin.
+        self.assertEqual(set(rows[10][10:311]), {raster.LINE_INK})
+        self.assertEqual(rows[10][9], raster.PAPER)
+
+        # The diagonal line crosses every row between its endpoints.
+        for y in range(11, 211):
+            self.assertIn(raster.LINE_INK, rows[y])
+
+        # The text box outline, and its empty inside.
+        self.assertEqual(set(rows[40][170:251]), {raster.TEXT_INK})
+        self.assertEqual(rows[60][170], raster.TEXT_INK)
+        self.assertEqual(rows[60][200], raster.PAPER)
+
+        # The deleted line isn't drawn.
+        self.assertEqual(rows[90][70], raster.PAPER)
+
+    def test_tiles(self):
+        # The output doesn't depend on the tiling or on the workers.
+        rows = self.render(workers=1)
+        self.assertEqual(self.render(tile_size=7, workers=1), rows)
+        self.assertEqual(self.render(tile_size=50, workers=2), rows)
+
+    def test_empty(self):
+        rows = decode(self._empty())
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(set(rows[0]), {raster.PAPER})
+
+    @staticmethod
+    def _empty():
+        f = io.BytesIO()
+        raster.write_png(ElemStore(), f, workers=1)
+        return f.getvalue()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import unittest
+
+from .. import coords
+from .. import document
+from .. import geom
+from .. import renderer
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+
+
+class FakeItem:
+    def __init__(self, drawn):
+        self.drawn  = drawn
+        self.hidden = False
+        self.tags   = set()
+
+    def show(self):
+        self.hidden = False
+
+    def hide(self):
+        self.hidden = True
+
+    def add_tag(self, tag):
+        self.tags.add(tag)
+
+    def remove_tag(self, tag):
+        self.tags.discard(tag)
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.moves = []
+
+    def move(self, tag, dx, dy):
+        self.moves.append((tag, dx, dy))
+
+
+class FakeElem:
+    NN_SLOP = 0
+
+    def __init__(self, workspace, kind, x0, y0, x1, y1):
+        self.KIND      = kind
+        self.workspace = workspace
+        self.slot      = None
+        self.tk_elem   = None
+        self.tags      = set()
+        self.rec       = (x0, y0, x1, y1, None)
+
+    def create_tk_elem(self):
+        self.workspace.created += 1
+        return FakeItem(self.rec)
+
+    def draw(self):
+        self.tk_elem.drawn = self.rec
+
+    def record(self):
+        return self.rec
+
+    def bounding_rect(self):
+        x0, y0, x1, y1, _ = self.rec
+        return geom.Rect(geom.Vec(x0, y0), geom.Vec(x1, y1))
+
+
+class FakeWorkspace:
+    def __init__(self):
+        self.created = 0
+        self.idle    = None
+        self.canvas  = FakeCanvas()
+        es = ElemStore()
+        for i in range(100):
+            es.add(KIND_LINE, 10 * i, 0, 10 * i + 2, 2)
+        es.add(KIND_TEXT, 150, 500, 4, 2, 'hi')
+        self.doc = document.Document(materialize=self.materialize,
+                                     elem_store=es)
+
+    def materialize(self, es, slot):
+        kind, x0, y0, x1, y1, _ = es.record(slot)
+        if kind == KIND_TEXT:
+            return FakeElem(self, kind, x0 - x1, y0 - y1, x0 + x1, y0 + y1)
+        return FakeElem(self, kind, x0, y0, x1, y1)
+
+    def add_rectangle(self, R, **_kwargs):
+        self.created += 1
+        return FakeItem(R)
+
+    def resize_rectangle(self, elem, R):
+        elem.drawn = R
+
+    def after_idle(self, callback):
+        self.idle = callback
+
+
+# A view with one canvas unit per grid unit.
+VIEW = coords.View(1, geom.Vec(0, 0))
+
+
+def _rect(l, r):
+    return geom.Rect(geom.Vec(l, 0), geom.Vec(r, 40))
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        self.ws = FakeWorkspace()
+        self.r  = renderer.Renderer(self.ws, margin=10)
+        self.ws.doc.elems.clear()
+
+    def set_view(self, l, r, view=VIEW):
+        self.r.set_view(view, _rect(l, r))
+
+    def visible_slots(self):
+        return sorted(e.slot for e in self.r.attached)
+
+    def test_cull(self):
+        self.set_view(100, 200)
+        self.assertEqual(self.visible_slots(), list(range(9, 22)))
+        self.assertEqual(self.ws.created, 13)
+
+        # Only elems that are in view are materialized at all.
+        self.assertEqual(len(self.ws.doc.elems), 13)
+
+    def test_materialize_unchanged(self):
+        # Materialized elems are only written back to the store if their
+        # records differ from the stored ones, which only the text's does.
+        changed = []
+        self.ws.doc.elem_changed = changed.append
+        self.set_view(100, 200)
+        self.assertEqual(changed, [])
+        self.r.set_view(VIEW, geom.Rect(geom.Vec(100, 480),
+                                        geom.Vec(200, 520)))
+        self.assertEqual([e.slot for e in changed], [100])
+
+    def test_pool(self):
+        self.set_view(100, 200)
+        self.set_view(500, 600)
+        self.assertEqual(self.visible_slots(), list(range(49, 62)))
+        self.assertEqual(self.ws.created, 13)
+        self.assertEqual(self.r.npooled, 0)
+        for e in self.r.attached:
+            self.assertFalse(e.tk_elem.hidden)
+            self.assertEqual(e.tk_elem.drawn, e.rec)
+
+        # Elems that fell out of view are dropped by the document.
+        self.assertEqual(len(self.ws.doc.elems), 13)
+
+    def test_hysteresis(self):
+        self.set_view(100, 200)
+        self.set_view(115, 215)
+        self.assertEqual(self.visible_slots(), list(range(10, 23)))
+
+    def test_tags(self):
+        self.set_view(100, 200)
+        e = self.ws.doc.elem(10)
+        e.tags.add('selected')
+        e.tk_elem.add_tag('selected')
+        self.set_view(500, 600)
+        self.assertIsNone(e.tk_elem)
+        self.assertTrue(all(i.tags == {renderer.RENDER_TAG}
+                            for i in self.r._pools[KIND_LINE]))
+
+        e.rec = (550, 0, 552, 2, None)
+        self.ws.doc.elem_changed(e)
+        self.r.update_elem(e)
+        self.assertEqual(e.tk_elem.tags, {'selected', renderer.RENDER_TAG})
+
+    def test_pan(self):
+        self.set_view(100, 200)
+        self.r.set_view(VIEW.panned(-5, 0), _rect(105, 205))
+        self.assertEqual(self.ws.canvas.moves, [(renderer.RENDER_TAG, -5, 0)])
+
+    def test_lod(self):
+        # Text is drawn as a box when zoomed out, and lines smaller than a
+        # pixel aren't drawn at all.
+        R    = geom.Rect(geom.Vec(100, 0), geom.Vec(200, 600))
+        view = coords.View(0.5, geom.Vec(0, 0))
+        self.r.set_view(view, R)
+        keys = {e.slot: k for e, k in self.r.attached.items()}
+        self.assertEqual(keys[100], renderer.BOX)
+        self.assertEqual(keys[10], KIND_LINE)
+
+        view = coords.View(0.3, geom.Vec(0, 0))
+        self.r.set_view(view, R)
+        self.assertEqual(self.visible_slots(), [100])
+
+    def test_overview(self):
+        view = coords.View(0.1, geom.Vec(0, 0))
+        self.r.set_view(view, _rect(0, 1000))
+        self.assertTrue(self.r.overview)
+        self.assertFalse(self.r.attached)
+        self.assertEqual(self.r._nruns, 1)
+        self.assertEqual(self.r._runs[0].drawn.r, 1008)
+
+        self.set_view(100, 200)
+        self.assertFalse(self.r.overview)
+        self.assertTrue(all(r.hidden for r in self.r._runs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from .. import document
+from ..geom import Vec
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class TestSnap(unittest.TestCase):
+    def setUp(self):
+        es = ElemStore()
+        es.add(KIND_LINE, 0, 0, 5, 0)
+        es.add(KIND_LINE, 0, 10, 10, 13)
+        es.add(KIND_LINE, 0, 20, 10, 20)
+        es.add(KIND_TEXT, 20, 20, 2, 1, 'text')
+        self.ws = headless.headless_class(Workspace)(motion_fps=0,
+                                                     elem_store=es)
+        self.ws.resize(1200, 800)
+        self.doc = self.ws.doc
+
+    def fire(self, sequence, gx, gy):
+        x, y = self.ws.view.grid_to_canvas(gx, gy)
+        self.ws.generate(self.ws.canvas, sequence, x=x, y=y)
+        self.ws._root.update()
+
+    def test_find_snap_point(self):
+        snap = self.doc.find_snap_point
+        self.assertEqual(snap(Vec(4.6, 0.3), 1), (Vec(5, 0),
+                                                  document.SNAP_ENDPOINT))
+        self.assertEqual(snap(Vec(2.9, 0.3), 1), (Vec(2.5, 0),
+                                                  document.SNAP_MIDPOINT))
+        self.assertEqual(snap(Vec(3.3, 20.2), 1, Vec(3, 20)),
+                         (Vec(3, 20), document.SNAP_SEGMENT))
+        self.assertEqual(snap(Vec(20, 20), 1), (None, None))
+
+        P, kind = snap(Vec(3.1, 11.5), 1, Vec(3, 12))
+        self.assertEqual(kind, document.SNAP_SEGMENT)
+        self.assertAlmostEqual(P.y, 10 + P.x * 0.3)
+
+    def test_incremental(self):
+        snap = self.doc.find_snap_point
+        self.assertEqual(snap(Vec(5, 0), 0.5)[0], Vec(5, 0))
+
+        e = self.doc.elem(0)
+        e.move_line(Vec(0, 30), Vec(5, 30))
+        self.assertEqual(snap(Vec(5, 0), 0.5), (None, None))
+        self.assertEqual(snap(Vec(5, 30.2), 0.5)[0], Vec(5, 30))
+
+        self.ws.editor.delete_elems([e])
+        self.assertEqual(snap(Vec(5, 30.2), 0.5), (None, None))
+        self.assertEqual(len(self.doc.points), 6)
+
+    def test_line_tool(self):
+        ws = self.ws
+        ws.select_tool(ws.tools[1])
+        self.fire('<Motion>', 2.6, 0.3)
+        self.fire('<Button-1>', 2.6, 0.3)
+        self.fire('<Motion>', 9.7, 19.6)
+        self.fire('<ButtonRelease-1>', 9.7, 19.6)
+        self.assertEqual(len(self.doc), 5)
+        slot = max(self.doc.store)
+        self.assertEqual(self.doc.store.record(slot),
+                         (KIND_LINE, 2.5, 0, 10, 20, None))
+
+        # The new line can be snapped to straight away, and stops being
+        # snappable once undone.
+        self.assertEqual(self.doc.find_snap_point(Vec(6.1, 10.2), 0.5)[1],
+                         document.SNAP_MIDPOINT)
+        ws.editor.undo()
+        self.assertEqual(self.doc.find_snap_point(Vec(6.1, 10.2), 0.5),
+                         (None, None))
+
+        # Far from any line, the grid point is used.
+        self.fire('<Motion>', 30.2, 30.3)
+        self.fire('<Button-1>', 30.2, 30.3)
+        self.fire('<Motion>', 33.8, 30.1)
+        self.fire('<ButtonRelease-1>', 33.8, 30.1)
+        slot = max(self.doc.store)
+        self.assertEqual(self.doc.store.record(slot),
+                         (KIND_LINE, 30, 30, 34, 30, None))
+
+    def test_snapped_lines_connect(self):
+        # A line from the midpoint of one line to a point partway along the
+        # sloping line, which is off the grid, connects all three.
+        ws = self.ws
+        ws.select_tool(ws.tools[1])
+        self.fire('<Motion>', 2.6, 0.3)
+        self.fire('<Button-1>', 2.6, 0.3)
+        self.fire('<Motion>', 3.3, 11.4)
+        self.fire('<ButtonRelease-1>', 3.3, 11.4)
+        slot = max(self.doc.store)
+        _, x0, y0, x1, _, _ = self.doc.store.record(slot)
+        self.assertEqual((x0, y0), (2.5, 0))
+        self.assertNotEqual(x1, round(x1))
+
+        ws.select_tool(ws.tools[0])
+        tool = ws.selected_tool
+        tool._selection_add_elem(self.doc.elem(slot))
+        ws.generate(ws.canvas, '<KeyPress>', keysym='c', char='c')
+        self.assertEqual({e.slot for e in tool.selected_elems},
+                         {0, 1, slot})
+
+
+if __name__ == '__main__':
+    unittest.main()
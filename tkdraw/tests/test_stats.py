@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import stats
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentile(self):
+        h = stats.Histogram()
+        for v in range(1, 101):
+            h.add(v / 1000)
+        for p in (50, 90, 99):
+            v = h.percentile(p)
+            self.assertGreaterEqual(v, p / 1000)
+            self.assertLessEqual(v, p / 1000 * (1 + 1 / stats.SUBBUCKETS))
+        self.assertEqual(h.percentile(100), 0.1)
+        self.assertEqual(h.count, 100)
+
+    def test_roll(self):
+        h = stats.Histogram(window=10)
+        for _ in range(25):
+            h.add(1)
+        for _ in range(20):
+            h.add(0)
+        self.assertEqual(h.percentile(99), 0)
+        self.assertEqual(h.max, 1)
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ws  = headless.headless_class(Workspace)(motion_fps=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def draw_line(self):
+        ws = self.ws
+        ws.select_tool(ws.tools[1])
+        for seq, x in (('<Motion>', 15), ('<Button-1>', 15),
+                       ('<Motion>', 55), ('<ButtonRelease-1>', 55)):
+            ws.generate(ws.canvas, seq, x=x, y=25)
+
+    def test_enable(self):
+        ws = self.ws
+        ws.stats.enable()
+        ws.resize(1000, 600)
+        self.draw_line()
+        ws.stats.disable()
+
+        handlers = ws.stats.handlers
+        self.assertEqual(handlers['canvas<Configure>'].latency.count, 1)
+        self.assertEqual(handlers['<Button-1>'].latency.count, 1)
+        self.assertEqual(handlers['mouse_moved'].latency.count, 2)
+        self.assertGreater(handlers['<Button-1>'].calls.total, 0)
+
+        # Disabling removes every wrapper.
+        self.assertFalse([n for n in vars(ws.tools[1])
+                          if n.startswith('handle_')])
+        self.assertNotIn('coords', vars(ws.canvas._canvas))
+        self.assertNotIn('_run', vars(ws.canvas))
+        self.assertIs(ws._root.binds['<Motion>'], ws.handlers['<Motion>'])
+
+        count = handlers['<Button-1>'].latency.count
+        self.draw_line()
+        self.assertEqual(handlers['<Button-1>'].latency.count, count)
+
+    def test_toggle(self):
+        ws = self.ws
+        ws.resize(1000, 600)
+        ws.generate(ws.canvas, '<KeyPress>', keysym='F12')
+        self.draw_line()
+        ws._root.time += 1000
+        ws._root.update()
+
+        texts = [f.cget('text') for f in ws.stats_inspector.field_elems]
+        self.assertTrue(texts[0].startswith('items: '))
+        self.assertTrue(any(t.startswith('<Button-1> ') for t in texts))
+
+        # The panel survives the inspector being cleared.
+        ws.select_tool(ws.tools[0])
+        self.assertEqual(texts[0], ws.stats_inspector.field_elems[0].cget(
+            'text'))
+
+        path = os.path.join(self.dir, 'stats.json')
+        ws.stats.export(path)
+        with open(path, encoding='utf-8') as f:
+            s = json.load(f)
+        self.assertEqual(s['handlers']['<Button-1>']['count'], 1)
+        self.assertIsNotNone(s['items_on_canvas'])
+
+        ws.generate(ws.canvas, '<KeyPress>', keysym='F12')
+        self.assertFalse(ws.stats.enabled)
+        self.assertIsNone(ws.stats_inspector)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from ..store import ElemStore, KIND_LINE, KIND_TEXT
+from ..geom import Vec
+
+
+class TestElemStore(unittest.TestCase):
+    def test_add_delete(self):
+        es = ElemStore()
+        s0 = es.add(KIND_LINE, 1, 2, 3, 4)
+        s1 = es.add(KIND_TEXT, 5, 5, 2, 1, 'hi')
+        self.assertEqual(len(es), 2)
+        self.assertEqual(list(es), [s0, s1])
+        self.assertEqual(es.record(s1), (KIND_TEXT, 5, 5, 2, 1, 'hi'))
+
+        es.delete(s0)
+        self.assertEqual(len(es), 1)
+        self.assertNotIn(s0, es)
+        self.assertEqual(list(es), [s1])
+
+        # Freed slots get reused before the arrays grow.
+        s2 = es.add(KIND_LINE, 0, 0, 1, 1)
+        self.assertEqual(s2, s0)
+        self.assertEqual(es.capacity, 2)
+
+    def test_insert(self):
+        es = ElemStore()
+        s0 = es.add(KIND_LINE, 1, 2, 3, 4)
+        es.delete(s0)
+        es.insert(s0, KIND_LINE, 1, 2, 3, 4)
+        es.insert(3, KIND_TEXT, 5, 5, 2, 1, 'hi')
+        self.assertEqual(list(es), [s0, 3])
+        self.assertEqual(es._free, {1, 2})
+
+        # Only the slots that are still free get reused.
+        self.assertEqual({es.add(KIND_LINE, 0, 0, 1, 1) for _ in range(3)},
+                         {1, 2, 4})
+        self.assertEqual(es.record(3), (KIND_TEXT, 5, 5, 2, 1, 'hi'))
+
+    def test_set(self):
+        es = ElemStore()
+        s0 = es.add(KIND_LINE, 1, 2, 3, 4)
+        es.set(s0, 4, 3, 2, 1)
+        self.assertEqual(es.record(s0), (KIND_LINE, 4, 3, 2, 1, None))
+
+    def test_bounding_rect(self):
+        es = ElemStore()
+        R  = es.bounding_rect(es.add(KIND_LINE, 3, 4, 1, 2))
+        self.assertEqual((R.nw, R.se), (Vec(1, 2), Vec(3, 4)))
+        R  = es.bounding_rect(es.add(KIND_TEXT, 5, 5, 2, 1, 'hi'))
+        self.assertEqual((R.nw, R.se), (Vec(3, 4), Vec(7, 6)))
+
+    def test_copy(self):
+        es = ElemStore()
+        s0 = es.add(KIND_LINE, 1, 2, 3, 4)
+        s1 = es.add(KIND_LINE, 5, 6, 7, 8)
+        es.delete(s0)
+        c  = es.copy()
+        self.assertEqual(len(c), 1)
+        self.assertEqual(list(c), [s1])
+
+        # The copy reuses the same free slots, independently of the original.
+        self.assertEqual(c.add(KIND_TEXT, 0, 0, 1, 1, 'hi'), s0)
+        self.assertNotIn(s0, es)
+        self.assertEqual(es.add(KIND_LINE, 0, 0, 1, 1), s0)
+
+
+if __name__ == '__main__':
+    unittest.main()
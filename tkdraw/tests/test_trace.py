@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import trace
+from ..tk import headless
+from ..workspace import Workspace
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.dir  = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.trace')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    @staticmethod
+    def records(ws):
+        es = ws.doc.store
+        return [es.record(s) for s in es]
+
+    def record(self):
+        ws = headless.headless_class(Workspace)(motion_fps=0)
+        ws.doc.store.add(1, 0, 0, 5, 0)
+        ws.resize(1000, 600)
+        ws.recorder = trace.Recorder(ws, self.path)
+
+        def fire(sequence, gx, gy):
+            x, y = ws.view.grid_to_canvas(gx, gy)
+            ws.generate(ws.canvas, sequence, x=x, y=y)
+
+        # Select the LineTool.
+        ws.generate(ws.tool_canvas, '<Button-1>', x=60, y=10)
+        for i in range(3):
+            fire('<Motion>', 1, 2 + i)
+            fire('<Button-1>', 1, 2 + i)
+            fire('<Motion>', 3, 2 + i)
+            fire('<Motion>', 6, 2 + i)
+            fire('<ButtonRelease-1>', 6, 2 + i)
+        ws.generate(ws.canvas, '<KeyPress>', keysym='plus', char='+')
+        ws.recorder.close()
+        return ws
+
+    def test_replay(self):
+        ws       = self.record()
+        replayer = trace.Replayer(self.path)
+        report   = replayer.run()
+
+        self.assertEqual(len(report), 17)
+        self.assertEqual(len(report.latencies['moved']), 9)
+        self.assertEqual(self.records(replayer.workspace), self.records(ws))
+        self.assertEqual(replayer.workspace.view, ws.view)
+        self.assertEqual(report.ops['up']['create_line'], 0)
+        self.assertGreater(report.ops['down']['create_line'], 0)
+        self.assertIn('moved', report.format())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(trace.percentile(values, 50), 50)
+        self.assertEqual(trace.percentile(values, 99), 99)
+        self.assertEqual(trace.percentile([7], 99), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
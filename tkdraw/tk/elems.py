@@ -1,7 +1,21 @@
+import contextlib
+import itertools
 import tkinter
+import tkinter.font
 import ctypes
 
 
+def _tcl_quote(v):
+    '''
+    Quotes a Python int, float or str value as a single Tcl word.
+    '''
+    if isinstance(v, (int, float)):
+        return str(v)
+    return '"%s"' % (v.replace('\\', '\\\\').replace('"', '\\"')
+                      .replace('$', '\\$').replace('[', '\\[')
+                      .replace(']', '\\]'))
+
+
 class Elem:
     def __init__(self, elem_id):
         self._elem_id = elem_id
@@ -23,10 +37,10 @@ class CanvasElem(Elem):
             self.by     = y + height
 
     def configure(self, **kwargs):
-        return self._canvas._canvas.itemconfig(self._elem_id, **kwargs)
+        return self._canvas._itemconfig(self, **kwargs)
 
     def cget(self, config):
-        return self._canvas._canvas.itemcget(self._elem_id, config)
+        return self._canvas._itemcget(self, config)
 
     def bbox(self):
         return self._canvas._bbox(self)
@@ -37,6 +51,12 @@ class CanvasElem(Elem):
     def set_fill(self, fill):
         self._canvas._set_fill(self, fill)
 
+    def add_tag(self, tag):
+        self._canvas._add_tag(self, tag)
+
+    def remove_tag(self, tag):
+        self._canvas._remove_tag(self, tag)
+
     def hide(self):
         self._canvas._hide(self)
 
@@ -86,33 +106,153 @@ class LineElem(CanvasElem):
         self.coords(x, y, x + dx, y + dy)
 
 
+class Photo:
+    '''
+    Wraps a Tk photo image, which starts out fully transparent.
+    '''
+    def __init__(self, master, width, height):
+        self._image = tkinter.PhotoImage(master=master, width=width,
+                                         height=height)
+        self.width  = width
+        self.height = height
+
+    @property
+    def name(self):
+        return self._image.name
+
+    def fill(self, color, x0, y0, x1, y1):
+        '''
+        Fills the rectangle from (x0, y0) up to but excluding (x1, y1).
+        '''
+        self._image.put(color, to=(x0, y0, x1, y1))
+
+    def copy(self, src, to):
+        '''
+        Copies all of the Photo src into this one at to = (x, y).  If to is
+        instead a region (x0, y0, x1, y1), Tk tiles src across it.
+        '''
+        self._image.tk.call(self._image.name, 'copy', src.name, '-to', *to)
+
+
 class Canvas:
     def __init__(self, workspace, canvas, w, h):
-        self._workspace = workspace
-        self._canvas    = canvas
-        self.width      = w
-        self.height     = h
+        self._workspace   = workspace
+        self._canvas      = canvas
+        self.width        = w
+        self.height       = h
+        self.handlers     = {}
+        self._batch_depth = 0
+        self._batch_ops   = {}
+        self._batch_seq   = itertools.count()
+
+    @contextlib.contextmanager
+    def batch(self):
+        '''
+        Context manager that records the item operations made on the canvas
+        instead of issuing them one Tcl call at a time.  Repeated operations
+        that overwrite each other, such as several coords() calls on the same
+        item, are collapsed down to the last one.  When the outermost batch
+        exits, the recorded operations are flushed to Tcl as a single script.
+
+        Operations that need to read canvas state flush the batch first, so
+        they always observe the effect of the operations recorded so far.
+        '''
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+
+    def flush(self):
+        '''
+        Issues any operations recorded by batch() as a single Tcl script.
+        '''
+        if not self._batch_ops:
+            return
+        ops             = list(self._batch_ops.values())
+        self._batch_ops = {}
+        self._run(ops)
+
+    def _encode(self, args):
+        '''
+        Encodes a canvas widget command for the batch as a Tcl command line.
+        '''
+        return ' '.join([self._canvas._w] + [_tcl_quote(a) for a in args])
+
+    def _run(self, ops):
+        '''
+        Issues a list of encoded canvas widget commands as one Tcl script.
+        '''
+        self._canvas.tk.eval('\n'.join(ops))
+
+    def _record(self, key, *args):
+        '''
+        Records the canvas widget command with the specified arguments if a
+        batch is in progress and returns True.  Keys identify operations that
+        supersede each other; a key of None means the operation must always be
+        issued.  If there is no batch in progress or some argument can't be
+        quoted for Tcl, any recorded operations are flushed and False is
+        returned so that the caller issues the operation directly.
+        '''
+        if self._batch_depth == 0:
+            return False
+        if not all(isinstance(a, (int, float, str)) for a in args):
+            self.flush()
+            return False
+
+        if key is None:
+            key = next(self._batch_seq)
+        else:
+            self._batch_ops.pop(key, None)
+        self._batch_ops[key] = self._encode(args)
+        return True
+
+    def _itemconfig(self, elem, **kwargs):
+        if kwargs and all(self._record((elem._elem_id, k), 'itemconfigure',
+                                       elem._elem_id, '-' + k, v)
+                          for k, v in kwargs.items()):
+            return None
+        return self._canvas.itemconfig(elem._elem_id, **kwargs)
+
+    def _itemcget(self, elem, config):
+        self.flush()
+        return self._canvas.itemcget(elem._elem_id, config)
 
     def _bbox(self, elem):
+        self.flush()
         return self._canvas.bbox(elem._elem_id)
 
     def _tag_lower(self, bottom_elem, top_elem):
-        self._canvas.tag_lower(bottom_elem._elem_id, top_elem._elem_id)
+        if not self._record(None, 'lower', bottom_elem._elem_id,
+                            top_elem._elem_id):
+            self._canvas.tag_lower(bottom_elem._elem_id, top_elem._elem_id)
+
+    def _add_tag(self, elem, tag):
+        if not self._record(None, 'addtag', tag, 'withtag', elem._elem_id):
+            self._canvas.addtag_withtag(tag, elem._elem_id)
+
+    def _remove_tag(self, elem, tag):
+        if not self._record(None, 'dtag', elem._elem_id, tag):
+            self._canvas.dtag(elem._elem_id, tag)
 
     def _hide(self, elem):
-        self._canvas.itemconfig(elem._elem_id, state='hidden')
+        self._itemconfig(elem, state='hidden')
 
     def _show(self, elem):
-        self._canvas.itemconfig(elem._elem_id, state='normal')
+        self._itemconfig(elem, state='normal')
 
     def _set_fill(self, elem, fill):
-        self._canvas.itemconfig(elem._elem_id, fill=fill)
+        self._itemconfig(elem, fill=fill)
 
     def _coords(self, elem, *args):
-        self._canvas.coords(elem._elem_id, *args)
+        if not self._record((elem._elem_id, 'coords'), 'coords',
+                            elem._elem_id, *args):
+            self._canvas.coords(elem._elem_id, *args)
 
     def _set_text(self, elem, text):
-        self._canvas.itemconfig(elem._elem_id, text=text)
+        self._itemconfig(elem, text=text)
 
     @staticmethod
     def _vertices_to_args(vertices):
@@ -159,11 +299,27 @@ class Canvas:
         elem_id = self._canvas.create_text((p0.x, p0.y), **kwargs)
         return TextElem(self, elem_id, p0.x, p0.y)
 
+    def add_image(self, x, y, photo, **kwargs):
+        elem_id = self._canvas.create_image((x, y), image=photo.name, **kwargs)
+        return CanvasElem(self, elem_id, x, y)
+
+    def add_photo(self, width, height):
+        return Photo(self._canvas, width, height)
+
     def add_window(self, x, y, widget, **kwargs):
         self._canvas.create_window(x, y, window=widget, **kwargs)
 
+    def find_all(self):
+        self.flush()
+        return self._canvas.find_all()
+
+    def move(self, tag_or_id, dx, dy):
+        if not self._record(None, 'move', tag_or_id, dx, dy):
+            self._canvas.move(tag_or_id, dx, dy)
+
     def delete(self, tag_or_id):
-        self._canvas.delete(tag_or_id)
+        if not self._record(None, 'delete', tag_or_id):
+            self._canvas.delete(tag_or_id)
 
     def delete_elem(self, elem):
         self.delete(elem._elem_id)
@@ -175,6 +331,7 @@ class Canvas:
         return tkinter.Text(self._canvas, **kwargs)
 
     def register_handler(self, event_type, handler):
+        self.handlers[event_type] = handler
         self._canvas.bind(event_type, handler)
 
 
@@ -185,7 +342,8 @@ class TKBase:
             ctypes.windll.shcore.SetProcessDpiAwareness(1)
         except AttributeError:
             pass
-        self._root = tkinter.Tk()
+        self._root    = tkinter.Tk()
+        self.handlers = {}
 
         # Windows hack #2.
         self._root.tk.call('tk', 'scaling', 1.0)
@@ -199,17 +357,33 @@ class TKBase:
         h, x, y = g.split('+')
         return int(x), int(y), int(w), int(h)
 
+    def add_font(self, **kwargs):
+        return tkinter.font.Font(root=self._root, **kwargs)
+
+    def named_font(self, name):
+        return tkinter.font.nametofont(name, root=self._root)
+
     def mainloop(self):
         self._root.mainloop()
 
+    def after(self, ms, callback):
+        return self._root.after(ms, callback)
+
+    def after_idle(self, callback):
+        return self._root.after_idle(callback)
+
+    def after_cancel(self, timer_id):
+        self._root.after_cancel(timer_id)
+
     def add_canvas(self, width, height, column=0, row=0, sticky=None,
-                   _cls=Canvas):
+                   _cls=Canvas, **kwargs):
         c = tkinter.Canvas(self._root, bd=0, highlightthickness=0, width=width,
-                           height=height)
+                           height=height, **kwargs)
         c.grid(column=column, row=row, sticky=sticky)
         return _cls(self, c, width, height)
 
     def register_handler(self, event_type, handler):
+        self.handlers[event_type] = handler
         self._root.bind(event_type, handler)
 
     def register_mouse_handler(self, event_type, handler):
@@ -0,0 +1,47 @@
+'''
+Caching of font measurements.  Every Font.measure() or Font.metrics() call is
+a round trip into Tcl, and text layout makes one per line of text every time
+the text changes, so a keystroke in a long text elem would otherwise
+re-measure every line of it.  Fonts are identified by name, so a named font
+that is reconfigured must be invalidated.
+'''
+import collections
+
+
+MEASURE_CACHE_SIZE = 64 * 1024
+
+
+class FontCache:
+    '''
+    An LRU cache of the widths of lines of text, keyed by font and line, and
+    a cache of each font's metrics.
+    '''
+    def __init__(self, maxsize=MEASURE_CACHE_SIZE):
+        self.maxsize   = maxsize
+        self._widths   = collections.OrderedDict()
+        self._metrics  = {}
+
+    def measure(self, font, text):
+        key   = (str(font), text)
+        width = self._widths.get(key)
+        if width is not None:
+            self._widths.move_to_end(key)
+            return width
+
+        width = font.measure(text)
+        self._widths[key] = width
+        if len(self._widths) > self.maxsize:
+            self._widths.popitem(last=False)
+        return width
+
+    def metrics(self, font, option):
+        metrics = self._metrics.get(str(font))
+        if metrics is None:
+            metrics = self._metrics[str(font)] = font.metrics()
+        return metrics[option]
+
+    def invalidate(self, font):
+        name = str(font)
+        self._metrics.pop(name, None)
+        for key in [k for k in self._widths if k[0] == name]:
+            del self._widths[key]
@@ -0,0 +1,731 @@
+'''
+A headless stand-in for Tk, for running a Workspace, its tools and its elems
+without an X server: in CI, or at full speed for benchmarking.  Canvas items
+are kept as plain Python data and every canvas operation is counted by type,
+so that a regression that makes an event issue more Tk calls shows up as a
+number rather than as a feeling that things have got sluggish.
+
+The backend is a drop-in replacement at the TKBase and Canvas level: any TKBase
+subclass, such as Workspace, is made headless by headless_class(), which mixes
+the headless TKBase in underneath it, and the canvases it adds are made
+headless in the same way.  Fonts have fixed metrics, with every character
+CHAR_WIDTH times the font's pixel size wide, so text layout is deterministic.
+
+Nothing happens on its own in a headless application.  Events are delivered
+with TKBase.generate(), window manager resizes with TKBase.resize(), and
+callbacks scheduled with after() and after_idle() run when the root's update()
+or mainloop() is called.  Time is virtual: mainloop() runs callbacks in the
+order they are due without waiting for them, and returns once there are none
+left.
+'''
+import collections
+import itertools
+import math
+import re
+
+from . import elems
+
+
+SCREEN_WIDTH  = 1920
+SCREEN_HEIGHT = 1080
+
+# Font metrics, as fractions of a font's size in pixels.  Tk scaling is 1.0 in
+# TKBase so points and pixels are the same thing.
+CHAR_WIDTH = 0.6
+ASCENT     = 0.8
+DESCENT    = 0.25
+
+DEFAULT_FONT = ('Headless', -12)
+
+_FONT_SPEC_RE = re.compile(r'^\{([^}]*)\}\s+(-?\d+)')
+
+
+class Event:
+    '''
+    A Tk event; unset fields have the values Tk gives fields that don't apply
+    to the event type.
+    '''
+    def __init__(self, widget, **kwargs):
+        self.widget = widget
+        self.x      = 0
+        self.y      = 0
+        self.state  = 0
+        self.keysym = '??'
+        self.char   = ''
+        self.width  = 0
+        self.height = 0
+        self.num    = '??'
+        self.delta  = 0
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+class Font:
+    '''
+    A font with fixed metrics.  Negative sizes are in pixels and positive ones
+    in points, which are the same thing at Tk scaling 1.0.
+    '''
+    _names = itertools.count(1)
+
+    def __init__(self, root=None, family=DEFAULT_FONT[0], size=DEFAULT_FONT[1],
+                 weight='normal', slant='roman', name=None, **_kwargs):
+        self.root    = root
+        self.name    = name or 'font%u' % next(Font._names)
+        self.family  = family
+        self.size    = size
+        self.weight  = weight
+        self.slant   = slant
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def pixels(self):
+        return abs(self.size)
+
+    def actual(self, option=None):
+        a = {'family'     : self.family,
+             'size'       : self.size,
+             'weight'     : self.weight,
+             'slant'      : self.slant,
+             'underline'  : 0,
+             'overstrike' : 0,
+             }
+        return a[option] if option is not None else a
+
+    def measure(self, text):
+        return math.ceil(self.pixels * CHAR_WIDTH) * len(text)
+
+    def metrics(self, *options):
+        ascent  = math.ceil(self.pixels * ASCENT)
+        descent = math.ceil(self.pixels * DESCENT)
+        m = {'ascent'    : ascent,
+             'descent'   : descent,
+             'linespace' : ascent + descent,
+             'fixed'     : 1,
+             }
+        if len(options) == 1:
+            return m[options[0]]
+        return {o: m[o] for o in options} if options else m
+
+
+class Widget:
+    '''
+    Base class for the headless widgets: event bindings and configuration
+    options.
+    '''
+    def __init__(self, root, **kwargs):
+        self.root      = root if root is not None else self
+        self.binds     = {}
+        self.options   = dict(kwargs)
+        self.destroyed = False
+
+    def bind(self, sequence, handler):
+        self.binds[sequence] = handler
+
+    def configure(self, **kwargs):
+        self.options.update(kwargs)
+
+    config = configure
+
+    def cget(self, option):
+        return self.options[option]
+
+    def focus_set(self):
+        self.root.set_focus(self)
+
+    def destroy(self):
+        self.destroyed = True
+        if self.root.focus_widget is self:
+            self.root.set_focus(None)
+
+
+class Root(Widget):
+    '''
+    The application's toplevel window, which also owns the after() queue and
+    the named fonts.
+    '''
+    def __init__(self):
+        super().__init__(None)
+        self.focus_widget   = None
+        self.time           = 0
+        self.fonts          = {'TkDefaultFont' : Font(self,
+                                                      name='TkDefaultFont')}
+        self.images         = {}
+        self.column_weights = {}
+        self.row_weights    = {}
+        self.min_size       = (1, 1)
+        self.children       = []
+        self._geometry      = (200, 200, 0, 0)
+        self._afters        = {}
+        self._after_seq     = itertools.count()
+
+    def set_focus(self, widget):
+        self.focus_widget = widget
+
+    @staticmethod
+    def winfo_screenwidth():
+        return SCREEN_WIDTH
+
+    @staticmethod
+    def winfo_screenheight():
+        return SCREEN_HEIGHT
+
+    def geometry(self, new_geometry=None):
+        if new_geometry is None:
+            return '%ux%u+%d+%d' % self._geometry
+        size, x, y = new_geometry.split('+')
+        w, h       = size.split('x')
+        self._geometry = (int(w), int(h), int(x), int(y))
+        return ''
+
+    def columnconfigure(self, index, weight=0):
+        self.column_weights[index] = weight
+
+    def rowconfigure(self, index, weight=0):
+        self.row_weights[index] = weight
+
+    def minsize(self, width, height):
+        self.min_size = (width, height)
+
+    def after(self, ms, callback):
+        seq    = next(self._after_seq)
+        name   = 'after#%u' % seq
+        self._afters[name] = (self.time + ms, seq, callback)
+        return name
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, name):
+        self._afters.pop(name, None)
+
+    def _pop_due(self, t):
+        due = [(when, seq, name) for name, (when, seq, _)
+               in self._afters.items() if when <= t]
+        if not due:
+            return None
+        _, _, name = min(due)
+        return self._afters.pop(name)[2]
+
+    def update(self):
+        '''
+        Runs every callback that is due at the current virtual time, including
+        ones scheduled by those callbacks.
+        '''
+        callback = self._pop_due(self.time)
+        while callback is not None:
+            callback()
+            callback = self._pop_due(self.time)
+
+    def mainloop(self):
+        '''
+        Advances virtual time from callback to callback until none are left.
+        '''
+        self.update()
+        while self._afters:
+            self.time = min(when for when, _, _ in self._afters.values())
+            self.update()
+
+
+class Entry(Widget):
+    def __init__(self, root, **kwargs):
+        super().__init__(root, **kwargs)
+        self.text = ''
+
+    def get(self):
+        return self.text
+
+    def insert(self, index, text):
+        i = len(self.text) if index == 'end' else int(index)
+        self.text = self.text[:i] + text + self.text[i:]
+
+    def delete(self, first, last=None):
+        i = len(self.text) if first == 'end' else int(first)
+        if last is None:
+            j = i + 1
+        else:
+            j = len(self.text) if last == 'end' else int(last)
+        self.text = self.text[:i] + self.text[j:]
+
+
+class Text(Widget):
+    '''
+    A multi-line text widget.  As in Tk, the text always ends in a newline
+    that can't be deleted, and <<Modified>> is delivered at idle time when the
+    modified flag becomes set.
+    '''
+    def __init__(self, root, **kwargs):
+        super().__init__(root, **kwargs)
+        self.text      = ''
+        self._modified = False
+
+    def _index(self, index):
+        if index == 'end':
+            return len(self.text)
+        line, col = index.split('.')
+        lines     = self.text.split('\n')
+        line      = min(int(line), len(lines))
+        offset    = sum(len(l) + 1 for l in lines[:line - 1])
+        return min(offset + int(col), offset + len(lines[line - 1]))
+
+    def _handle_modified(self):
+        handler = self.binds.get('<<Modified>>')
+        if handler is not None and not self.destroyed:
+            handler(Event(self))
+
+    def _set_modified(self):
+        if not self._modified:
+            self._modified = True
+            self.root.after_idle(self._handle_modified)
+
+    def get(self, start, end=None):
+        i = self._index(start)
+        if end is None:
+            return (self.text + '\n')[i]
+        text = self.text[i:self._index(end)]
+        return text + '\n' if end == 'end' else text
+
+    def insert(self, index, text):
+        i         = self._index(index)
+        self.text = self.text[:i] + text + self.text[i:]
+        self._set_modified()
+
+    def delete(self, start, end=None):
+        i = self._index(start)
+        j = self._index(end) if end is not None else i + 1
+        self.text = self.text[:i] + self.text[j:]
+        self._set_modified()
+
+    def replace(self, start, end, text):
+        i         = self._index(start)
+        self.text = self.text[:i] + text + self.text[self._index(end):]
+        self._set_modified()
+
+    def edit_modified(self, flag=None):
+        if flag is None:
+            return self._modified
+        self._modified = bool(flag)
+        return None
+
+
+class Photo:
+    '''
+    A photo image of the given size.  Pixels aren't stored; fill() and copy()
+    are only counted.
+    '''
+    def __init__(self, master, width, height):
+        self._master = master
+        self.width   = width
+        self.height  = height
+        self.name    = 'image%u' % len(master.root.images)
+        master.root.images[self.name] = self
+
+    def fill(self, _color, _x0, _y0, _x1, _y1):
+        self._master.ops['photo_put'] += 1
+
+    def copy(self, _src, _to):
+        self._master.ops['photo_copy'] += 1
+
+
+class Item:
+    '''
+    A canvas item.
+    '''
+    def __init__(self, item_type, coords, options):
+        self.type    = item_type
+        self.coords  = coords
+        self.tags    = set()
+        self.options = {}
+        self.configure(options)
+
+    def configure(self, options):
+        for k, v in options.items():
+            if k == 'tags':
+                self.tags = set(v.split() if isinstance(v, str) else v)
+            else:
+                self.options[k] = v
+
+    def cget(self, option):
+        if option == 'tags':
+            return ' '.join(sorted(self.tags))
+        return self.options.get(option, '')
+
+
+def _flatten(args):
+    coords = []
+    for a in args:
+        if isinstance(a, (list, tuple)):
+            coords.extend(_flatten(a))
+        else:
+            coords.append(float(a))
+    return coords
+
+
+def _anchor_offset(anchor, w, h):
+    '''
+    Returns the offset of the top left of a w by h box from its anchor point.
+    '''
+    if anchor in ('c', 'center'):
+        return -w / 2, -h / 2
+    dx = 0 if 'w' in anchor else -w if 'e' in anchor else -w / 2
+    dy = 0 if 'n' in anchor else -h if 's' in anchor else -h / 2
+    return dx, dy
+
+
+class CanvasWidget(Widget):
+    '''
+    A canvas widget holding its items as Item objects in stacking order.  The
+    ops Counter counts every widget command issued, by command name; the
+    commands flushed from a batch are counted individually, and each flush is
+    also counted as a 'script'.
+    '''
+    # A stand-in for tkinter.Canvas has to offer the same commands.
+    # pylint: disable=too-many-public-methods
+
+    def __init__(self, root, width, height, **kwargs):
+        super().__init__(root, **kwargs)
+        self.req_width   = width
+        self.req_height  = height
+        self.width       = width
+        self.height      = height
+        self.grid_info   = {}
+        self.items       = collections.OrderedDict()
+        self.ops         = collections.Counter()
+        self._ids        = itertools.count(1)
+        root.children.append(self)
+
+    def grid(self, column=0, row=0, sticky=None):
+        self.grid_info = {'column': column, 'row': row, 'sticky': sticky or ''}
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def _ids_of(self, tag_or_id):
+        if isinstance(tag_or_id, int) or tag_or_id.isdigit():
+            i = int(tag_or_id)
+            return [i] if i in self.items else []
+        if tag_or_id == 'all':
+            return list(self.items)
+        return [i for i, item in self.items.items() if tag_or_id in item.tags]
+
+    def _create(self, item_type, args, options):
+        self.ops['create_' + item_type] += 1
+        i = next(self._ids)
+        self.items[i] = Item(item_type, _flatten(args), options)
+        return i
+
+    def create_line(self, *args, **kwargs):
+        return self._create('line', args, kwargs)
+
+    def create_rectangle(self, *args, **kwargs):
+        return self._create('rectangle', args, kwargs)
+
+    def create_polygon(self, *args, **kwargs):
+        return self._create('polygon', args, kwargs)
+
+    def create_oval(self, *args, **kwargs):
+        return self._create('oval', args, kwargs)
+
+    def create_text(self, *args, **kwargs):
+        return self._create('text', args, kwargs)
+
+    def create_image(self, *args, **kwargs):
+        return self._create('image', args, kwargs)
+
+    def create_window(self, *args, **kwargs):
+        return self._create('window', args, kwargs)
+
+    def coords(self, tag_or_id, *args):
+        self.ops['coords'] += 1
+        ids = self._ids_of(tag_or_id)
+        if not args:
+            return list(self.items[ids[0]].coords) if ids else []
+        if ids:
+            self.items[ids[0]].coords = _flatten(args)
+        return None
+
+    def itemconfigure(self, tag_or_id, **kwargs):
+        self.ops['itemconfigure'] += 1
+        for i in self._ids_of(tag_or_id):
+            self.items[i].configure(kwargs)
+
+    itemconfig = itemconfigure
+
+    def itemcget(self, tag_or_id, option):
+        self.ops['itemcget'] += 1
+        ids = self._ids_of(tag_or_id)
+        return self.items[ids[0]].cget(option) if ids else ''
+
+    def gettags(self, tag_or_id):
+        ids = self._ids_of(tag_or_id)
+        return tuple(sorted(self.items[ids[0]].tags)) if ids else ()
+
+    def find_all(self):
+        self.ops['find_all'] += 1
+        return tuple(self.items)
+
+    def find_withtag(self, tag_or_id):
+        self.ops['find_withtag'] += 1
+        return tuple(self._ids_of(tag_or_id))
+
+    def move(self, tag_or_id, dx, dy):
+        self.ops['move'] += 1
+        for i in self._ids_of(tag_or_id):
+            c = self.items[i].coords
+            for j in range(0, len(c), 2):
+                c[j]     += dx
+                c[j + 1] += dy
+
+    def delete(self, *tags_or_ids):
+        self.ops['delete'] += 1
+        for tag_or_id in tags_or_ids:
+            for i in self._ids_of(tag_or_id):
+                del self.items[i]
+
+    def addtag_withtag(self, new_tag, tag_or_id):
+        self.ops['addtag'] += 1
+        for i in self._ids_of(tag_or_id):
+            self.items[i].tags.add(new_tag)
+
+    def dtag(self, tag_or_id, tag=None):
+        self.ops['dtag'] += 1
+        tag = tag_or_id if tag is None else tag
+        for i in self._ids_of(tag_or_id):
+            self.items[i].tags.discard(tag)
+
+    def tag_lower(self, tag_or_id, below=None):
+        self.ops['lower'] += 1
+        ids = self._ids_of(tag_or_id)
+        if below is None:
+            order = ids + [i for i in self.items if i not in ids]
+        else:
+            target = self._ids_of(below)
+            if not target:
+                return
+            order = []
+            for i in self.items:
+                if i == target[0]:
+                    order.extend(ids)
+                if i not in ids:
+                    order.append(i)
+        self.items = collections.OrderedDict((i, self.items[i]) for i in order)
+
+    def _font(self, font):
+        if isinstance(font, Font):
+            return font
+        if font in self.root.fonts:
+            return self.root.fonts[font]
+        m = _FONT_SPEC_RE.match(font or '')
+        if m:
+            return Font(self.root, family=m.group(1), size=int(m.group(2)))
+        return self.root.fonts['TkDefaultFont']
+
+    def _item_bbox(self, item):
+        c = item.coords
+        if item.type in ('text', 'image', 'window'):
+            o = item.options
+            if item.type == 'text':
+                font  = self._font(o.get('font'))
+                lines = str(o.get('text', '')).split('\n')
+                w     = max(font.measure(l) for l in lines)
+                h     = font.metrics('linespace') * len(lines)
+            elif item.type == 'image':
+                photo = self.root.images.get(o.get('image'))
+                w, h  = (photo.width, photo.height) if photo else (0, 0)
+            else:
+                w, h = o.get('width', 0), o.get('height', 0)
+            dx, dy = _anchor_offset(o.get('anchor', 'center'), w, h)
+            return (c[0] + dx, c[1] + dy, c[0] + dx + w, c[1] + dy + h)
+
+        xs   = c[0::2]
+        ys   = c[1::2]
+        half = float(item.options.get('width', 1)) / 2
+        return (min(xs) - half, min(ys) - half, max(xs) + half,
+                max(ys) + half)
+
+    def bbox(self, *tags_or_ids):
+        '''
+        Returns the integer bounding box of the matching items that aren't
+        hidden, or None if there are none.  Like Tk's, it is approximate,
+        erring on the large side.
+        '''
+        self.ops['bbox'] += 1
+        boxes = [self._item_bbox(self.items[i])
+                 for tag_or_id in tags_or_ids
+                 for i in self._ids_of(tag_or_id)
+                 if self.items[i].options.get('state') != 'hidden']
+        if not boxes:
+            return None
+        return (math.floor(min(b[0] for b in boxes)),
+                math.floor(min(b[1] for b in boxes)),
+                math.ceil(max(b[2] for b in boxes)),
+                math.ceil(max(b[3] for b in boxes)))
+
+    def call(self, command, *args):
+        '''
+        Issues a canvas widget command encoded by a batch.  The methods are
+        called through the class so that any wrappers installed on the
+        instance, such as stats' call counters, see the whole batch as a
+        single call as they would in Tk.
+        '''
+        cls = CanvasWidget
+        if command == 'itemconfigure':
+            cls.itemconfigure(self, args[0],
+                              **{args[i][1:]: args[i + 1]
+                                 for i in range(1, len(args), 2)})
+        elif command == 'coords':
+            cls.coords(self, args[0], *args[1:])
+        elif command == 'lower':
+            cls.tag_lower(self, *args)
+        elif command == 'addtag':
+            assert args[1] == 'withtag'
+            cls.addtag_withtag(self, args[0], args[2])
+        elif command == 'dtag':
+            cls.dtag(self, *args)
+        elif command == 'move':
+            cls.move(self, *args)
+        elif command == 'delete':
+            cls.delete(self, *args)
+        else:
+            raise ValueError('Unsupported batched command %s.' % command)
+
+
+class Canvas(elems.Canvas):
+    '''
+    A Canvas over a headless CanvasWidget.  Batched operations are recorded as
+    tuples rather than Tcl command lines.
+    '''
+    def _encode(self, args):
+        return args
+
+    def _run(self, ops):
+        self._canvas.ops['script'] += 1
+        for args in ops:
+            self._canvas.call(*args)
+
+    def add_photo(self, width, height):
+        return Photo(self._canvas, width, height)
+
+    def add_entry(self, **kwargs):
+        return Entry(self._canvas.root, **kwargs)
+
+    def add_multiline_entry(self, **kwargs):
+        return Text(self._canvas.root, **kwargs)
+
+
+_classes = {}
+
+
+def _mixin(cls, base):
+    '''
+    Returns a subclass of cls with the headless base mixed in underneath it,
+    so that base's overrides of its real counterpart take effect.
+    '''
+    if issubclass(cls, base):
+        return cls
+    if issubclass(base, cls):
+        return base
+    c = _classes.get((cls, base))
+    if c is None:
+        c = type('Headless' + cls.__name__, (cls, base), {})
+        _classes[(cls, base)] = c
+    return c
+
+
+class TKBase(elems.TKBase):
+    '''
+    A TKBase over a headless Root.
+    '''
+    def __init__(self):
+        # pylint: disable=super-init-not-called
+        self._root    = Root()
+        self.handlers = {}
+
+    @property
+    def canvases(self):
+        return [c for c in self._root.children if isinstance(c, CanvasWidget)]
+
+    def op_counts(self):
+        '''
+        Returns a Counter of the operations issued to all canvases.
+        '''
+        counts = collections.Counter()
+        for c in self.canvases:
+            counts.update(c.ops)
+        return counts
+
+    def reset_op_counts(self):
+        for c in self.canvases:
+            c.ops.clear()
+
+    def add_font(self, **kwargs):
+        return Font(self._root, **kwargs)
+
+    def named_font(self, name):
+        font = self._root.fonts.get(name)
+        if font is None:
+            raise ValueError('No font named %s.' % name)
+        return font
+
+    def add_canvas(self, width, height, column=0, row=0, sticky=None,
+                   _cls=elems.Canvas, **kwargs):
+        c = CanvasWidget(self._root, width, height, **kwargs)
+        c.grid(column=column, row=row, sticky=sticky)
+        return _mixin(_cls, Canvas)(self, c, width, height)
+
+    def generate(self, widget, sequence, **kwargs):
+        '''
+        Delivers an event to the widget, which may be a Canvas, and then to
+        the root, as Tk does for the widget's toplevel binding tag.  A widget
+        of None delivers the event to the root alone.
+        '''
+        root   = self._root
+        widget = root if widget is None else getattr(widget, '_canvas', widget)
+        e      = Event(widget, **kwargs)
+        handler = widget.binds.get(sequence)
+        if handler is not None and handler(e) == 'break':
+            return
+        if widget is not root:
+            handler = root.binds.get(sequence)
+            if handler is not None:
+                handler(e)
+
+    def resize(self, width, height):
+        '''
+        Resizes the window as the window manager would, laying the canvases
+        out in their grid and delivering <Configure> events to each of them
+        and then to the root.  Spare width goes to columns with weight and
+        spare height to rows with weight, split evenly.
+        '''
+        root = self._root
+        x, y, _, _ = self.get_geometry()
+        self.set_geometry(x, y, width, height)
+
+        canvases = self.canvases
+        spare_w  = width - sum(c.req_width for c in canvases)
+        cols = [c.grid_info['column'] for c in canvases
+                if root.column_weights.get(c.grid_info['column'])]
+        for c in canvases:
+            info    = c.grid_info
+            sticky  = info['sticky']
+            w, h    = c.req_width, c.req_height
+            if cols and info['column'] in cols and 'e' in sticky and \
+                    'w' in sticky:
+                w += spare_w // len(cols)
+            if root.row_weights.get(info['row']) and 'n' in sticky and \
+                    's' in sticky:
+                h = height
+            c.width, c.height = w, h
+            self.generate(c, '<Configure>', width=w, height=h)
+        self.generate(None, '<Configure>', width=width, height=height)
+
+
+def headless_class(cls):
+    '''
+    Returns a headless version of the TKBase subclass cls.
+    '''
+    return _mixin(cls, TKBase)
@@ -1,14 +1,41 @@
 #!/usr/bin/env python3
+import argparse
+import logging
+
 from .workspace import Workspace
+from . import trace
 
 
-def main():
-    ws = Workspace()
+def main(args):
+    ws = Workspace(path=args.path)
+    if args.record:
+        ws.recorder = trace.Recorder(ws, args.record)
+    if args.stats:
+        ws.stats.enable()
     ws.mainloop()
+    if ws.recorder is not None:
+        ws.recorder.close()
+    if args.stats:
+        ws.stats.export(args.stats)
+    ws.close()
 
 
 def _main():
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?',
+                        help='Drawing to open, or create, with autosave.')
+    parser.add_argument('--record', metavar='TRACE',
+                        help='Record input events to a trace file for '
+                             'replaying with tkdraw-replay.')
+    parser.add_argument('--stats', metavar='PATH',
+                        help='Collect handler latency stats and write them '
+                             'to a JSON file on exit.')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Log every edit made to the document.')
+    args = parser.parse_args()
+    logging.basicConfig(format='%(message)s',
+                        level=logging.DEBUG if args.verbose else logging.INFO)
+    main(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,100 @@
+from .. import geom
+
+
+class HandleMarkers:
+    '''
+    Manages the small square markers drawn on the canvas at the handles of a
+    set of elems.  Creating and deleting canvas items is expensive, so markers
+    that are no longer needed are hidden and kept in a free pool; new markers
+    are taken from the pool and moved into place when possible and only
+    allocated when the pool is empty.
+
+    If a canvas tag is specified, all markers currently in use carry that tag
+    so that they can be moved along with their elems as a group.
+    '''
+    def __init__(self, workspace, size, tag=None, **kwargs):
+        self.workspace = workspace
+        self.R         = geom.Rect.square(size)
+        self.tag       = tag
+        self.kwargs    = kwargs
+        self._markers  = {}
+        self._free     = []
+
+    def __contains__(self, elem):
+        return elem in self._markers
+
+    def __iter__(self):
+        return iter(self._markers)
+
+    def __len__(self):
+        return len(self._markers)
+
+    def _acquire(self, h):
+        if self._free:
+            m = self._free.pop()
+            self.workspace.move_fine_rectangle(m, h, self.R)
+            m.show()
+        else:
+            m = self.workspace.add_fine_rectangle(h, self.R, **self.kwargs)
+        if self.tag is not None:
+            m.add_tag(self.tag)
+        return m
+
+    def _release(self, m):
+        m.hide()
+        if self.tag is not None:
+            m.remove_tag(self.tag)
+        self._free.append(m)
+
+    def add_elem(self, elem):
+        '''
+        Adds markers for all of the elem's handles.
+        '''
+        assert elem not in self._markers
+        self._markers[elem] = [self._acquire(h) for h in elem.handles]
+
+    def remove_elem(self, elem):
+        '''
+        Removes the markers for the elem, returning them to the pool.
+        '''
+        for m in self._markers.pop(elem):
+            self._release(m)
+
+    def update_elem(self, elem):
+        '''
+        Moves the elem's markers to follow its current handle positions.
+        '''
+        markers = self._markers[elem]
+        while len(markers) > len(elem.handles):
+            self._release(markers.pop())
+        for m, h in zip(markers, elem.handles):
+            self.workspace.move_fine_rectangle(m, h, self.R)
+        for h in elem.handles[len(markers):]:
+            markers.append(self._acquire(h))
+
+    def update_all(self):
+        '''
+        Moves all markers to follow their elems' current handle positions.
+        '''
+        for elem in self._markers:
+            self.update_elem(elem)
+
+    def set_elems(self, elems):
+        '''
+        Changes the set of marked elems to elems, only touching the markers of
+        elems that were added or removed.
+        '''
+        for elem in [e for e in self._markers if e not in elems]:
+            self.remove_elem(elem)
+        for elem in elems:
+            if elem not in self._markers:
+                self.add_elem(elem)
+
+    def clear(self):
+        '''
+        Removes all markers, returning them to the pool.
+        '''
+        for markers in self._markers.values():
+            for m in markers:
+                self._release(m)
+        self._markers.clear()
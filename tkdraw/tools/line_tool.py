@@ -6,6 +6,13 @@ from ..inspectors import CoordinatesInspector
 from .. import geom
 
 
+# Mouse positions within this many canvas pixels of a line's endpoint,
+# midpoint or body snap to it.
+SNAP_PIXELS = 8
+
+SNAP_MARKER_SIZE = 8
+
+
 class State(Enum):
     IDLE         = 0
     DRAG_STARTED = 1
@@ -22,10 +29,39 @@ class LineTool(Tool):
                 R.p0 + geom.Vec(10, 10), R.p1 - geom.Vec(10, 10))
 
         self.coordinates_inspector = None
+        self.snap_marker           = None
+        self.snap_marker_R         = geom.Rect.square(SNAP_MARKER_SIZE)
+
+    def _snap(self, p):
+        '''
+        Returns the point to use for the mouse point p: the nearest endpoint,
+        midpoint or point on a line within SNAP_PIXELS of the mouse if there
+        is one, otherwise the grid point.  A marker is shown at the point
+        snapped to.
+        '''
+        ws     = self.workspace
+        P, _   = ws.doc.find_snap_point(geom.Vec(p.ex, p.ey),
+                                        SNAP_PIXELS / ws.view.scale, p)
+        if P is None:
+            self._hide_snap_marker()
+            return p
+
+        if self.snap_marker is None:
+            self.snap_marker = ws.add_fine_rectangle(P, self.snap_marker_R,
+                                                     outline='red')
+        else:
+            ws.move_fine_rectangle(self.snap_marker, P, self.snap_marker_R)
+            self.snap_marker.show()
+        return P
+
+    def _hide_snap_marker(self):
+        if self.snap_marker is not None:
+            self.snap_marker.hide()
 
     def _go_idle(self):
         if self.state == State.DRAG_STARTED:
-            self.workspace.delete_canvas_elem(self.line_elem.tk_elem)
+            if self.line_elem.tk_elem is not None:
+                self.workspace.renderer.detach(self.line_elem)
             self.line_elem = None
             self.state     = State.IDLE
 
@@ -45,12 +81,14 @@ class LineTool(Tool):
     def handle_tool_deselected(self):
         self.icon_border.configure(outline='#CCCCCC')
         self._go_idle()
+        self._hide_snap_marker()
 
     def handle_canvas_entered(self, p):
         self.workspace._root.configure(cursor='tcross')
 
     def handle_canvas_exited(self):
         self.workspace._root.configure(cursor='arrow')
+        self._hide_snap_marker()
 
     def handle_key_pressed(self, e):
         if self.state == State.DRAG_STARTED:
@@ -59,7 +97,9 @@ class LineTool(Tool):
 
     def handle_mouse_down(self, p):
         assert self.state == State.IDLE
+        p = self._snap(p)
         self.line_elem = LineElem(self.workspace, p, p)
+        self.workspace.renderer.attach(self.line_elem)
         self.state     = State.DRAG_STARTED
         self.coordinates_inspector.set_coord(0, p)
         self.coordinates_inspector.set_coord(1, p)
@@ -77,6 +117,7 @@ class LineTool(Tool):
             self.state     = State.IDLE
 
     def handle_mouse_moved(self, p):
+        p = self._snap(p)
         if self.state == State.IDLE:
             self.coordinates_inspector.set_coord(0, p)
         elif self.state == State.DRAG_STARTED:
@@ -85,3 +126,15 @@ class LineTool(Tool):
 
     def handle_elem_handles_changed(self, _elem, _handles):
         pass
+
+    def handle_elems_translated(self, _elems, _dv, _tag):
+        pass
+
+    def handle_elems_deleted(self, _elems):
+        pass
+
+    def handle_view_changed(self):
+        self._hide_snap_marker()
+
+    def is_idle(self):
+        return self.state == State.IDLE
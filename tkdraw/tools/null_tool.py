@@ -36,3 +36,15 @@ class NullTool(Tool):
 
     def handle_elem_handles_changed(self, _elem, _handles):
         pass
+
+    def handle_elems_translated(self, _elems, _dv, _tag):
+        pass
+
+    def handle_elems_deleted(self, _elems):
+        pass
+
+    def handle_view_changed(self):
+        pass
+
+    def is_idle(self):
+        return True
@@ -2,9 +2,9 @@ import math
 from enum import Enum
 
 from .tool import Tool
+from .handle_markers import HandleMarkers
 from .. import geom
 from .. import icons
-from .. import coords
 
 
 ARROW_DV = {
@@ -15,6 +15,9 @@ ARROW_DV = {
 }
 
 
+SELECTION_TAG = 'selection'
+
+
 class State(Enum):
     IDLE                = 0
     DRAG_ELEM_STARTED   = 1  # Clicked on an elem and dragging
@@ -29,9 +32,10 @@ class SelectionTool(Tool):
         super().__init__(workspace, R, *args, **kwargs)
         self.state            = State.IDLE
         self.nearest_elem     = None
-        self.nearest_points   = []
+        self.nearest_points   = HandleMarkers(workspace, 6)
         self.selected_elems   = set()
-        self.selected_points  = []
+        self.selected_points  = HandleMarkers(workspace, 4, tag=SELECTION_TAG,
+                                              fill='black')
         self.last_mouse_point = None
 
         self.drag_p0          = None
@@ -44,57 +48,36 @@ class SelectionTool(Tool):
         self.select_rect        = None
         self.select_rect_elem   = None
         self.select_rect_elems  = set()
-        self.select_rect_points = []
+        self.select_rect_points = HandleMarkers(workspace, 4, fill='black')
 
         workspace.tool_canvas.add_poly(icons.arrow.get_vertices(R),
                                        fill='black')
 
-    def _add_handle_points(self, elems_set, points_list):
-        R = geom.Rect.square(4)
-        for se in elems_set:
-            for h in se.handles:
-                points_list.append(self.workspace.add_fine_rectangle(
-                    h, R, fill='black'))
-
-    def _remove_handle_points(self, points_list):
-        for p in points_list:
-            self.workspace.delete_canvas_elem(p)
-        points_list.clear()
-
-    def _add_selected_points(self):
-        self._add_handle_points(self.selected_elems, self.selected_points)
-
     def _remove_selected_points(self):
-        self._remove_handle_points(self.selected_points)
+        self.selected_points.clear()
 
     def _update_selected_points(self):
-        self._remove_selected_points()
-        self._add_selected_points()
+        self.selected_points.set_elems(self.selected_elems)
 
-    def _add_select_rect_points(self):
-        self._add_handle_points(self.select_rect_elems, self.select_rect_points)
+    def _add_select_rect_elem(self, e):
+        self.select_rect_elems.add(e)
+        self.select_rect_points.add_elem(e)
 
-    def _remove_select_rect_points(self):
-        self._remove_handle_points(self.select_rect_points)
+    def _remove_select_rect_elem(self, e):
+        self.select_rect_elems.discard(e)
+        self.select_rect_points.remove_elem(e)
 
-    def _update_select_rect_points(self):
-        self._remove_select_rect_points()
-        self._add_select_rect_points()
+    def _remove_select_rect_points(self):
+        self.select_rect_points.clear()
 
     def _add_nearest_points(self, p):
-        if not self.workspace.doc.elems:
+        if not self.workspace.doc:
             return
 
-        nearest_elem, _, nearest_nn = self._find_nearby_handle(p)
+        nearest_elem, _, _ = self._find_nearby_handle(p)
         if nearest_elem is None:
-            for e in self.workspace.doc.elems:
-                v  = geom.Vec(p.ex, p.ey)
-                dv = e.nearest_point(v) - v
-                nn = dv.norm_squared()
-                if nn > e.NN_SLOP:
-                    continue
-                if nearest_elem is None or nn < nearest_nn:
-                    nearest_elem, nearest_nn = e, nn
+            nearest_elem = self.workspace.doc.find_nearest_elem(
+                    geom.Vec(p.ex, p.ey))
 
         if nearest_elem is None:
             self._remove_nearest_points()
@@ -104,14 +87,11 @@ class SelectionTool(Tool):
         if nearest_elem == self.nearest_elem:
             return
 
-        self._remove_nearest_points()
         self.nearest_elem = nearest_elem
-        R = geom.Rect.square(6)
-        for h in self.nearest_elem.handles:
-            self.nearest_points.append(self.workspace.add_fine_rectangle(h, R))
+        self.nearest_points.set_elems([nearest_elem])
 
     def _remove_nearest_points(self):
-        self._remove_handle_points(self.nearest_points)
+        self.nearest_points.clear()
 
     def _find_nearby_handle(self, p):
         '''
@@ -131,17 +111,17 @@ class SelectionTool(Tool):
                 if not nearest_elem or nn < nearest_nn:
                     nearest_elem, nearest_handle, nearest_nn = se, hi, nn
         if nearest_elem is not None:
-            if coords.grid_to_canvas_delta(math.sqrt(nearest_nn)) <= 6:
+            view = self.workspace.view
+            if view.grid_to_canvas_delta(math.sqrt(nearest_nn)) <= 6:
                 return nearest_elem, nearest_handle, nearest_nn
         return None, None, None
 
-    @staticmethod
-    def _translate_elems(elems, dv):
-        if not dv:
+    def _translate_selection(self, dv):
+        if not dv or not self.selected_elems:
             return
 
-        for e in elems:
-            e.translate(dv)
+        self.workspace.editor.translate_elems(self.selected_elems, dv,
+                                              SELECTION_TAG)
 
     def _start_drag_elem(self, p):
         assert self.state == State.IDLE
@@ -165,6 +145,30 @@ class SelectionTool(Tool):
         self.select_rect      = geom.Rect(p, p)
         self.select_rect_elem = self.workspace.add_rectangle(
                 self.select_rect, outline='gray')
+        for e in self.workspace.doc.find_elems_in_rect(self.select_rect):
+            self._add_select_rect_elem(e)
+
+    def _update_selection_rect(self, p):
+        '''
+        Moves the free corner of the selection rectangle to p.  Only elems
+        that touch the region swept between the old and new rectangles can
+        have changed state, so we only query and update those.
+        '''
+        R0               = self.select_rect
+        R1               = geom.Rect(R0.p0, p)
+        self.select_rect = R1
+        self.workspace.resize_rectangle(self.select_rect_elem, R1)
+
+        doc   = self.workspace.doc
+        elems = set()
+        for R in R0.difference(R1) + R1.difference(R0):
+            elems.update(doc.find_elems_in_rect(R))
+        for e in elems:
+            if e.overlaps_rect(R1):
+                if e not in self.select_rect_elems:
+                    self._add_select_rect_elem(e)
+            elif e in self.select_rect_elems:
+                self._remove_select_rect_elem(e)
 
     def _stop_selection_rect(self):
         assert self.state == State.RECT_STARTED
@@ -181,6 +185,8 @@ class SelectionTool(Tool):
         if self.selected_elems:
             self.workspace.inspect_canvas.clear()
 
+        elems = set(elems).difference(self.selected_elems)
+        self.workspace.renderer.tag_elems(elems, SELECTION_TAG)
         self.selected_elems.update(elems)
 
         if len(self.selected_elems) == 1:
@@ -196,6 +202,8 @@ class SelectionTool(Tool):
         if not elems:
             return
 
+        elems = self.selected_elems.intersection(elems)
+        self.workspace.renderer.untag_elems(elems, SELECTION_TAG)
         self.selected_elems.difference_update(elems)
 
         if not self.selected_elems:
@@ -243,12 +251,16 @@ class SelectionTool(Tool):
     def handle_key_pressed(self, e):
         dv = ARROW_DV.get(e.keysym)
         if dv is not None:
-            self._translate_elems(self.selected_elems, dv)
-            self.workspace.doc.elems_translated(self.selected_elems, dv)
+            if self.selected_elems:
+                self._translate_selection(dv)
+                self.workspace.doc.elems_translated(self.selected_elems, dv,
+                                                    nudge=True)
         elif e.keysym == 'Escape':
             self.handle_esc_pressed()
         elif e.keysym == 'BackSpace':
             self.handle_backspace_pressed()
+        elif e.char == 'c':
+            self.handle_select_connected()
 
     def handle_esc_pressed(self):
         if self.state == State.IDLE:
@@ -256,7 +268,7 @@ class SelectionTool(Tool):
             self._selection_clear()
         elif self.state == State.DRAG_ELEM_STARTED:
             dv = self.drag_p0 - self.drag_p1
-            self._translate_elems(self.selected_elems, dv)
+            self._translate_selection(dv)
             self.drag_p0 = None
             self.drag_p1 = None
             self.state   = State.IDLE
@@ -271,17 +283,24 @@ class SelectionTool(Tool):
         elif self.state == State.RECT_STARTED:
             self._stop_selection_rect()
 
+    def handle_select_connected(self):
+        '''
+        Extends the selection to every elem connected to it.
+        '''
+        if self.state != State.IDLE or not self.selected_elems:
+            return
+
+        doc = self.workspace.doc
+        self._selection_add_elems(doc.find_connected_elems(self.selected_elems))
+        self._update_selected_points()
+
     def handle_backspace_pressed(self):
         self._remove_selected_points()
         self._remove_nearest_points()
         self.nearest_elem = None
 
         elems = self.selected_elems.union(self.select_rect_elems)
-        for e in elems:
-            self.workspace.delete_canvas_elem(e.tk_elem)
-        self.workspace.doc.elems_delete(elems)
-
-        self._selection_clear()
+        self.workspace.editor.delete_elems(elems)
 
         if self.state == State.DRAG_ELEM_STARTED:
             self.drag_p0 = None
@@ -350,29 +369,54 @@ class SelectionTool(Tool):
         if self.state == State.IDLE:
             self._add_nearest_points(p)
         elif self.state == State.DRAG_ELEM_STARTED:
-            self._translate_elems(self.selected_elems, p - self.drag_p1)
+            self._translate_selection(p - self.drag_p1)
             self.drag_p1 = p
         elif self.state == State.DRAG_HANDLE_STARTED:
             self.drag_handle_elem.drag_handle(self.drag_handle_index, p)
         elif self.state == State.RECT_STARTED:
-            self.select_rect = geom.Rect(self.select_rect.p0, p)
-            self.workspace.delete_canvas_elem(self.select_rect_elem)
-
-            self.select_rect_elem = self.workspace.add_rectangle(
-                    self.select_rect, outline='gray')
+            self._update_selection_rect(p)
 
-            self._remove_select_rect_points()
-            self.select_rect_elems.clear()
-            for e in self.workspace.doc.elems:
-                if e.overlaps_rect(self.select_rect):
-                    self.select_rect_elems.add(e)
-            self._add_select_rect_points()
+    def handle_elem_handles_changed(self, elem, _handles):
+        for markers in (self.selected_points, self.select_rect_points,
+                        self.nearest_points):
+            if elem in markers:
+                markers.update_elem(elem)
+        if self.last_mouse_point:
+            self._add_nearest_points(self.last_mouse_point)
 
-    def handle_elem_handles_changed(self, _elem, _handles):
-        self._update_selected_points()
-        self._update_select_rect_points()
-        if self.nearest_elem:
-            self._remove_nearest_points()
-            self.nearest_elem = None
+    def handle_elems_translated(self, elems, _dv, tag):
+        # If the elems were moved using the selection tag then the selection's
+        # handle markers have already been moved along with them.
+        marker_sets = [self.select_rect_points, self.nearest_points]
+        if tag != SELECTION_TAG:
+            marker_sets.append(self.selected_points)
+        moved = set(elems)
+        for markers in marker_sets:
+            for elem in markers:
+                if elem in moved:
+                    markers.update_elem(elem)
         if self.last_mouse_point:
             self._add_nearest_points(self.last_mouse_point)
+
+    def handle_elems_deleted(self, elems):
+        self._selection_remove_elems(elems)
+        for e in elems:
+            if e in self.selected_points:
+                self.selected_points.remove_elem(e)
+            if e in self.select_rect_elems:
+                self._remove_select_rect_elem(e)
+            if e in self.nearest_points:
+                self.nearest_points.remove_elem(e)
+        if self.nearest_elem in elems:
+            self.nearest_elem = None
+
+    def handle_view_changed(self):
+        for markers in (self.selected_points, self.select_rect_points,
+                        self.nearest_points):
+            markers.update_all()
+        if self.select_rect_elem is not None:
+            self.workspace.resize_rectangle(self.select_rect_elem,
+                                            self.select_rect)
+
+    def is_idle(self):
+        return self.state == State.IDLE
@@ -74,3 +74,35 @@ class Tool:
         handles changed through some non-tool mechanism.
         '''
         raise NotImplementedError
+
+    def handle_elems_translated(self, elems, dv, tag):
+        '''
+        Handle a notification that the specified elems have all been
+        translated by dv as a group.  This is sent once for the whole group
+        instead of sending handle_elem_handles_changed() for each elem.  Any
+        other canvas items carrying the canvas tag have been moved along with
+        the elems.
+        '''
+        raise NotImplementedError
+
+    def handle_elems_deleted(self, elems):
+        '''
+        Handle a notification that the specified elems are about to be deleted
+        through some non-tool mechanism; the tool must drop any references it
+        holds to them.
+        '''
+        raise NotImplementedError
+
+    def handle_view_changed(self):
+        '''
+        Handle a notification that the workspace's view transform has changed,
+        so that anything the tool has drawn on the canvas needs redrawing.
+        '''
+        raise NotImplementedError
+
+    def is_idle(self):
+        '''
+        Returns True if the tool isn't in the middle of some operation, such
+        as a drag, so that the document can be changed underneath it.
+        '''
+        raise NotImplementedError
@@ -0,0 +1,234 @@
+'''
+Recording and replay of the input events a Workspace handles, for
+benchmarking interactive performance against real user sessions.
+
+A Recorder attached to a Workspace writes a trace file: a JSON header line
+describing the window, view and selected tool, then one JSON list per event
+holding its timestamp in seconds since recording started, its kind, the
+widget it was delivered to and the event fields listed in FIELDS for its
+kind.  The document as it was when recording started is saved next to the
+trace, at snapshot_path(), so that a trace is self-contained.
+
+A Replayer feeds a trace back through a fresh Workspace, headless or under a
+real Tk window, as fast as it can.  Each event is timed from its handler being
+called until the resulting idle callbacks, which include Tk's redraw, have
+run.  Motion coalescing is disabled so that every recorded motion event
+reaches the tool, and the undo History is clocked by the trace's timestamps
+so that edits coalesce as they did when the trace was recorded.  Typing into
+inspector widgets isn't recorded.
+'''
+import argparse
+import collections
+import json
+import math
+import time
+
+from . import coords
+from . import docfile
+from . import geom
+from .tk import headless
+from .workspace import Workspace
+
+
+TRACE_VERSION = 1
+
+FIELDS = {'down'      : ('x', 'y', 'state'),
+          'up'        : ('x', 'y', 'state'),
+          'moved'     : ('x', 'y', 'state'),
+          'wheel'     : ('x', 'y', 'state', 'num', 'delta'),
+          'key'       : ('keysym', 'char', 'state'),
+          'configure' : ('width', 'height'),
+          }
+
+PERCENTILES = (50, 90, 99)
+
+
+def snapshot_path(path):
+    return path + '.doc'
+
+
+def _widgets(workspace):
+    return (('canvas', workspace.canvas), ('tools', workspace.tool_canvas))
+
+
+class Recorder:
+    '''
+    Records the events handled by a Workspace to the trace file at path.
+    '''
+    def __init__(self, workspace, path, clock=time.monotonic):
+        self.workspace = workspace
+        self.clock     = clock
+        self.nevents   = 0
+
+        docfile.save_store(workspace.doc.store, snapshot_path(path))
+        view   = workspace.view
+        header = {'version'  : TRACE_VERSION,
+                  'geometry' : workspace.get_geometry(),
+                  'width'    : workspace.canvas.width,
+                  'height'   : workspace.canvas.height,
+                  'scale'    : view.scale,
+                  'offset'   : (view.offset.x, view.offset.y),
+                  'tool'     : workspace.tools.index(workspace.selected_tool),
+                  'grid'     : workspace.canvas.grid_shown,
+                  }
+        self._f  = open(path, 'w',  # pylint: disable=consider-using-with
+                        encoding='utf-8')
+        self._f.write(json.dumps(header) + '\n')
+        self._t0 = clock()
+
+    def record(self, kind, e):
+        '''
+        Records an event; events on widgets other than the document and tool
+        canvases are ignored since the Workspace ignores them too.
+        '''
+        for name, canvas in _widgets(self.workspace):
+            if e.widget == canvas._canvas:
+                break
+        else:
+            return
+
+        fields = [getattr(e, f) for f in FIELDS[kind]]
+        self._f.write(json.dumps([round(self.clock() - self._t0, 6), kind,
+                                  name] + fields) + '\n')
+        self.nevents += 1
+
+    def close(self):
+        self._f.close()
+
+
+def percentile(values, p):
+    '''
+    Returns the p'th percentile of the sorted list values, by nearest rank.
+    '''
+    return values[max(0, math.ceil(p * len(values) / 100) - 1)]
+
+
+class Report:
+    '''
+    Per-kind event latencies, in seconds, and canvas operation counts.  The
+    operation counts are only available when replaying headless.
+    '''
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.ops       = collections.defaultdict(collections.Counter)
+        self.elapsed   = 0
+
+    def add(self, kind, dt, ops):
+        self.latencies[kind].append(dt)
+        if ops is not None:
+            self.ops[kind].update(ops)
+
+    def __len__(self):
+        return sum(len(l) for l in self.latencies.values())
+
+    def percentiles(self, kind):
+        values = sorted(self.latencies[kind])
+        return [percentile(values, p) for p in PERCENTILES]
+
+    def format(self):
+        lines = ['%-10s %7s %s %9s %10s' % (
+                 'event', 'count',
+                 ' '.join('%7s' % ('p%u ms' % p) for p in PERCENTILES),
+                 'max ms', 'ops/event')]
+        for kind in sorted(self.latencies):
+            values = self.latencies[kind]
+            ops    = sum(self.ops[kind].values())
+            lines.append('%-10s %7u %s %9.3f %10.1f' % (
+                         kind, len(values),
+                         ' '.join('%7.3f' % (v * 1000)
+                                  for v in self.percentiles(kind)),
+                         max(values) * 1000, ops / len(values)))
+
+        total = collections.Counter()
+        for ops in self.ops.values():
+            total.update(ops)
+        if total:
+            lines.append('ops: ' + ', '.join('%s %u' % (k, v)
+                                             for k, v in total.most_common()))
+        lines.append('%u events in %.3f s' % (len(self), self.elapsed))
+        return '\n'.join(lines)
+
+
+class Replayer:
+    '''
+    Replays the trace at path through a fresh Workspace, which is headless
+    unless use_tk is True.
+    '''
+    def __init__(self, path, use_tk=False):
+        with open(path, encoding='utf-8') as f:
+            self.header = json.loads(f.readline())
+            self.events = [json.loads(l) for l in f]
+        if self.header['version'] != TRACE_VERSION:
+            raise ValueError('Unsupported trace version %s.' %
+                             self.header['version'])
+
+        es, _    = docfile.load_store(snapshot_path(path))
+        cls      = Workspace if use_tk else headless.headless_class(Workspace)
+        self.t   = 0
+        self.workspace = ws = cls(motion_fps=0, elem_store=es)
+        ws.history.clock = lambda: self.t
+
+        h = self.header
+        if use_tk:
+            ws.set_geometry(*h['geometry'])
+            ws._root.update()
+        else:
+            ws.resize(h['geometry'][2], h['geometry'][3])
+        ws.select_tool(ws.tools[h['tool']])
+        if not h['grid']:
+            ws.canvas.hide_grid()
+        ws.set_view(coords.View(h['scale'], geom.Vec(*h['offset'])))
+        ws._root.update()
+
+        self._handlers = {
+            'down'      : lambda e: ws.handle_mouse_down(ws, e, e.x, e.y),
+            'up'        : lambda e: ws.handle_mouse_up(ws, e, e.x, e.y),
+            'moved'     : lambda e: ws.handle_mouse_moved(ws, e, e.x, e.y),
+            'wheel'     : ws._handle_mouse_wheel,
+            'key'       : ws.handle_key_pressed,
+            'configure' : ws.canvas._handle_config_change,
+        }
+
+    def run(self):
+        '''
+        Replays the events and returns a Report.
+        '''
+        ws        = self.workspace
+        widgets   = dict(_widgets(ws))
+        op_counts = getattr(ws, 'op_counts', None)
+        report    = Report()
+        t0        = time.perf_counter()
+        for ev in self.events:
+            self.t, kind, widget = ev[:3]
+            e = headless.Event(widgets[widget]._canvas,
+                               **dict(zip(FIELDS[kind], ev[3:])))
+            handler = self._handlers[kind]
+
+            ops0 = op_counts() if op_counts else None
+            t    = time.perf_counter()
+            handler(e)
+            ws._root.update()
+            dt   = time.perf_counter() - t
+            ops  = op_counts() - ops0 if op_counts else None
+            report.add(kind, dt, ops)
+        report.elapsed = time.perf_counter() - t0
+        return report
+
+
+def main(args):
+    replayer = Replayer(args.trace, use_tk=args.tk)
+    print(replayer.run().format())
+    replayer.workspace.close()
+
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Replays a tkdraw input trace and reports latencies.')
+    parser.add_argument('trace', help='Trace recorded with tkdraw --record.')
+    parser.add_argument('--tk', action='store_true',
+                        help='Replay in a Tk window rather than headless.')
+    main(parser.parse_args())
+
+
+if __name__ == '__main__':
+    _main()
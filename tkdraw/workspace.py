@@ -1,10 +1,20 @@
-import tkinter.font
+import collections
+import math
+import time
 
 from .tk.elems import TKBase, Canvas
+from .tk.fonts import FontCache
 from . import tools
 from . import coords
 from . import geom
 from . import document
+from . import editor
+from .elems import materialize, NN_RADIUS
+from .inspectors import StatsInspector
+from . import journal
+from . import history
+from . import renderer
+from . import stats
 
 
 WINDOW_X      = 10
@@ -19,18 +29,43 @@ TOOLS_HEIGHT = 400
 INSPECT_WIDTH  = 200
 INSPECT_HEIGHT = 400
 
+# Maximum rate at which mouse motion is delivered to the selected tool.  Motion
+# events that arrive faster than this are coalesced down to the latest one.
+MOTION_FPS = 60
+
+# Zoom limits, in canvas units per grid unit, the factor by which each zoom
+# step scales the view and the number of canvas units each scroll wheel step
+# pans it by.
+MIN_SCALE  = 0.02
+MAX_SCALE  = 200
+ZOOM_STEP  = 1.25
+PAN_STEP   = 40
+
+# Number of grid photos, one per grid spacing, kept around for reuse.
+GRID_PHOTO_CACHE = 4
+
+# Key that toggles the handler latency stats and the interval at which the
+# inspector's stats panel is refreshed while they are shown.
+STATS_KEYSYM     = 'F12'
+STATS_REFRESH_MS = 500
+
 
 def clamp(l, v, r):
     return l if v < l else r if v > r else v
 
 
 class MousePoint(geom.Vec):
+    __slots__ = ('ex', 'ey', 'modifiers')
+
     def __init__(self, x, y, ex, ey, modifiers):
         super().__init__(x, y)
         self.ex        = ex
         self.ey        = ey
         self.modifiers = modifiers
 
+    def __reduce__(self):
+        return (MousePoint, (self.x, self.y, self.ex, self.ey, self.modifiers))
+
 
 class ToolCanvas(Canvas):
     def __init__(self, workspace, canvas, width, height):
@@ -52,27 +87,46 @@ class InspectCanvas(Canvas):
                 geom.Vec(0, 1), geom.Vec(0, INSPECT_HEIGHT - 2))
         self.text_y      = None
         self._entries    = []
-        self.label_font  = tkinter.font.Font(family='Arial', size=12,
-                                             weight='bold')
-        self.header_font = tkinter.font.Font(family='Arial', size=10,
-                                             weight='bold')
-        self.field_font  = tkinter.font.Font(family='Arial', size=10)
+        self._pinned     = {}
+        self.label_font  = workspace.add_font(family='Arial', size=12,
+                                              weight='bold')
+        self.header_font = workspace.add_font(family='Arial', size=10,
+                                              weight='bold')
+        self.field_font  = workspace.add_font(family='Arial', size=10)
 
         self.register_handler('<Configure>', self.handle_config_change)
 
     def handle_config_change(self, e):
         self.border_line.move_line(0, 1, 0, e.height - 2)
+        self.height = e.height
+        for elem, dy in self._pinned.values():
+            elem.move_to(elem.x, e.height - dy)
 
     def clear(self):
         self.text_y = 3
         self.workspace.canvas.focus_set()
         for e in self._entries:
             e.destroy()
-        for e in self._canvas.find_all():
-            if e != self.border_line._elem_id:
-                self.delete(e)
+        with self.batch():
+            for e in self.find_all():
+                if e != self.border_line._elem_id and e not in self._pinned:
+                    self.delete(e)
         self._entries = []
 
+    def add_pinned_field(self, dy, text, font=None):
+        '''
+        Adds a field dy canvas units above the bottom of the inspector, which
+        stays there as the inspector is resized and isn't removed by clear().
+        '''
+        elem = self.add_text(geom.Vec(3, self.height - dy), text=text,
+                             anchor='nw', font=font or self.field_font)
+        self._pinned[elem._elem_id] = (elem, dy)
+        return elem
+
+    def delete_pinned_field(self, elem):
+        del self._pinned[elem._elem_id]
+        self.delete_elem(elem)
+
     def iadd_title(self, text):
         elem = self.add_text(geom.Vec(3, self.text_y), text=text, anchor='nw',
                              font=self.label_font)
@@ -103,7 +157,8 @@ class InspectCanvas(Canvas):
     def iadd_multiline_entry(self, nlines=1, **kwargs):
         elem = self.add_multiline_entry(font=self.field_font, **kwargs)
         elem.configure(highlightthickness=1)
-        h = self.field_font.metrics('linespace') * nlines
+        h = self.workspace.font_cache.metrics(self.field_font,
+                                              'linespace') * nlines
         self.add_window(10, self.text_y, elem, anchor='nw',
                         width=INSPECT_WIDTH-10-4, height=h+4)
         self.text_y += 24
@@ -112,70 +167,107 @@ class InspectCanvas(Canvas):
 
 
 class DrawCanvas(Canvas):
+    '''
+    The canvas the document is drawn on.  The grid is drawn as a single image
+    item holding a screen-sized photo of grid dots, which is positioned so
+    that the dots line up with the view's grid points.  Resizing the canvas
+    doesn't touch the grid at all since the photo already covers the screen,
+    panning just moves the item and toggling the grid hides or shows it.
+    Zooming changes the spacing of the dots; a photo is built for each spacing
+    and the most recent GRID_PHOTO_CACHE of them are kept around.
+    '''
     def __init__(self, workspace, canvas, width, height):
         super().__init__(workspace, canvas, width, height)
-        self.h_rects       = []
-        self.v_rects       = []
-        self.width_points  = None
-        self.height_points = None
-        self.grid_shown    = True
+        self.grid_shown   = True
+        self.grid_image   = None
+        self._grid_photos = collections.OrderedDict()
+        self._grid_pitch  = None
 
-        z_rect            = geom.Rect.zero()
-        self.content_rect = self.add_rectangle(z_rect, outline='', fill='black')
-        self.h_pad        = self.add_rectangle(z_rect, fill='white', outline='')
-        self.v_pad        = self.add_rectangle(z_rect, fill='white', outline='')
+        root             = workspace._root
+        self._grid_width  = root.winfo_screenwidth()
+        self._grid_height = root.winfo_screenheight()
 
         self.register_handler('<Configure>', self._handle_config_change)
 
     def _handle_config_change(self, e):
+        if self._workspace.recorder is not None:
+            self._workspace.recorder.record('configure', e)
+        self.width  = e.width
+        self.height = e.height
+        self._workspace.set_view(self._workspace.view)
+
+    def visible_rect(self):
         '''
-        Called when the canvas size changes.  Mainly this deals with drawing
-        the grid on the canvas.  The naive algorithm is O(MN) and draws a
-        single pixel at each grid point.  As the window gets large, the
-        performance tanks incredibly badly with that algorithm.
-
-        Instead, we start with a black rectangle covering the entire canvas
-        and then draw white horizontal bands spaced to carve out horizontal
-        lines from the black rectangle and then we draw white vertical bands
-        spaced to cut the black lines up into individual pixels at each grid
-        point.  This is O(M + N) and performance is snappy, even on my old 2012
-        Macbook Air.
-        '''
-        self.content_rect.resize(geom.Rect.from_vec(
-            geom.Vec(e.width - 1, e.height - 1)))
-        self.width_points, self.height_points = coords.canvas_to_grid_floor(
-            e.width - 1, e.height - 1)
-
-        h_bands = coords.get_canvas_h_bands(e.width, e.height)
-        for i, R in enumerate(h_bands):
-            if i < len(self.h_rects):
-                self.h_rects[i].resize(R)
-            else:
-                r = self.add_rectangle(R, fill='white', outline='')
-                self.h_rects.append(r)
+        Returns the rectangle of the canvas, in grid coordinates.
+        '''
+        return self._workspace.view.canvas_to_grid_rect(geom.Rect.from_vec(
+            geom.Vec(self.width - 1, self.height - 1)))
 
-        v_bands = coords.get_canvas_v_bands(e.width, e.height)
-        for i, R in enumerate(v_bands):
-            if i < len(self.v_rects):
-                self.v_rects[i].resize(R)
-            else:
-                r = self.add_rectangle(R, fill='white', outline='')
-                self.v_rects.append(r)
+    def _build_grid_photo(self, pitch):
+        '''
+        Builds a photo of grid dots spaced pitch canvas units apart, one
+        spacing larger than the screen in each dimension so that it can be
+        shifted by up to a spacing and still cover the canvas.  When the
+        spacing is a whole number of pixels Tk builds the photo for us by
+        tiling a single-dot tile across it, otherwise we build one row of dots
+        and copy it down to each row of grid points.
+        '''
+        w     = self._grid_width + math.ceil(pitch)
+        h     = self._grid_height + math.ceil(pitch)
+        photo = self.add_photo(w, h)
+        if pitch == int(pitch):
+            tile = self.add_photo(int(pitch), int(pitch))
+            tile.fill('black', 0, 0, 1, 1)
+            photo.copy(tile, (0, 0, w, h))
+        else:
+            row = self.add_photo(w, 1)
+            for x in coords.grid_dots(pitch, w):
+                row.fill('black', x, 0, x + 1, 1)
+            for y in coords.grid_dots(pitch, h):
+                photo.copy(row, (0, y))
+        return photo
+
+    def _grid_photo(self, pitch):
+        photo = self._grid_photos.get(pitch)
+        if photo is not None:
+            self._grid_photos.move_to_end(pitch)
+            return photo
+
+        photo = self._build_grid_photo(pitch)
+        self._grid_photos[pitch] = photo
+        if len(self._grid_photos) > GRID_PHOTO_CACHE:
+            self._grid_photos.popitem(last=False)
+        return photo
+
+    def draw_grid(self):
+        '''
+        Positions the grid for the current view, switching to the photo for
+        the view's grid spacing if it has changed.  The view decimates the
+        grid when zoomed out so that the dots never get too dense.
+        '''
+        view  = self._workspace.view
+        pitch = view.grid_pitch()
+        o     = view.grid_origin()
+        if self.grid_image is None:
+            self.grid_image = self.add_image(round(o.x), round(o.y),
+                                             self._grid_photo(pitch),
+                                             anchor='nw')
+            if not self.grid_shown:
+                self.grid_image.hide()
+        else:
+            if pitch != self._grid_pitch:
+                self.grid_image.configure(image=self._grid_photo(pitch).name)
+            self.grid_image.move_to(round(o.x), round(o.y))
+        self._grid_pitch = pitch
 
     def hide_grid(self):
-        self.content_rect.set_fill('white')
-        for r in self.h_rects:
-            r.hide()
-        for r in self.v_rects:
-            r.hide()
+        if self.grid_image is not None:
+            self.grid_image.hide()
         self.grid_shown = False
 
     def show_grid(self):
-        self.content_rect.set_fill('black')
-        for r in self.h_rects:
-            r.show()
-        for r in self.v_rects:
-            r.show()
+        if self.grid_image is not None:
+            self.grid_image.show()
         self.grid_shown = True
 
     def toggle_grid(self):
@@ -186,9 +278,21 @@ class DrawCanvas(Canvas):
 
 
 class Workspace(TKBase):
-    def __init__(self):
+    '''
+    The application.  The document is journaled to path if one is given;
+    otherwise it is held only in memory, starting out with the records of
+    elem_store if one is given.  Setting recorder to a trace.Recorder records
+    the input events the Workspace handles.
+    '''
+    def __init__(self, motion_fps=MOTION_FPS, path=None, elem_store=None):
         super().__init__()
 
+        self.recorder        = None
+        self.motion_fps      = motion_fps
+        self._motion_pending = None
+        self._motion_timer   = None
+        self._motion_time    = 0
+
         w = coords.canvasx_floor(self._root.winfo_screenwidth() - 2*WINDOW_X)
         h = coords.canvasy_floor(self._root.winfo_screenheight() -
                                  TITLE_HEIGHT - WINDOW_Y - WINDOW_X -
@@ -198,7 +302,7 @@ class Workspace(TKBase):
         self.tool_canvas = self.add_canvas(TOOLS_WIDTH, TOOLS_HEIGHT, 0, 0,
                                            sticky='nws', _cls=ToolCanvas)
         self.canvas = self.add_canvas(1, 1, 1, 0, sticky='nsew',
-                                      _cls=DrawCanvas)
+                                      _cls=DrawCanvas, background='white')
         self.inspect_canvas = self.add_canvas(INSPECT_WIDTH, INSPECT_HEIGHT,
                                               2, 0, sticky='nes',
                                               _cls=InspectCanvas)
@@ -216,9 +320,28 @@ class Workspace(TKBase):
         self.canvas.register_handler('<KeyPress>', self.handle_key_pressed)
         self.canvas.register_handler('<Enter>', self.handle_canvas_entered)
         self.canvas.register_handler('<Leave>', self.handle_canvas_exited)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.canvas.register_handler(sequence, self._handle_mouse_wheel)
         self.canvas.focus_set()
 
-        self.doc = document.Document()
+        self._materializing = False
+        self.text_font      = self.named_font('TkDefaultFont')
+        self.font_cache     = FontCache()
+        self.view           = coords.View()
+
+        self.path = path
+        if path is not None:
+            self.doc = journal.open_document(
+                    path, materialize=self._materialize_elem,
+                    nn_radius=NN_RADIUS)
+        else:
+            self.doc = document.Document(materialize=self._materialize_elem,
+                                         elem_store=elem_store,
+                                         nn_radius=NN_RADIUS)
+        self.history  = history.History(self)
+        self.renderer = renderer.Renderer(self)
+        self.editor   = editor.Editor(self)
+        self.doc.history = self.history
 
         self.tools = []
         self.selected_tool = None
@@ -236,9 +359,14 @@ class Workspace(TKBase):
             t = tcls(self, R)
             self.tools.append(t)
 
+        self.stats           = stats.Stats(self)
+        self.stats_inspector = None
+        self._stats_timer    = None
+
         self.select_tool(self.tools[0])
 
     def select_tool(self, t):
+        self._flush_motion()
         if self.selected_tool:
             self.selected_tool.handle_tool_deselected()
         self.inspect_canvas.clear()
@@ -251,15 +379,15 @@ class Workspace(TKBase):
         if e.widget != self.canvas._canvas:
             return
 
-        ex = clamp(0, coords.canvasx_to_gridx_float(x),
-                   self.canvas.width_points)
-        ey = clamp(0, coords.canvasy_to_gridy_float(y),
-                   self.canvas.height_points)
-        x  = clamp(0, coords.canvasx_to_gridx_round(x),
-                   self.canvas.width_points)
-        y  = clamp(0, coords.canvasy_to_gridy_round(y),
-                   self.canvas.height_points)
-        handler(MousePoint(x, y, ex, ey, e.state))
+        R  = self.canvas.visible_rect()
+        ex = clamp(R.l, self.view.canvasx_to_gridx_float(x), R.r)
+        ey = clamp(R.t, self.view.canvasy_to_gridy_float(y), R.b)
+        x  = clamp(math.ceil(R.l), self.view.canvasx_to_gridx_round(x),
+                   math.floor(R.r))
+        y  = clamp(math.ceil(R.t), self.view.canvasy_to_gridy_round(y),
+                   math.floor(R.b))
+        with self.canvas.batch():
+            handler(MousePoint(x, y, ex, ey, e.state))
 
     def _handle_tool_mouse_down(self, _e, x, y):
         i = (y // TOOL_DIM) * 2 + (x // TOOL_DIM)
@@ -267,6 +395,9 @@ class Workspace(TKBase):
             self.select_tool(self.tools[i])
 
     def handle_mouse_down(self, _, e, x, y):
+        if self.recorder is not None:
+            self.recorder.record('down', e)
+        self._flush_motion()
         if e.widget == self.tool_canvas._canvas:
             self._handle_tool_mouse_down(e, x, y)
         else:
@@ -274,22 +405,150 @@ class Workspace(TKBase):
                                      self.selected_tool.handle_mouse_down)
 
     def handle_mouse_up(self, _, e, x, y):
+        if self.recorder is not None:
+            self.recorder.record('up', e)
+        self._flush_motion()
         self._handle_mouse_event(e, x, y, self.selected_tool.handle_mouse_up)
 
     def handle_mouse_moved(self, _, e, x, y):
+        '''
+        Mouse motion is coalesced so that the selected tool sees at most
+        motion_fps motion events per second, always at the latest mouse
+        position.  Any other event that reaches the tool flushes the pending
+        motion first so that the tool sees events in order.  Setting
+        motion_fps to 0 or None delivers every motion event immediately.
+        '''
+        if self.recorder is not None:
+            self.recorder.record('moved', e)
+        if not self.motion_fps:
+            self._handle_mouse_event(e, x, y,
+                                     self.selected_tool.handle_mouse_moved)
+            return
+
+        self._motion_pending = (e, x, y)
+        if self._motion_timer is None:
+            delay = (self._motion_time + 1 / self.motion_fps -
+                     time.monotonic())
+            if delay <= 0:
+                self._motion_timer = self.after_idle(self._handle_motion_timer)
+            else:
+                self._motion_timer = self.after(int(delay * 1000),
+                                                self._handle_motion_timer)
+
+    def _handle_motion_timer(self):
+        self._motion_timer = None
+        self._flush_motion()
+
+    def _flush_motion(self):
+        '''
+        Delivers any pending coalesced motion event to the selected tool now.
+        '''
+        if self._motion_timer is not None:
+            self.after_cancel(self._motion_timer)
+            self._motion_timer = None
+        if self._motion_pending is None:
+            return
+
+        e, x, y              = self._motion_pending
+        self._motion_pending = None
+        self._motion_time    = time.monotonic()
         self._handle_mouse_event(e, x, y, self.selected_tool.handle_mouse_moved)
 
     def handle_key_pressed(self, e):
+        if self.recorder is not None:
+            self.recorder.record('key', e)
+        self._flush_motion()
         if e.char in ('g', 'G'):
             self.canvas.toggle_grid()
+        elif e.char in ('+', '='):
+            self._zoom(ZOOM_STEP, self.canvas.width / 2,
+                       self.canvas.height / 2)
+        elif e.char == '-':
+            self._zoom(1 / ZOOM_STEP, self.canvas.width / 2,
+                       self.canvas.height / 2)
+        elif e.char == '0':
+            self.set_view(coords.View())
+        elif e.keysym == STATS_KEYSYM:
+            self._toggle_stats()
+        elif (e.state & 4) and e.keysym in ('s', 'S'):
+            self.editor.save()
+        elif (e.state & 4) and e.keysym == 'z':
+            self.editor.undo()
+        elif (e.state & 4) and e.keysym in ('Z', 'y', 'Y'):
+            self.editor.redo()
+        else:
+            with self.canvas.batch():
+                self.selected_tool.handle_key_pressed(e)
+
+    def _handle_mouse_wheel(self, e):
+        '''
+        The scroll wheel pans the view vertically, or horizontally with Shift
+        held, and zooms it about the mouse with Control held.  X11 reports
+        wheel steps as button 4 and 5 presses rather than MouseWheel events.
+        '''
+        if self.recorder is not None:
+            self.recorder.record('wheel', e)
+        if e.num == 4:
+            steps = 1
+        elif e.num == 5:
+            steps = -1
+        else:
+            steps = 1 if e.delta > 0 else -1
+
+        if e.state & 4:
+            self._zoom(ZOOM_STEP ** steps, e.x, e.y)
+        elif e.state & 1:
+            self.set_view(self.view.panned(steps * PAN_STEP, 0))
+        else:
+            self.set_view(self.view.panned(0, steps * PAN_STEP))
+
+    def _zoom(self, factor, x, y):
+        '''
+        Zooms the view by factor about the canvas point (x, y), within the
+        MIN_SCALE to MAX_SCALE limits.
+        '''
+        scale = clamp(MIN_SCALE, self.view.scale * factor, MAX_SCALE)
+        self.set_view(self.view.zoomed(scale / self.view.scale, x, y))
+
+    def set_view(self, view):
+        '''
+        Changes the view transform, redrawing the grid, the elems and the
+        selected tool's decorations to match.
+        '''
+        self._flush_motion()
+        self.view = view
+        with self.canvas.batch():
+            self.canvas.draw_grid()
+            self.renderer.set_view(view, self.canvas.visible_rect())
+            self.selected_tool.handle_view_changed()
+
+    def _toggle_stats(self):
+        '''
+        Enables the handler latency stats and shows them in the inspector, or
+        hides and disables them.
+        '''
+        if self.stats.enabled:
+            self.after_cancel(self._stats_timer)
+            self._stats_timer = None
+            self.stats_inspector.destroy()
+            self.stats_inspector = None
+            self.stats.disable()
         else:
-            self.selected_tool.handle_key_pressed(e)
+            self.stats.enable()
+            self.stats_inspector = StatsInspector(self.inspect_canvas)
+            self._refresh_stats()
+
+    def _refresh_stats(self):
+        self.stats_inspector.update(self.stats)
+        self._stats_timer = self.after(STATS_REFRESH_MS, self._refresh_stats)
 
     def handle_canvas_entered(self, e):
+        self._flush_motion()
         self._handle_mouse_event(e, e.x, e.y,
                                  self.selected_tool.handle_canvas_entered)
 
     def handle_canvas_exited(self, _e):
+        self._flush_motion()
         self.selected_tool.handle_canvas_exited()
 
     def handle_config_change(self, e):
@@ -312,39 +571,77 @@ class Workspace(TKBase):
     def handle_deactivate(self, e):
         if e.widget != self._root:
             return
+        self._flush_motion()
         self.selected_tool.handle_app_deactivated()
 
+    def close(self):
+        '''
+        Closes the document, waiting for its journal to be written out.
+        '''
+        self.doc.close()
+
+    def _materialize_elem(self, elem_store, slot):
+        '''
+        Creates the Elem object for a record in the document's ElemStore; the
+        Renderer gives it a canvas item if it is in view.  The new elem's
+        handles aren't reported to the selected tool since it can't have any
+        interest in an elem it has never seen.
+        '''
+        self._materializing = True
+        try:
+            return materialize(self, elem_store, slot)
+        finally:
+            self._materializing = False
+
     def notify_handles_changed(self, elem, handles):
-        self.selected_tool.handle_elem_handles_changed(elem, handles)
+        self.doc.elem_changed(elem)
+        if not self._materializing:
+            self.renderer.update_elem(elem)
+            self.selected_tool.handle_elem_handles_changed(elem, handles)
 
     def add_line(self, p0, p1):
         '''
         Add a line in grid coordinates to the workspace.
         '''
-        return self.canvas.add_line(coords.gridp_to_canvasp(p0),
-                                    coords.gridp_to_canvasp(p1))
+        return self.canvas.add_line(self.view.gridp_to_canvasp(p0),
+                                    self.view.gridp_to_canvasp(p1))
 
     def add_text(self, p0, **kwargs):
         '''
         Add a text item in grid coordinates to the workspace.
         '''
-        return self.canvas.add_text(coords.gridp_to_canvasp(p0), **kwargs)
+        return self.canvas.add_text(self.view.gridp_to_canvasp(p0), **kwargs)
 
     def add_rectangle(self, R, **kwargs):
         '''
         Add a rectangle in grid coordinates to the workspace.
         '''
-        R = geom.Rect(coords.gridp_to_canvasp(R.p0),
-                      coords.gridp_to_canvasp(R.p1))
+        R = geom.Rect(self.view.gridp_to_canvasp(R.p0),
+                      self.view.gridp_to_canvasp(R.p1))
         return self.canvas.add_rectangle(R, **kwargs)
 
+    def resize_rectangle(self, elem, R):
+        '''
+        Resize a rectangle previously added with add_rectangle() to the new
+        rectangle R in grid coordinates.
+        '''
+        elem.resize(geom.Rect(self.view.gridp_to_canvasp(R.p0),
+                              self.view.gridp_to_canvasp(R.p1)))
+
     def add_fine_rectangle(self, P, R, **kwargs):
         '''
         Add a rectangle finely sized in canvas coordinates centered at the
         grid point P to the workspace.
         '''
-        P = coords.gridp_to_canvasp(P)
+        P = self.view.gridp_to_canvasp(P)
         return self.canvas.add_rectangle(R + P, **kwargs)
 
+    def move_fine_rectangle(self, elem, P, R):
+        '''
+        Move a rectangle previously added with add_fine_rectangle() so that the
+        canvas rectangle R is centered at the grid point P.
+        '''
+        elem.resize(R + self.view.gridp_to_canvasp(P))
+
     def delete_canvas_elem(self, l):
         self.canvas.delete_elem(l)